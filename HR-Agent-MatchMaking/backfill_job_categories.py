@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+"""Backfill the ingest-time `language` / `category` / skill bitset fields on stored jobs."""
+from pymongo import UpdateOne
+from src.backend.api.config.database import get_jobs_collection
+from src.backend.api.services.job_classifier import classify_job
+from src.backend.api.services.skill_extractor import SKILL_VOCAB_VERSION
+
+def backfill_job_categories(batch_size: int = 500, force: bool = False):
+    """Classify jobs missing `language`/`category` or current skill bits (or all jobs with force=True)."""
+    coll = get_jobs_collection()
+
+    query = {} if force else {
+        "$or": [{"language": {"$exists": False}}, {"category": {"$exists": False}}, {"skill_vocab": {"$ne": SKILL_VOCAB_VERSION}}]
+    }
+    total = coll.count_documents(query)
+    print(f"Found {total} jobs needing classification...")
+
+    updated = 0
+    ops = []
+    for job in coll.find(query, {"_id": 1, "job_title": 1, "description": 1}):
+        ops.append(UpdateOne({"_id": job["_id"]}, {"$set": classify_job(job)}))
+        if len(ops) >= batch_size:
+            updated += coll.bulk_write(ops, ordered=False).modified_count
+            ops = []
+            print(f"Updated {updated} jobs...")
+    if ops:
+        updated += coll.bulk_write(ops, ordered=False).modified_count
+
+    print(f"\nTotal jobs classified: {updated}")
+    for doc in coll.aggregate([{"$group": {"_id": "$category", "count": {"$sum": 1}}}, {"$sort": {"count": -1}}]):
+        print(f"  {doc['_id']}: {doc['count']}")
+
+if __name__ == "__main__":
+    import sys
+    backfill_job_categories(force="--force" in sys.argv)
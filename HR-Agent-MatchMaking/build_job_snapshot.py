@@ -0,0 +1,24 @@
+#!/usr/bin/env python
+"""Rebuild the job index from MongoDB and publish it as the shared snapshot.
+
+Running workers pick the new snapshot up within JOB_SNAPSHOT_POLL_SECONDS.
+
+Usage:
+    python build_job_snapshot.py                      # JOB_SNAPSHOT_DIR from .env
+    python build_job_snapshot.py --dir /data/job_index
+"""
+import argparse
+from src.backend.api.config.settings import settings
+from src.backend.api.services.job_index import get_job_index
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dir", default=settings.JOB_SNAPSHOT_DIR)
+    args = parser.parse_args()
+    if not args.dir:
+        parser.error("set JOB_SNAPSHOT_DIR or pass --dir")
+    settings.JOB_SNAPSHOT_DIR = args.dir
+
+    index = get_job_index()
+    index.load(from_snapshot=False)
+    print(f"Published snapshot {index.snapshot_id}: {len(index)} jobs in {args.dir}")
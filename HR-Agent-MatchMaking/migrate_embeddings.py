@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+"""Rewrite stored job/resume embeddings in the compact binary format.
+
+Usage:
+    python migrate_embeddings.py                 # use EMBEDDING_STORAGE_FORMAT
+    python migrate_embeddings.py --format int8   # or float32 / float16
+"""
+import argparse
+from pymongo import UpdateOne
+from src.backend.api.config.database import get_jobs_collection, get_resumes_collection
+from src.backend.api.config.settings import settings
+from src.backend.api.services.embedding_codec import EMBEDDING_FIELDS, FORMATS, decode_embedding, encode_embedding
+
+def migrate_collection(coll, fmt: str, batch_size: int = 500) -> int:
+    """Re-encode every non-empty embedding not already stored as `fmt`."""
+    query = {"embedding": {"$exists": True, "$ne": []}, "embedding_format": {"$ne": fmt}}
+    total = coll.count_documents(query)
+    print(f"{coll.name}: {total} documents to migrate to {fmt}...")
+
+    migrated = 0
+    ops = []
+    for doc in coll.find(query, {"_id": 1, **EMBEDDING_FIELDS}):
+        vec = decode_embedding(doc)
+        if vec is None:
+            continue
+        update = {"$set": encode_embedding(vec, fmt, model_id=doc.get("embedding_model"))}
+        if fmt != "int8":
+            update["$unset"] = {"embedding_scale": ""}
+        ops.append(UpdateOne({"_id": doc["_id"]}, update))
+        if len(ops) >= batch_size:
+            migrated += coll.bulk_write(ops, ordered=False).modified_count
+            ops = []
+            print(f"  migrated {migrated}/{total}")
+    if ops:
+        migrated += coll.bulk_write(ops, ordered=False).modified_count
+    print(f"{coll.name}: migrated {migrated} documents")
+    return migrated
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--format", choices=FORMATS, default=settings.EMBEDDING_STORAGE_FORMAT)
+    args = parser.parse_args()
+    for coll in (get_jobs_collection(), get_resumes_collection()):
+        migrate_collection(coll, args.format)
@@ -3,11 +3,16 @@
 import sys
 import asyncio
 from src.backend.api.config.database import get_jobs_collection
-from src.backend.api.services.embedding_engine import embed_text
+from src.backend.api.services.embedding_cache import get_embedding_cache
+from src.backend.api.services.embedding_engine import configured_model_id, embed_texts, embedding_fields
+from src.backend.api.services.embedding_migration import read_active_version
 
 def reembed_jobs(batch_size: int = 50):
     """Fetch jobs without embeddings and generate embeddings for them."""
     coll = get_jobs_collection()
+    # Embed with the model version the API serves (read only: the API records it at startup)
+    model_id = (read_active_version() or {}).get("model_id") or configured_model_id()
+    print(f"Embedding model version: {model_id}")
     
     # Find jobs with missing or empty embeddings
     query = {"$or": [{"embedding": {"$exists": False}}, {"embedding": []}]}
@@ -20,11 +25,10 @@ def reembed_jobs(batch_size: int = 50):
         jobs = list(coll.find(query).skip(skip).limit(batch_size))
         print(f"Processing batch {skip // batch_size + 1}...", end=" ")
         
-        for job in jobs:
-            text = f"{job.get('job_title', '')} {job.get('company', '')} {job.get('description', '')}"
-            emb = embed_text(text)
+        texts = [f"{job.get('job_title', '')} {job.get('company', '')} {job.get('description', '')}" for job in jobs]
+        for job, emb in zip(jobs, embed_texts(texts, priority="bulk", model_id=model_id)):
             if emb:
-                coll.update_one({"_id": job["_id"]}, {"$set": {"embedding": emb}})
+                coll.update_one({"_id": job["_id"]}, {"$set": embedding_fields(emb, model_id)})
                 updated += 1
             else:
                 print(f"WARNING: Failed to embed job {job.get('job_id')}")
@@ -32,6 +36,7 @@ def reembed_jobs(batch_size: int = 50):
         print(f"Updated {len(jobs)} jobs (total: {updated})")
     
     print(f"\nTotal jobs re-embedded: {updated}")
+    print(f"Embedding cache: {get_embedding_cache().stats()}")
     
     # Verify
     count_with_emb = coll.count_documents({"embedding": {"$exists": True, "$ne": []}})
@@ -0,0 +1,69 @@
+"""
+Measure the accuracy cost of the ANN settings against exact cosine search.
+
+Usage (from project root):
+    python scripts/ann_recall.py --k 10 --queries 200 --nprobe 1,4,16,64 --ef 16,64,256
+"""
+import argparse
+import sys
+sys.path.insert(0, '.')
+
+import numpy as np
+
+from src.backend.api.config.database import get_resumes_collection
+from src.backend.api.services.ann_backend import HNSWBackend, IVFBackend, recall_at_k
+from src.backend.api.services.embedding_codec import EMBEDDING_FIELDS, decode_embedding
+from src.backend.api.services.job_index import get_job_index
+
+
+def load_queries(vectors: np.ndarray, count: int) -> np.ndarray:
+    """Prefer real resume embeddings; fall back to perturbed job vectors."""
+    dim = vectors.shape[1]
+    rows = []
+    for doc in get_resumes_collection().find({"embedding": {"$exists": True, "$ne": []}}, EMBEDDING_FIELDS).limit(count):
+        v = decode_embedding(doc)
+        if v is not None and v.shape == (dim,):
+            rows.append(v)
+    rng = np.random.default_rng(0)
+    while len(rows) < count and len(vectors):
+        v = vectors[rng.integers(len(vectors))] + rng.normal(scale=0.05, size=dim).astype(np.float32)
+        rows.append(v)
+    q = np.stack(rows) if rows else np.empty((0, dim), dtype=np.float32)
+    norms = np.linalg.norm(q, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (q / norms).astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--nprobe", default="1,4,16,64")
+    parser.add_argument("--ef", default="16,64,256")
+    args = parser.parse_args()
+
+    index = get_job_index()
+    index.load()
+    vectors = index.matrix()
+    queries = load_queries(vectors, args.queries)
+    print(f"Jobs: {len(vectors)}  queries: {len(queries)}  k: {args.k}")
+    print(f"{'backend':<8} {'param':<12} {'recall@k':>9} {'exact ms':>9} {'ann ms':>9}")
+
+    for nprobe in [int(x) for x in args.nprobe.split(",") if x]:
+        backend = IVFBackend(nprobe=nprobe)
+        backend.build(vectors)
+        r = recall_at_k(vectors, queries, backend, k=args.k)
+        print(f"{'ivf':<8} {'nprobe=' + str(nprobe):<12} {r['recall_at_k']:>9.3f} {r['exact_ms']:>9.2f} {r['approx_ms']:>9.2f}")
+
+    try:
+        for ef in [int(x) for x in args.ef.split(",") if x]:
+            backend = HNSWBackend(vectors.shape[1], ef_search=ef)
+            backend.build(vectors)
+            r = recall_at_k(vectors, queries, backend, k=args.k)
+            print(f"{'hnsw':<8} {'ef=' + str(ef):<12} {r['recall_at_k']:>9.3f} {r['exact_ms']:>9.2f} {r['approx_ms']:>9.2f}")
+    except ImportError:
+        print("hnswlib not installed; skipping HNSW")
+
+
+if __name__ == "__main__":
+    main()
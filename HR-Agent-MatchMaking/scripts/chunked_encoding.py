@@ -0,0 +1,98 @@
+"""
+Compare truncating encoding with chunked (and length-bucketed) encoding of long texts.
+
+Encodes the same resumes / job descriptions three ways with the configured model:
+  truncate          model.encode as before: everything past max_seq_length is dropped
+  chunked           token windows pooled per text, chunks batched in input order
+  chunked+bucketed  the same windows sorted by token length before batching
+and reports tokens/sec (non-padding tokens through the model), how much of each
+text was covered and the share of padding in the batches.
+
+Usage (from project root):
+    python scripts/chunked_encoding.py --texts 256
+"""
+import argparse
+import sys
+import time
+sys.path.insert(0, '.')
+
+import numpy as np
+
+from src.backend.api.config.database import get_jobs_collection, get_resumes_collection
+from src.backend.api.config.settings import settings
+
+
+def load_long_texts(count: int):
+    """Resume contents and job descriptions, padded with synthetic documents of mixed length."""
+    texts = []
+    try:
+        for doc in get_resumes_collection().find({}, {"_id": 0, "content": 1}).limit(count // 2):
+            texts.append(doc.get("content") or "")
+        for job in get_jobs_collection().find({}, {"_id": 0, "description": 1}).limit(count - len(texts)):
+            texts.append(job.get("description") or "")
+    except Exception as e:
+        print(f"MongoDB unavailable ({e}); using synthetic texts")
+    rng = np.random.default_rng(0)
+    words = "python java react aws docker kubernetes senior engineer team built led services data pipelines api".split()
+    while len(texts) < count:
+        texts.append(" ".join(rng.choice(words, size=int(rng.integers(5, 1500)))))
+    return [t for t in texts if t.strip()][:count]
+
+
+def padding_share(lengths, order, batch_size, cap):
+    real = padded = 0
+    for start in range(0, len(order), batch_size):
+        batch = [min(lengths[i], cap) + 2 for i in order[start:start + batch_size]]
+        real += sum(batch)
+        padded += max(batch) * len(batch)
+    return 1.0 - real / padded if padded else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--texts", type=int, default=256)
+    args = parser.parse_args()
+
+    from src.backend.api.services.embedding_engine import chunk_text, encode_chunked, get_model, token_offsets
+
+    model = get_model()
+    if model is None:
+        print("Embedding model unavailable")
+        sys.exit(1)
+    texts = load_long_texts(args.texts)
+    offsets = token_offsets(model, texts)
+    doc_tokens = np.array([len(o) for o in offsets])
+    cap = model.max_seq_length - 2
+    window = settings.EMBED_CHUNK_TOKENS or cap
+    chunk_lengths = [n for t, o in zip(texts, offsets) for _, n in chunk_text(t, o, window, settings.EMBED_CHUNK_OVERLAP, settings.EMBED_CHUNK_MAX)]
+    print(f"{len(texts)} texts, {doc_tokens.sum()} tokens, {int((doc_tokens > cap).sum())} longer than {cap} tokens, {len(chunk_lengths)} chunks")
+
+    model.encode(texts[:8], batch_size=8, convert_to_numpy=True, show_progress_bar=False)  # warm up
+    batch = settings.EMBED_BATCH_SIZE
+    # SentenceTransformer.encode sorts by length itself, so truncate mode pads like sorted batches
+    by_len = list(np.argsort(doc_tokens))
+    modes = {
+        "truncate": (lambda: model.encode(texts, batch_size=batch, convert_to_numpy=True, show_progress_bar=False),
+                     np.minimum(doc_tokens, cap).sum(), padding_share(doc_tokens, by_len, batch, cap)),
+        "chunked": (lambda: encode_chunked(model, texts, bucket=False),
+                    sum(chunk_lengths), padding_share(chunk_lengths, range(len(chunk_lengths)), batch, cap)),
+        "chunked+bucketed": (lambda: encode_chunked(model, texts, bucket=True),
+                             sum(chunk_lengths), padding_share(chunk_lengths, list(np.argsort(chunk_lengths)), batch, cap)),
+    }
+    reach = window + (settings.EMBED_CHUNK_MAX - 1) * max(1, window - settings.EMBED_CHUNK_OVERLAP)
+    coverage = {
+        "truncate": np.minimum(doc_tokens, cap).sum() / doc_tokens.sum(),
+        "chunked": np.minimum(doc_tokens, reach).sum() / doc_tokens.sum(),
+    }
+    coverage["chunked+bucketed"] = coverage["chunked"]
+
+    print(f"{'mode':18} {'seconds':>8} {'texts/s':>8} {'tokens/s':>10} {'coverage':>9} {'padding':>8}")
+    for name, (run, tokens, padding) in modes.items():
+        started = time.perf_counter()
+        run()
+        seconds = time.perf_counter() - started
+        print(f"{name:18} {seconds:8.2f} {len(texts) / seconds:8.1f} {tokens / seconds:10.0f} {coverage[name]:9.1%} {padding:8.1%}")
+
+
+if __name__ == "__main__":
+    main()
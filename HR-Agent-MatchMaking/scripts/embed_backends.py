@@ -0,0 +1,85 @@
+"""
+Compare the PyTorch and ONNX Runtime embedding backends.
+
+Parity: embeds the same texts with sentence-transformers and with each exported ONNX
+graph (fp32 and int8) and fails if any text's cosine similarity to the PyTorch vector
+is below `--min-cosine`. Benchmark: batch throughput and single-text latency per backend.
+
+Usage (from project root, after scripts/export_onnx.py):
+    python scripts/embed_backends.py --texts 256 --min-cosine 0.99
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+sys.path.insert(0, '.')
+
+import numpy as np
+
+from src.backend.api.config.settings import settings
+from src.backend.api.services.onnx_embedder import OnnxEmbedder, onnx_model_file
+from embed_throughput import load_texts
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def benchmark(model, texts, batch_size, samples):
+    started = time.perf_counter()
+    model.encode(texts, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False)
+    throughput = len(texts) / (time.perf_counter() - started)
+    latencies = []
+    for text in texts[:samples]:
+        started = time.perf_counter()
+        model.encode([text], batch_size=1, convert_to_numpy=True, show_progress_bar=False)
+        latencies.append((time.perf_counter() - started) * 1000.0)
+    return throughput, statistics.median(latencies), percentile(latencies, 0.95)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=settings.MODEL_NAME)
+    parser.add_argument("--onnx-dir", default=settings.EMBED_ONNX_DIR)
+    parser.add_argument("--texts", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=settings.EMBED_BATCH_SIZE)
+    parser.add_argument("--latency-samples", type=int, default=50)
+    parser.add_argument("--threads", type=int, default=settings.EMBED_ONNX_THREADS)
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    args = parser.parse_args()
+
+    from sentence_transformers import SentenceTransformer
+
+    backends = {"torch": SentenceTransformer(args.model, device="cpu")}
+    for quantize in (False, True):
+        if os.path.exists(onnx_model_file(args.onnx_dir, quantize)):
+            backends["onnx-int8" if quantize else "onnx"] = OnnxEmbedder(args.onnx_dir, quantize=quantize, threads=args.threads)
+    if len(backends) == 1:
+        print(f"No ONNX model in {args.onnx_dir}; run scripts/export_onnx.py first")
+        sys.exit(1)
+
+    texts = load_texts(args.texts)
+    for model in backends.values():
+        model.encode(texts[:8], batch_size=8, convert_to_numpy=True, show_progress_bar=False)  # warm up
+
+    reference = backends["torch"].encode(texts, batch_size=args.batch_size, convert_to_numpy=True, show_progress_bar=False, normalize_embeddings=True)
+    failed = False
+    print(f"{'backend':10} {'min cos':>8} {'mean cos':>9} {'texts/s':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for name, model in backends.items():
+        vecs = model.encode(texts, batch_size=args.batch_size, convert_to_numpy=True, show_progress_bar=False)
+        vecs = vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+        cos = (vecs * reference).sum(axis=1)
+        throughput, p50, p95 = benchmark(model, texts, args.batch_size, args.latency_samples)
+        print(f"{name:10} {cos.min():8.4f} {cos.mean():9.4f} {throughput:9.1f} {p50:8.2f} {p95:8.2f}")
+        failed |= bool(cos.min() < args.min_cosine)
+
+    if failed:
+        print(f"FAIL: some backend below cosine {args.min_cosine} of the PyTorch embeddings")
+        sys.exit(1)
+    print(f"OK: all backends within cosine {args.min_cosine} of the PyTorch embeddings")
+
+
+if __name__ == "__main__":
+    main()
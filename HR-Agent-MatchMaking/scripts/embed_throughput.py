@@ -0,0 +1,80 @@
+"""
+Compare embedding throughput: one forward pass per text vs batched encoding.
+
+Encodes the same texts four ways and prints texts/sec for each:
+  per-call     one `embed_texts([text])` at a time (the old `embed_text` path)
+  concurrent   `--concurrency` threads, each text its own forward pass
+  micro-batch  `--concurrency` threads calling `embed_text` through the micro-batcher
+  embed_texts  the whole list in one call
+
+Usage (from project root):
+    python scripts/embed_throughput.py --texts 512 --concurrency 32 --max-batch 32 --max-wait-ms 5
+"""
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, '.')
+
+from src.backend.api.config.database import get_jobs_collection
+from src.backend.api.config.settings import settings
+
+
+def load_texts(count: int):
+    """Job texts from MongoDB, padded with synthetic ones if there are too few."""
+    texts = []
+    try:
+        for job in get_jobs_collection().find({}, {"_id": 0, "job_title": 1, "company": 1, "description": 1}).limit(count):
+            texts.append(f"{job.get('job_title', '')} {job.get('company', '')} {job.get('description', '')}")
+    except Exception as e:
+        print(f"MongoDB unavailable ({e}); using synthetic texts")
+    while len(texts) < count:
+        i = len(texts)
+        texts.append(f"Senior engineer {i} building Python and FastAPI services on AWS with Docker, team of {i % 12 + 2}")
+    return texts
+
+
+def timed(fn):
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--texts", type=int, default=512)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--max-batch", type=int, default=settings.EMBED_MICROBATCH_MAX_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=settings.EMBED_MICROBATCH_MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    # The batcher reads its flush triggers when first created; the embedding cache
+    # is off so every mode really encodes
+    settings.EMBED_CACHE_PATH = ""
+    settings.EMBED_MICROBATCH_ENABLED = True
+    settings.EMBED_MICROBATCH_MAX_SIZE = args.max_batch
+    settings.EMBED_MICROBATCH_MAX_WAIT_MS = args.max_wait_ms
+    from src.backend.api.services.embedding_engine import embed_text, embed_texts, get_batcher, get_model
+
+    if get_model() is None:
+        print("Embedding model unavailable")
+        sys.exit(1)
+    texts = load_texts(args.texts)
+    embed_texts(texts[:8])  # warm up
+
+    results = {}
+    results["per-call"] = timed(lambda: [embed_texts([t]) for t in texts])
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results["concurrent"] = timed(lambda: list(pool.map(lambda t: embed_texts([t]), texts)))
+        results["micro-batch"] = timed(lambda: list(pool.map(embed_text, texts)))
+    results["embed_texts"] = timed(lambda: embed_texts(texts))
+
+    base = results["per-call"]
+    print(f"{'mode':12} {'seconds':>9} {'texts/s':>9} {'speedup':>8}")
+    for mode, seconds in results.items():
+        print(f"{mode:12} {seconds:9.2f} {len(texts) / seconds:9.1f} {base / seconds:7.2f}x")
+    print("batcher:", get_batcher().stats())
+
+
+if __name__ == "__main__":
+    main()
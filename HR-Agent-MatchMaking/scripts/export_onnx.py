@@ -0,0 +1,33 @@
+"""
+Export the embedding model to ONNX (plus a dynamically int8-quantized copy) for
+`EMBED_BACKEND=onnx`. Needs torch and sentence-transformers; the exported directory
+is all an onnxruntime-only image needs.
+
+Usage (from project root):
+    python scripts/export_onnx.py --out models/onnx
+"""
+import argparse
+import os
+import sys
+sys.path.insert(0, '.')
+
+from src.backend.api.config.settings import settings
+from src.backend.api.services.onnx_embedder import export_onnx
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=settings.MODEL_NAME)
+    parser.add_argument("--out", default=settings.EMBED_ONNX_DIR)
+    parser.add_argument("--no-quantize", action="store_true", help="skip the int8 copy")
+    args = parser.parse_args()
+
+    path = export_onnx(args.model, args.out, quantize=not args.no_quantize)
+    for name in sorted(os.listdir(args.out)):
+        full = os.path.join(args.out, name)
+        print(f"{name:28} {os.path.getsize(full) / 1e6:8.1f} MB")
+    print(f"Serve with EMBED_BACKEND=onnx EMBED_ONNX_DIR={args.out} ({os.path.basename(path)})")
+
+
+if __name__ == "__main__":
+    main()
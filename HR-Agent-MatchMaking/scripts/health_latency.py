@@ -0,0 +1,94 @@
+"""
+Check that /api/health stays responsive while the server is busy matching.
+
+Measures health-check latency on an idle server, then again while `--concurrency`
+clients hammer match-resume (cache bypassed with a varying top_k), and fails if
+the loaded p95 exceeds `--max-ratio` times the idle p95 plus `--slack-ms`.
+
+Usage (backend running, from project root):
+    python scripts/health_latency.py --concurrency 16 --duration 20
+"""
+import argparse
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else float("nan")
+
+
+def probe_health(base: str, seconds: float, interval: float):
+    latencies = []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        requests.get(f"{base}/health", timeout=30).raise_for_status()
+        latencies.append((time.perf_counter() - started) * 1000.0)
+        time.sleep(interval)
+    return latencies
+
+
+def upload_resume(base: str) -> str:
+    with open("sample_resume.txt", "rb") as f:
+        res = requests.post(f"{base}/resume/upload-resume", files={"file": ("sample_resume.txt", f, "text/plain")}, timeout=120)
+    res.raise_for_status()
+    return res.json()["resume_id"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base", default="http://localhost:8000/api")
+    parser.add_argument("--resume-id", default=None, help="defaults to uploading sample_resume.txt")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--interval", type=float, default=0.05)
+    parser.add_argument("--max-ratio", type=float, default=3.0)
+    parser.add_argument("--slack-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    resume_id = args.resume_id or upload_resume(args.base)
+    # Warm up the model and the job index so the idle baseline is not a cold start
+    requests.post(f"{args.base}/match/match-resume/{resume_id}?top_k=10", timeout=300).raise_for_status()
+
+    idle = probe_health(args.base, min(5.0, args.duration), args.interval)
+
+    stop = threading.Event()
+    matches = []
+
+    def load(worker: int):
+        top_k = 20 + worker
+        while not stop.is_set():
+            # A different top_k per request misses the match cache, so every call scores
+            top_k = 20 + (top_k - 19) % 180
+            started = time.perf_counter()
+            requests.post(f"{args.base}/match/match-resume/{resume_id}?top_k={top_k}&include_report=false", timeout=300)
+            matches.append((time.perf_counter() - started) * 1000.0)
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for worker in range(args.concurrency):
+            pool.submit(load, worker)
+        time.sleep(1.0)
+        loaded = probe_health(args.base, args.duration, args.interval)
+        stop.set()
+
+    status = requests.get(f"{args.base}/api/status", timeout=30).json()
+    print(f"{'':10} {'n':>6} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for name, values in (("idle", idle), ("loaded", loaded), ("matches", matches)):
+        print(f"{name:10} {len(values):6d} {statistics.median(values):9.1f} {percentile(values, 0.95):9.1f} {max(values):9.1f}")
+    print("stages:", status.get("stages"))
+
+    budget = args.max_ratio * percentile(idle, 0.95) + args.slack_ms
+    if percentile(loaded, 0.95) > budget:
+        print(f"FAIL: loaded health p95 above {budget:.1f} ms")
+        sys.exit(1)
+    print(f"OK: loaded health p95 within {budget:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,26 @@
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .config.settings import settings
 from importlib import import_module
 from contextlib import asynccontextmanager
+from .services.embedding_migration import stop_migration
+from .services.embedding_workers import shutdown_worker_pool
 from .services.job_api_aggregator import AggregatorScheduler
+from .services.startup import get_startup_state, run_startup
 from .utils.logger import get_logger
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger = get_logger(__name__)
-    try:
-        AggregatorScheduler.start()
-    except Exception:
-        logger.exception("Failed to start AggregatorScheduler; continuing without scheduler")
+    # Serve /api/health at once; model warmup and index loads run in the background
+    # and /api/ready reports when they are done
+    startup = asyncio.create_task(run_startup(get_startup_state()))
     yield
+    startup.cancel()
+    stop_migration()
+    shutdown_worker_pool()
     try:
         AggregatorScheduler.stop()
     except Exception:
@@ -20,6 +20,10 @@ def get_jobs_collection():
     coll.create_index([("source", ASCENDING)])
     coll.create_index([("job_title", ASCENDING)])
     coll.create_index([("posted_date", ASCENDING)])
+    coll.create_index([("language", ASCENDING)])
+    coll.create_index([("category", ASCENDING)])
+    coll.create_index([("embedding_model", ASCENDING)])
+    coll.create_index([("embedding_next_model", ASCENDING)], sparse=True)
     return coll
 
 
@@ -28,4 +32,11 @@ def get_resumes_collection():
     coll = db["resumes"]
     coll.create_index([("resume_id", ASCENDING)], unique=True)
     coll.create_index([("created_at", ASCENDING)])
+    coll.create_index([("embedding_model", ASCENDING)])
+    coll.create_index([("embedding_next_model", ASCENDING)], sparse=True)
     return coll
+
+
+def get_embedding_versions_collection():
+    """Which embedding model version the stored vectors are served from (see embedding_migration)."""
+    return get_mongo_client()["resume_matcher"]["embedding_versions"]
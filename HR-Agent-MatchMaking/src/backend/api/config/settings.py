@@ -17,7 +17,81 @@ class Settings(BaseSettings):
 
     # Model
     MODEL_NAME: str = Field(default="multi-qa-MiniLM-L6-cos-v1")
+    EMBED_BACKEND: str = Field(default="torch")  # torch (sentence-transformers) | onnx (onnxruntime)
+    EMBED_ONNX_DIR: str = "models/onnx"  # exported graph + tokenizer (scripts/export_onnx.py)
+    EMBED_ONNX_QUANTIZE: bool = True  # serve the dynamically int8-quantized graph
+    EMBED_ONNX_THREADS: int = 0  # onnxruntime intra-op threads; 0 = onnxruntime default
     EMBEDDING_DIM: int = Field(default=384)
+    EMBEDDING_STORAGE_FORMAT: str = Field(default="float32")  # float32 | float16 | int8 (stored in MongoDB)
+    JOB_INDEX_DTYPE: str = Field(default="float32")  # float32 | float16 | int8 (resident job matrix)
+    EMBED_BATCH_SIZE: int = 64  # texts per forward pass in embed_texts
+    EMBED_MICROBATCH_ENABLED: bool = True  # coalesce concurrent embed_text calls
+    EMBED_MICROBATCH_MAX_SIZE: int = 32  # flush when this many texts are queued...
+    EMBED_MICROBATCH_MAX_WAIT_MS: float = 5.0  # ...or this long after the first one
+    EMBED_CACHE_PATH: str = "~/.cache/hr-agent/embeddings.sqlite3"  # empty = no embedding cache
+    EMBED_CACHE_MAX_ENTRIES: int = 100000  # ~1.5 KB each at 384 dims; least recently used evicted
+    EMBED_WARMUP_BATCHES: int = 3  # dummy batches run at startup before /api/ready reports ready
+    EMBED_WORKERS: int = 0  # embedding worker processes; 0 = run the model in the API process
+    EMBED_WORKER_THREADS: int = 0  # torch / onnxruntime intra-op threads per worker; 0 = cores / workers
+    EMBED_WORKER_MAX_BATCH: int = 32  # texts per worker task; bulk work yields to interactive between tasks
+    EMBED_CHUNKING: bool = False  # embed long texts as pooled token windows instead of truncating
+    EMBED_CHUNK_TOKENS: int = 0  # window size in tokens; 0 = model max_seq_length - 2
+    EMBED_CHUNK_OVERLAP: int = 32  # tokens shared by consecutive windows
+    EMBED_CHUNK_MAX: int = 16  # windows per text; the rest of very long texts is dropped
+
+    # Embedding model migration: re-embed stored jobs / resumes with another model next to
+    # the served vectors, switch to it once every document has one (see embedding_migration)
+    EMBED_MIGRATION_MODEL: str = ""  # target model name; empty = MODEL_NAME
+    EMBED_MIGRATION_BATCH_SIZE: int = 32  # documents re-embedded per step
+    EMBED_MIGRATION_MAX_RATE: float = 20.0  # documents per second; 0 = unthrottled
+    EMBED_MIGRATION_POLL_SECONDS: float = 30.0  # re-check interval once nothing is left to do
+    EMBED_LEGACY_MODEL: str = "multi-qa-MiniLM-L6-cos-v1"  # model id of vectors stored before they were tagged
+
+    # Shared on-disk job index snapshot (empty = disabled); every worker mmaps the same file
+    JOB_SNAPSHOT_DIR: str = ""
+    JOB_SNAPSHOT_POLL_SECONDS: float = 5.0
+
+    # Approximate nearest-neighbour search over the job index
+    ANN_BACKEND: str = Field(default="exact")  # exact | ivf | hnsw
+    ANN_MIN_JOBS: int = 20000  # below this many jobs, exact search is used
+    ANN_IVF_NLIST: int = 0  # 0 = derive from corpus size
+    ANN_IVF_NPROBE: int = 16
+    ANN_HNSW_M: int = 16
+    ANN_HNSW_EF_CONSTRUCTION: int = 200
+    ANN_HNSW_EF_SEARCH: int = 64
+
+    # Diversity re-ranking
+    MMR_LAMBDA: float = 0.7  # 1.0 = pure relevance, 0.0 = pure novelty
+    MMR_CANDIDATES: int = 200  # MMR re-ranks only this many top candidates
+
+    # Hybrid (BM25 + embedding) retrieval
+    HYBRID_ALPHA: float = 0.7  # weight of the semantic score; 1 - alpha goes to BM25
+    HYBRID_CANDIDATES: int = 1000  # lexical candidates re-scored semantically
+    HYBRID_QUERY_TERMS: int = 64  # rarest resume terms whose postings are read
+    BM25_K1: float = 1.2
+    BM25_B: float = 0.75
+
+    # Match result cache (Redis, falling back to an in-process LRU)
+    MATCH_CACHE_ENABLED: bool = True
+    MATCH_CACHE_TTL: int = 600
+    MATCH_CACHE_MAX_ENTRIES: int = 1000
+    MATCH_CURSOR_TTL: int = 300  # lifetime of a paginated match's cached ranking
+
+    # Blocking work offloaded from the event loop (see services/concurrency.py)
+    CPU_EXECUTOR_WORKERS: int = 0  # 0 = one per CPU core; scoring, parsing
+    IO_EXECUTOR_WORKERS: int = 32  # MongoDB / Redis calls, embedding (waits on the micro-batcher)
+    STAGE_LIMIT_EMBED: int = 32  # concurrent embedding requests (coalesced by the micro-batcher)
+    STAGE_LIMIT_MATCH: int = 8  # concurrent scoring passes
+    STAGE_LIMIT_PARSE: int = 2  # concurrent PDF / DOCX parses
+    STAGE_LIMIT_DB: int = 32  # concurrent database calls
+
+    # Startup
+    STARTUP_RETRY_SECONDS: float = 10.0  # retry interval for index loads that failed at startup
+
+    # Batch matching
+    MATCH_BATCH_MAX_RESUMES: int = 1000
+    MATCH_BATCH_BLOCK_MB: int = 256  # upper bound on one resumes x jobs score block
+    MATCH_BATCH_WORKERS: int = 0  # 0 = one per CPU core
 
     # API keys
     REED_API_KEY: str | None = None
@@ -40,6 +114,8 @@ class Settings(BaseSettings):
     APILAYER_RATE_LIMIT: int = 100
     FINDWORK_RATE_LIMIT: int = 60
     THEMUSE_RATE_LIMIT: int = 100
+    RATE_LIMIT_BURST: int = 5  # requests a source may send back to back before pacing kicks in
+    RATE_LIMIT_MAX_WAIT_SECONDS: float = 120.0  # skip a source for the run if Retry-After asks for longer
 
     # App settings
     MAX_FILE_SIZE: int = 10 * 1024 * 1024
@@ -50,6 +126,11 @@ class Settings(BaseSettings):
     DEFAULT_SEARCH_KEYWORDS: str = "java developer,javascript developer,c# developer,node.js developer,.net developer,react developer,angular developer,vue developer,frontend developer,backend developer,full stack developer,typescript developer,php developer,ruby developer,golang developer,rust developer,devops engineer,cloud architect,aws engineer,azure engineer,gcp engineer,kubernetes engineer"
     DEFAULT_SEARCH_LOCATIONS: str = "United States,United Kingdom,Canada,Germany,Remote"
     API_TIMEOUT: int = 10
+    # Shared HTTP connection pool of a job fetch run
+    HTTP_POOL_SIZE: int = 100  # open connections across all job APIs
+    HTTP_LIMIT_PER_HOST: int = 4  # concurrent connections to one job API
+    HTTP_KEEPALIVE_SECONDS: float = 30.0  # idle time before a pooled connection is closed
+    HTTP_DNS_CACHE_SECONDS: int = 300  # how long resolved API hostnames are reused
     MAX_JOBS_PER_API: int = 1000
 
     # Pydantic v2 settings configuration
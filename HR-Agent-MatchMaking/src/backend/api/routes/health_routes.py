@@ -1,5 +1,12 @@
 from fastapi import APIRouter
-from ..services.embedding_engine import embed_text
+from fastapi.responses import JSONResponse
+from ..config.settings import settings
+from ..services.concurrency import run_stage, stage_stats
+from ..services.embedding_cache import get_embedding_cache
+from ..services.embedding_engine import embed_text, get_batcher
+from ..services.embedding_migration import migration_status
+from ..services.embedding_workers import get_worker_pool
+from ..services.startup import get_startup_state
 from ..utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -12,9 +19,30 @@ async def health():
     return {"status": "healthy"}
 
 
+@router.get("/ready")
+async def ready():
+    """Readiness, unlike /health: 503 until the model is warm and the indexes are loaded."""
+    state = get_startup_state().readiness()
+    return JSONResponse(state, status_code=200 if state["ready"] else 503)
+
+
 @router.get("/api/status")
 async def api_status():
-    return {"service": "backend", "status": "ok"}
+    return {
+        "service": "backend",
+        "status": "ok",
+        "stages": stage_stats(),
+        "embed_batcher": get_batcher().stats(),
+        "embed_cache": get_embedding_cache().stats(),
+        "embed_workers": get_worker_pool().stats() if settings.EMBED_WORKERS > 0 else None,
+        "startup": get_startup_state().readiness(),
+    }
+
+
+@router.get("/embedding-migration")
+async def embedding_migration():
+    """Served embedding model version and, during a migration, its coverage and throughput."""
+    return await run_stage("db", migration_status)
 
 
 @router.get("/embeddings-test")
@@ -23,7 +51,7 @@ async def embeddings_test():
     Useful to confirm runtime model download and cache mounting.
     """
     try:
-        emb = embed_text("test embedding")
+        emb = await run_stage("embed", embed_text, "test embedding")
         ok = bool(emb)
         if ok:
             return {"ok": True, "embedding_len": len(emb), "sample": emb[:5]}
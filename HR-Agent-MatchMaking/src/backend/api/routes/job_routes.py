@@ -4,13 +4,14 @@ from models.schemas.api_response_schema import TriggerRefreshRequest, TriggerRef
 from models.schemas.job_schema import JobStats, JobListResponse, JobListItem
 from src.backend.api.services.job_api_aggregator import JobAggregatorService, AggregatorScheduler
 from src.backend.api.config.database import get_jobs_collection
+from src.backend.api.services.concurrency import run_stage
 
 router = APIRouter(prefix="/jobs", tags=["jobs"])
 
 
 @router.get("/stats", response_model=JobStats)
 async def get_stats():
-    stats = AggregatorScheduler.get_stats()
+    stats = await run_stage("db", AggregatorScheduler.get_stats)
     return stats
 
 
@@ -18,7 +19,7 @@ async def get_stats():
 async def trigger_refresh(req: TriggerRefreshRequest, background_tasks: BackgroundTasks):
     async def run_async():
         service = JobAggregatorService()
-        await service.fetch_all_jobs(req.keywords, req.locations)
+        await service.fetch_all_jobs(req.keywords, req.locations, req.sources)
 
     def kickoff():
         # This function runs in a thread (BackgroundTasks). There's no running
@@ -48,6 +49,10 @@ async def list_jobs(
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=20, ge=1, le=100),
 ):
+    return await run_stage("db", _list_jobs, q, source, page, page_size)
+
+
+def _list_jobs(q: str | None, source: str | None, page: int, page_size: int) -> JobListResponse:
     coll = get_jobs_collection()
     filters: dict = {}
 
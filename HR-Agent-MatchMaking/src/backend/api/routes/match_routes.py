@@ -1,33 +1,198 @@
+import base64
+import json
+import time
 from fastapi import APIRouter, HTTPException, Query
 from datetime import datetime
-from typing import Optional
-from models.schemas.match_schema import MatchResponse
+from typing import Dict, List, Optional, Tuple
+from models.schemas.match_schema import MatchResponse, BatchMatchRequest, BatchMatchResponse, CandidateResponse
 from ..config.database import get_resumes_collection
-from ..services.matching_engine import match_resume_to_jobs
+from ..config.settings import settings
+from ..services.concurrency import run_stage
+from ..services.embedding_codec import EMBEDDING_FIELDS, decode_embedding
+from ..services.embedding_engine import embed_text
+from ..services.job_filters import build_filters
+from ..services.job_index import get_job_index
+from ..services.match_cache import get_match_cache
+from ..services.match_report import attach_reports, resume_skill_bits
+from ..services.matching_engine import match_job_to_resumes, match_resume_to_jobs, match_resumes_to_jobs, ranked_jobs
 
 router = APIRouter(prefix="/match", tags=["match"])
 
 
 @router.post("/match-resume/{resume_id}", response_model=MatchResponse)
-async def match_resume(resume_id: str, top_k: int = Query(default=50, ge=1, le=200), source_filter: str = Query(default="all"), diversity: bool = Query(default=True)):
+async def match_resume(
+    resume_id: str,
+    top_k: int = Query(default=50, ge=1, le=200),
+    source_filter: str = Query(default="all"),
+    diversity: bool = Query(default=True),
+    diversity_mode: str = Query(default="language", pattern="^(language|mmr)$", description="language interleaving or MMR over job vectors"),
+    mmr_lambda: Optional[float] = Query(default=None, ge=0.0, le=1.0, description="MMR relevance weight (default MMR_LAMBDA)"),
+    retrieval: str = Query(default="semantic", pattern="^(semantic|hybrid)$", description="embedding similarity only, or BM25 + embedding"),
+    country: Optional[List[str]] = Query(default=None, description="Only jobs in these countries (repeatable, e.g. UK, US)"),
+    employment_type: Optional[List[str]] = Query(default=None, description="Only these employment types (repeatable)"),
+    salary_min: Optional[float] = Query(default=None, ge=0, description="Only jobs paying at least this much"),
+    salary_max: Optional[float] = Query(default=None, ge=0, description="Only jobs starting at or below this salary"),
+    posted_within_days: Optional[int] = Query(default=None, ge=1, description="Only jobs posted in the last N days"),
+    page_size: Optional[int] = Query(default=None, ge=1, le=200, description="Return the top_k matches in pages of this size"),
+    cursor: Optional[str] = Query(default=None, description="next_cursor of the previous page; other parameters are then ignored"),
+    include_report: bool = Query(default=True, description="Attach a skill-overlap MatchReport to each returned job"),
+):
+    started = time.perf_counter()
+    if cursor:
+        page, next_cursor = await run_stage("db", _next_page, resume_id, cursor, page_size)
+    else:
+        page, next_cursor = await _ranked_page(resume_id, page_size, {
+            "top_k": top_k,
+            "source_filter": source_filter,
+            "diversity": diversity,
+            "diversity_mode": diversity_mode,
+            "mmr_lambda": mmr_lambda,
+            "retrieval": retrieval,
+            "filters": build_filters(country, employment_type, salary_min, salary_max, posted_within_days),
+        })
+    timings = {"match": round((time.perf_counter() - started) * 1000.0, 3)}
+    if include_report:
+        # Reports run on the returned page only and are timed on their own
+        started = time.perf_counter()
+        page = await run_stage("db", _with_reports, resume_id, page)
+        timings["report"] = round((time.perf_counter() - started) * 1000.0, 3)
+    return _match_response(resume_id, page, next_cursor, timings)
+
+
+async def _ranked_page(resume_id: str, page_size: Optional[int], params: Dict) -> Tuple[list, Optional[str]]:
+    """Run (or fetch the cached) match and return its first page.
+
+    Every blocking step runs off the event loop, each through its own stage limit.
+    """
+    cache = get_match_cache()
+    cache_key = await run_stage("db", cache.make_key, resume_id, params)
+    cached = await run_stage("db", cache.get, cache_key)
+    if cached is not None:
+        return await run_stage("db", _first_page, resume_id, cached, page_size)
+
     coll = get_resumes_collection()
-    doc = coll.find_one({"resume_id": resume_id})
+    doc = await run_stage("db", coll.find_one, {"resume_id": resume_id}, {"_id": 0, "content": 1, **EMBEDDING_FIELDS})
     if not doc:
         raise HTTPException(status_code=404, detail="Resume not found")
 
     text = doc.get("content") or ""
-    scored = match_resume_to_jobs(text, top_k=top_k, source_filter=source_filter, diversity=diversity)
+    # Uploads store the resume's vector; only resumes without one (of the served model) are embedded
+    embedding = decode_embedding(doc, get_job_index().model_id)
+    if embedding is None or embedding.shape != (settings.EMBEDDING_DIM,):
+        embedding = await run_stage("embed", embed_text, text)
+    scored = await run_stage("match", match_resume_to_jobs, text, embedding=embedding, **params)
+    await run_stage("db", cache.set, cache_key, scored)
+    return await run_stage("db", _first_page, resume_id, scored, page_size)
+
+
+def _with_reports(resume_id: str, jobs: list) -> list:
+    return attach_reports(resume_skill_bits(resume_id), jobs)
+
+
+@router.get("/cache-stats")
+async def cache_stats():
+    return await run_stage("db", get_match_cache().stats)
+
+
+@router.post("/match-resumes", response_model=BatchMatchResponse)
+async def match_resumes(req: BatchMatchRequest):
+    """Match a whole candidate pool against the job corpus in one scoring pass."""
+    resume_ids = list(dict.fromkeys(req.resume_ids))
+    if len(resume_ids) > settings.MATCH_BATCH_MAX_RESUMES:
+        raise HTTPException(status_code=400, detail=f"At most {settings.MATCH_BATCH_MAX_RESUMES} resumes per batch")
+
+    by_resume = await run_stage(
+        "match",
+        match_resumes_to_jobs,
+        resume_ids,
+        top_k=req.top_k,
+        source_filter=req.source_filter,
+        diversity=req.diversity,
+        diversity_mode=req.diversity_mode,
+        mmr_lambda=req.mmr_lambda,
+        retrieval=req.retrieval,
+        filters=build_filters(req.country, req.employment_type, req.salary_min, req.salary_max, req.posted_within_days),
+    )
+    if req.include_report:
+        matched = by_resume
+        by_resume = await run_stage("db", lambda: {rid: _with_reports(rid, jobs) for rid, jobs in matched.items()})
+    return BatchMatchResponse(
+        total_resumes=len(by_resume),
+        results=[_match_response(rid, by_resume[rid]) for rid in resume_ids if rid in by_resume],
+        missing_resume_ids=[rid for rid in resume_ids if rid not in by_resume],
+        generated_at=datetime.utcnow().isoformat(),
+    )
+
+
+@router.get("/job/{job_id}/candidates", response_model=CandidateResponse)
+async def job_candidates(job_id: str, top_k: int = Query(default=50, ge=1, le=500)):
+    """Rank stored resumes against a job (the inverse of match-resume)."""
+    found = await run_stage("match", match_job_to_resumes, job_id, top_k=top_k)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    job, candidates = found
+    return CandidateResponse(
+        job_id=job["job_id"],
+        job_title=job.get("job_title"),
+        total_candidates=len(candidates),
+        top_candidates=candidates,
+        generated_at=datetime.utcnow().isoformat(),
+    )
+
+
+def _first_page(resume_id: str, scored: list, page_size: Optional[int]) -> Tuple[list, Optional[str]]:
+    """The whole ranking, or its first page plus a cursor over the stored ordering."""
+    if not page_size or len(scored) <= page_size:
+        return scored, None
+    key = get_match_cache().put_ranking([j["job_id"] for j in scored], [j["match_score"] for j in scored])
+    return scored[:page_size], _encode_cursor(resume_id, key, page_size, page_size, len(scored))
+
+
+def _next_page(resume_id: str, cursor: str, page_size: Optional[int]) -> Tuple[list, Optional[str]]:
+    """A later page, read from the ranking stored by the first one."""
+    try:
+        owner, key, offset, size, total = _decode_cursor(cursor)
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if owner != resume_id:
+        raise HTTPException(status_code=400, detail="Cursor belongs to another resume")
+    size = page_size or size
+    end = min(offset + size, total)
+    entries = get_match_cache().get_ranking_page(key, offset, end)
+    if entries is None:
+        raise HTTPException(status_code=410, detail="Cursor expired; request the first page again")
+    page = ranked_jobs(*entries)
+    next_cursor = _encode_cursor(resume_id, key, end, size, total) if end < total else None
+    return page, next_cursor
+
+
+def _encode_cursor(resume_id: str, key: str, offset: int, size: int, total: int) -> str:
+    raw = json.dumps({"r": resume_id, "k": key, "o": offset, "n": size, "t": total}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str):
+    data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    offset, size, total = int(data["o"]), int(data["n"]), int(data["t"])
+    if offset < 0 or size < 1 or offset >= total:
+        raise ValueError("cursor out of range")
+    return str(data["r"]), str(data["k"]), offset, size, total
+
 
+def _match_response(
+    resume_id: str, scored: list, next_cursor: Optional[str] = None, timings: Optional[Dict[str, float]] = None
+) -> MatchResponse:
     matches_by_source = {}
     for j in scored:
         src = j.get("source", "unknown")
         matches_by_source[src] = matches_by_source.get(src, 0) + 1
 
-    resp = MatchResponse(
+    return MatchResponse(
         resume_id=resume_id,
         total_matches=len(scored),
         matches_by_source=matches_by_source,
         top_matches=scored,
         generated_at=datetime.utcnow().isoformat(),
+        next_cursor=next_cursor,
+        timings_ms=timings,
     )
-    return resp
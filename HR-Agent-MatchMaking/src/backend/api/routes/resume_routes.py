@@ -3,9 +3,11 @@ from datetime import datetime
 import re
 from models.schemas.resume_schema import Resume, ResumeSkills
 from ..config.database import get_resumes_collection
+from ..services.concurrency import run_stage
 from ..services.text_processor import extract_text
 from ..services.skill_extractor import extract_skills
-from ..services.embedding_engine import embed_text
+from ..services.embedding_engine import embed_text, embedding_fields, embedding_model_id
+from ..services.resume_index import get_resume_index
 
 router = APIRouter(prefix="/resume", tags=["resume"])
 
@@ -72,7 +74,7 @@ async def upload_resume(file: UploadFile = File(...)):
     # Validate that this is actually a resume
     _validate_resume_content(text)
     
-    skills = extract_skills(text)
+    skills = await run_stage("parse", extract_skills, text)
     coll = get_resumes_collection()
     doc = {
         "filename": filename,
@@ -81,16 +83,22 @@ async def upload_resume(file: UploadFile = File(...)):
         "skills_extracted": skills,
         "created_at": datetime.utcnow().isoformat(),
     }
-    res = coll.insert_one(doc)
+    res = await run_stage("db", coll.insert_one, doc)
     resume_id = str(res.inserted_id)
-    coll.update_one({"_id": res.inserted_id}, {"$set": {"resume_id": resume_id}})
+    await run_stage("db", coll.update_one, {"_id": res.inserted_id}, {"$set": {"resume_id": resume_id}})
     doc["resume_id"] = resume_id
     # Generate embedding for the uploaded resume (best-effort). Store embedding if available.
     try:
-        emb = embed_text(text)
+        model_id = embedding_model_id()
+        emb = await run_stage("embed", embed_text, text, model_id)
         if emb:
-            coll.update_one({"_id": res.inserted_id}, {"$set": {"embedding": emb}})
-            doc["embedding"] = emb
+            stored = embedding_fields(emb, model_id)
+            await run_stage("db", coll.update_one, {"_id": res.inserted_id}, {"$set": stored})
+            doc.update(stored)
+            # Make the new resume rankable by job -> candidates right away
+            resume_index = get_resume_index()
+            if resume_index.loaded:
+                resume_index.upsert([doc])
     except Exception:
         # Do not fail the upload if embedding generation fails; it will be retried later.
         pass
@@ -0,0 +1,243 @@
+"""Pluggable nearest-neighbour backends for the job index.
+
+All backends work on L2-normalized vectors, so inner product equals cosine.
+Rows are the job index's row numbers; the index owns the vector matrix and hands the
+current view to `search`, which lets the exact and IVF backends avoid a second copy.
+The matrix may be float16 or int8 storage; `scales` then carries the int8 per-row
+scale factors (None for float rows).
+"""
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .embedding_codec import dequantize_rows, quantized_dot
+from ..config.settings import settings
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def top_k_rows(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k largest scores, best first."""
+    if k <= 0 or scores.size == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < scores.size:
+        part = np.argpartition(-scores, k - 1)[:k]
+    else:
+        part = np.arange(scores.size)
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+class ExactBackend:
+    """Brute-force inner product over every row."""
+
+    name = "exact"
+
+    def build(self, vectors: np.ndarray, scales: Optional[np.ndarray] = None) -> None:
+        pass
+
+    def add(self, rows: np.ndarray, vectors: np.ndarray, scales: Optional[np.ndarray] = None) -> None:
+        pass
+
+    def needs_rebuild(self, n: int) -> bool:
+        return False
+
+    def search(self, vectors: np.ndarray, query: np.ndarray, k: int, scales: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        scores = quantized_dot(vectors, query, scales)
+        top = top_k_rows(scores, k)
+        return top, scores[top]
+
+
+class IVFBackend:
+    """Inverted-file index: spherical k-means coarse quantizer plus per-centroid row lists.
+
+    A query scores the `nprobe` closest centroids and then only the rows filed under
+    them. New rows are assigned to their nearest centroid; the quantizer is retrained
+    once the corpus has grown `retrain_factor` times past the size it was trained on.
+    """
+
+    name = "ivf"
+
+    def __init__(self, nlist: int = 0, nprobe: int = 16, train_iters: int = 10, retrain_factor: float = 4.0):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_iters = train_iters
+        self.retrain_factor = retrain_factor
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[List[int]] = []
+        self._cache: Dict[int, np.ndarray] = {}
+        self._assign: Dict[int, int] = {}
+        self._trained_on = 0
+
+    def build(self, vectors: np.ndarray, scales: Optional[np.ndarray] = None) -> None:
+        n = vectors.shape[0]
+        if n == 0:
+            self._centroids = None
+            self._lists, self._cache, self._assign = [], {}, {}
+            self._trained_on = 0
+            return
+        started = time.perf_counter()
+        nlist = self.nlist or int(max(1, min(4 * np.sqrt(n), n // 39 or 1)))
+        self._centroids = self._train(vectors, scales, nlist)
+        self._lists = [[] for _ in range(self._centroids.shape[0])]
+        self._cache, self._assign = {}, {}
+        self._trained_on = n
+        self._file(np.arange(n), vectors)
+        logger.info(f"IVF index built: {n} rows, {self._centroids.shape[0]} lists in {time.perf_counter() - started:.2f}s")
+
+    def add(self, rows: np.ndarray, vectors: np.ndarray, scales: Optional[np.ndarray] = None) -> None:
+        if self._centroids is None:
+            return
+        self._file(rows, vectors[rows])
+
+    def needs_rebuild(self, n: int) -> bool:
+        return self._centroids is None or n > self.retrain_factor * max(self._trained_on, 1)
+
+    def search(self, vectors: np.ndarray, query: np.ndarray, k: int, scales: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        if self._centroids is None:
+            return ExactBackend().search(vectors, query, k, scales)
+        nprobe = min(self.nprobe, self._centroids.shape[0])
+        probe = top_k_rows(self._centroids @ query, nprobe)
+        parts = [self._list_array(int(c)) for c in probe]
+        cand = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+        cand = cand[cand < vectors.shape[0]]
+        scores = quantized_dot(vectors[cand], query, scales[cand] if scales is not None else None)
+        top = top_k_rows(scores, k)
+        return cand[top], scores[top]
+
+    def _train(self, vectors: np.ndarray, scales: Optional[np.ndarray], nlist: int) -> np.ndarray:
+        rng = np.random.default_rng(0)
+        n = vectors.shape[0]
+        sample = dequantize_rows(vectors, scales, np.sort(rng.choice(n, size=min(n, 64 * nlist), replace=False)))
+        centroids = sample[rng.choice(sample.shape[0], size=nlist, replace=False)].copy()
+        for _ in range(self.train_iters):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            empty = norms[:, 0] == 0
+            # Re-seed empty clusters from random sample points
+            if empty.any():
+                sums[empty] = sample[rng.choice(sample.shape[0], size=int(empty.sum()))]
+                norms[empty] = 1.0
+            centroids = (sums / norms).astype(np.float32)
+        return centroids
+
+    def _file(self, rows: np.ndarray, vectors: np.ndarray, chunk: int = 8192) -> None:
+        for start in range(0, len(rows), chunk):
+            block_rows = rows[start:start + chunk]
+            # A positive per-row int8 scale does not change the argmax, so it is skipped
+            assign = np.argmax(vectors[start:start + chunk].astype(np.float32) @ self._centroids.T, axis=1)
+            for row, c in zip(block_rows.tolist(), assign.tolist()):
+                old = self._assign.get(row)
+                if old == c:
+                    continue
+                if old is not None:
+                    self._lists[old].remove(row)
+                    self._cache.pop(old, None)
+                self._lists[c].append(row)
+                self._cache.pop(c, None)
+                self._assign[row] = c
+
+    def _list_array(self, c: int) -> np.ndarray:
+        arr = self._cache.get(c)
+        if arr is None:
+            arr = np.asarray(self._lists[c], dtype=np.int64)
+            self._cache[c] = arr
+        return arr
+
+
+class HNSWBackend:
+    """Graph index backed by the optional `hnswlib` package."""
+
+    name = "hnsw"
+
+    def __init__(self, dim: int, m: int = 16, ef_construction: int = 200, ef_search: int = 64):
+        import hnswlib  # optional dependency
+
+        self._hnswlib = hnswlib
+        self.dim = dim
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self._index = None
+
+    def build(self, vectors: np.ndarray, scales: Optional[np.ndarray] = None, chunk: int = 16384) -> None:
+        n = vectors.shape[0]
+        self._index = self._hnswlib.Index(space="ip", dim=self.dim)
+        self._index.init_index(max_elements=max(1024, n * 2), ef_construction=self.ef_construction, M=self.m)
+        self._index.set_ef(self.ef_search)
+        for start in range(0, n, chunk):
+            rows = np.arange(start, min(start + chunk, n))
+            self._index.add_items(dequantize_rows(vectors, scales, rows), rows)
+
+    def add(self, rows: np.ndarray, vectors: np.ndarray, scales: Optional[np.ndarray] = None) -> None:
+        if self._index is None or not len(rows):
+            return
+        needed = int(rows.max()) + 1
+        if needed > self._index.get_max_elements():
+            self._index.resize_index(max(needed, self._index.get_max_elements() * 2))
+        # hnswlib replaces the stored vector when a label is added again
+        self._index.add_items(dequantize_rows(vectors, scales, rows), rows)
+
+    def needs_rebuild(self, n: int) -> bool:
+        return self._index is None
+
+    def search(self, vectors: np.ndarray, query: np.ndarray, k: int, scales: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        count = self._index.get_current_count() if self._index is not None else 0
+        if count == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        self._index.set_ef(max(self.ef_search, k))
+        labels, distances = self._index.knn_query(query, k=min(k, count))
+        # hnswlib's "ip" space reports 1 - <a, b>
+        return labels[0].astype(np.int64), (1.0 - distances[0]).astype(np.float32)
+
+
+def make_backend(dim: int, name: Optional[str] = None):
+    """Build the backend selected by `ANN_BACKEND`, falling back to exact search."""
+    name = (name or settings.ANN_BACKEND or "exact").lower()
+    if name == "ivf":
+        return IVFBackend(nlist=settings.ANN_IVF_NLIST, nprobe=settings.ANN_IVF_NPROBE)
+    if name == "hnsw":
+        try:
+            return HNSWBackend(
+                dim,
+                m=settings.ANN_HNSW_M,
+                ef_construction=settings.ANN_HNSW_EF_CONSTRUCTION,
+                ef_search=settings.ANN_HNSW_EF_SEARCH,
+            )
+        except ImportError:
+            logger.warning("ANN_BACKEND=hnsw but hnswlib is not installed; falling back to IVF")
+            return IVFBackend(nlist=settings.ANN_IVF_NLIST, nprobe=settings.ANN_IVF_NPROBE)
+    if name != "exact":
+        logger.warning(f"Unknown ANN_BACKEND '{name}'; using exact search")
+    return ExactBackend()
+
+
+def recall_at_k(vectors: np.ndarray, queries: np.ndarray, backend, k: int = 10) -> Dict[str, float]:
+    """Compare `backend` with exact search on `queries`.
+
+    Returns mean recall@k plus mean per-query latency (ms) of both searches.
+    """
+    exact = ExactBackend()
+    hits = 0
+    total = 0
+    exact_ms = 0.0
+    approx_ms = 0.0
+    for q in queries:
+        t0 = time.perf_counter()
+        truth, _ = exact.search(vectors, q, k)
+        t1 = time.perf_counter()
+        found, _ = backend.search(vectors, q, k)
+        t2 = time.perf_counter()
+        hits += len(set(truth.tolist()) & set(found.tolist()))
+        total += len(truth)
+        exact_ms += (t1 - t0) * 1000.0
+        approx_ms += (t2 - t1) * 1000.0
+    nq = max(len(queries), 1)
+    return {
+        "recall_at_k": hits / float(total) if total else 0.0,
+        "exact_ms": exact_ms / nq,
+        "approx_ms": approx_ms / nq,
+    }
@@ -0,0 +1,91 @@
+"""Bounded offloading of blocking work out of the event loop.
+
+Route handlers are `async def`, but model inference, NumPy scoring, PyPDF2 parsing
+and pymongo calls all block. `run_stage` runs such a call on an executor instead:
+CPU stages ("match", "parse") on a pool sized to the cores (NumPy releases the
+GIL), "db" and "embed" on a larger I/O pool ("embed" calls mostly wait on the
+embedding micro-batcher, which runs the forward passes). Each stage also has
+its own concurrency limit (`STAGE_LIMIT_<STAGE>`), so a burst of matches queues at
+its own gate while health checks and uploads keep being served.
+"""
+import asyncio
+import contextvars
+import functools
+import os
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Dict
+
+from ..config.settings import settings
+
+# Stage -> executor it runs on
+STAGES = {"embed": "io", "match": "cpu", "parse": "cpu", "db": "io"}
+
+
+class _Stage:
+    """One stage's limit plus its counters; semaphores are made per event loop."""
+
+    def __init__(self, name: str, pool: ThreadPoolExecutor, limit: int):
+        self.name = name
+        self.pool = pool
+        self.limit = max(1, limit)
+        self.running = 0
+        self.waiting = 0
+        self.completed = 0
+        self.wait_seconds = 0.0
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+    def semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        sem = self._semaphores.get(loop)
+        if sem is None:
+            sem = self._semaphores[loop] = asyncio.Semaphore(self.limit)
+        return sem
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "running": self.running,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "avg_wait_ms": round(self.wait_seconds / self.completed * 1000.0, 3) if self.completed else 0.0,
+        }
+
+
+@lru_cache
+def _stages() -> Dict[str, _Stage]:
+    pools = {
+        "cpu": ThreadPoolExecutor(max_workers=settings.CPU_EXECUTOR_WORKERS or os.cpu_count() or 1, thread_name_prefix="cpu"),
+        "io": ThreadPoolExecutor(max_workers=settings.IO_EXECUTOR_WORKERS, thread_name_prefix="io"),
+    }
+    return {
+        name: _Stage(name, pools[kind], getattr(settings, f"STAGE_LIMIT_{name.upper()}"))
+        for name, kind in STAGES.items()
+    }
+
+
+async def run_stage(stage: str, fn: Callable, *args, **kwargs) -> Any:
+    """Run blocking `fn(*args, **kwargs)` on the stage's executor, within its concurrency limit."""
+    st = _stages()[stage]
+    sem = st.semaphore()
+    queued = time.perf_counter()
+    st.waiting += 1
+    try:
+        await sem.acquire()
+    finally:
+        st.waiting -= 1
+    try:
+        st.wait_seconds += time.perf_counter() - queued
+        st.running += 1
+        call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(st.pool, call)
+    finally:
+        st.running -= 1
+        st.completed += 1
+        sem.release()
+
+
+def stage_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: st.stats() for name, st in _stages().items()}
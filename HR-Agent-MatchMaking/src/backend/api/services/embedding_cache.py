@@ -0,0 +1,158 @@
+"""Persistent embedding cache keyed on (model name, normalized text hash).
+
+`embed_texts` looks every text up here before encoding, so a job re-fetched under a
+new id, the same posting from another source or a re-run of `reembed_jobs.py` costs
+a SQLite read instead of a forward pass. Vectors are stored as float32 blobs in
+`EMBED_CACHE_PATH` (WAL mode, so every worker process can share the file). Once the
+cache holds more than `EMBED_CACHE_MAX_ENTRIES` vectors, the least recently used
+tenth is evicted.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ..config.settings import settings
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    key TEXT PRIMARY KEY,
+    vector BLOB NOT NULL,
+    last_used REAL NOT NULL
+)
+"""
+
+
+def normalize_text(text: str) -> str:
+    """Whitespace-collapsed text; what is both hashed and encoded."""
+    return " ".join((text or "").split())
+
+
+def cache_key(model_name: str, text: str) -> str:
+    return hashlib.blake2b(f"{model_name}\0{text}".encode(), digest_size=20).hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._conn = self._open(path)
+        self._entries = self._count()
+
+    @staticmethod
+    def _open(path: str) -> Optional[sqlite3.Connection]:
+        if not path:
+            return None
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(_SCHEMA)
+            conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+            logger.info(f"Embedding cache at {path}")
+            return conn
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Embedding cache unavailable ({e}); embedding without it")
+            return None
+
+    @property
+    def enabled(self) -> bool:
+        return self._conn is not None
+
+    def _count(self) -> int:
+        if self._conn is None:
+            return 0
+        return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Cached vectors of the given keys (missing keys are left out)."""
+        if self._conn is None or not keys:
+            return {}
+        found: Dict[str, List[float]] = {}
+        try:
+            with self._lock:
+                # Stay under SQLite's bound-parameter limit
+                for i in range(0, len(keys), 500):
+                    chunk = keys[i:i + 500]
+                    rows = self._conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                    ).fetchall()
+                    for key, blob in rows:
+                        found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+                if found:
+                    now = time.time()
+                    self._conn.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?", [(now, k) for k in found])
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"Embedding cache read failed: {e}")
+            found = {}
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]) -> None:
+        if self._conn is None or not items:
+            return
+        now = time.time()
+        rows = [(key, np.asarray(vec, dtype=np.float32).tobytes(), now) for key, vec in items.items()]
+        try:
+            with self._lock:
+                self._conn.executemany("INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)", rows)
+                self._entries += len(rows)
+                if self._entries > self.max_entries:
+                    self._evict()
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"Embedding cache write failed: {e}")
+
+    def _evict(self) -> None:
+        # The running count drifts with replaced keys and other processes; recount first
+        self._entries = self._count()
+        excess = self._entries - self.max_entries
+        if excess <= 0:
+            return
+        drop = excess + self.max_entries // 10
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used LIMIT ?)", (drop,)
+        )
+        self.evictions += drop
+        self._entries = self._count()
+
+    def clear(self) -> None:
+        if self._conn is None:
+            return
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._entries = 0
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": self._entries,
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+            "errors": self.errors,
+        }
+
+
+@lru_cache
+def get_embedding_cache() -> EmbeddingCache:
+    return EmbeddingCache(os.path.expanduser(settings.EMBED_CACHE_PATH), settings.EMBED_CACHE_MAX_ENTRIES)
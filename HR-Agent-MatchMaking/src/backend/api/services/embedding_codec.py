@@ -0,0 +1,127 @@
+"""Compact storage format for embeddings in MongoDB.
+
+The `embedding` field holds either a legacy BSON array of doubles or raw
+little-endian bytes, described by `embedding_format`:
+
+- ``float32``: 4 bytes per dimension, lossless for the model's output
+- ``float16``: 2 bytes per dimension
+- ``int8``: 1 byte per dimension, scalar-quantized with a per-vector
+  ``embedding_scale`` (value = int8 * scale)
+
+An empty array is still written when embedding fails, so the "missing or empty"
+queries in `reembed_jobs.py` keep working.
+
+`embedding_model` records the model id (`embedding_engine.embedding_model_id`) that
+produced the vector. While the embedding model is being migrated, the target
+model's vector is kept alongside in the same layout under the ``embedding_next``
+prefix (see `embedding_migration`). Vectors stored before tagging have no
+`embedding_model` and belong to `EMBED_LEGACY_MODEL`; startup stamps that on them.
+"""
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..config.settings import settings
+
+FORMATS = ("float32", "float16", "int8")
+
+_DTYPES = {"float32": np.dtype("<f4"), "float16": np.dtype("<f2"), "int8": np.dtype("i1")}
+
+# Field prefixes of the serving vector and of the one written by a model migration
+PRIMARY = "embedding"
+NEXT = "embedding_next"
+
+# Fields to project when a query needs to decode embeddings
+EMBEDDING_FIELDS = {
+    f"{slot}{suffix}": 1 for slot in (PRIMARY, NEXT) for suffix in ("", "_format", "_scale", "_model")
+}
+
+
+def quantize_int8(vec: np.ndarray) -> Tuple[np.ndarray, float]:
+    """Symmetric scalar quantization: returns (int8 values, scale)."""
+    peak = float(np.max(np.abs(vec))) if vec.size else 0.0
+    scale = peak / 127.0 if peak > 0 else 1.0
+    return np.clip(np.rint(vec / scale), -127, 127).astype(np.int8), scale
+
+
+def encode_embedding(emb: Sequence[float], fmt: Optional[str] = None, model_id: Optional[str] = None, slot: str = PRIMARY) -> Dict:
+    """Fields to `$set` on a document for this embedding, tagged with `model_id` if given."""
+    fmt = fmt or settings.EMBEDDING_STORAGE_FORMAT
+    tag = {f"{slot}_model": model_id} if model_id else {}
+    if emb is None or len(emb) == 0:
+        return {slot: [], **tag}
+    vec = np.asarray(emb, dtype=np.float32)
+    if fmt == "int8":
+        q, scale = quantize_int8(vec)
+        return {slot: q.tobytes(), f"{slot}_format": "int8", f"{slot}_scale": scale, **tag}
+    if fmt not in _DTYPES:
+        raise ValueError(f"Unknown embedding storage format: {fmt}")
+    return {slot: vec.astype(_DTYPES[fmt]).tobytes(), f"{slot}_format": fmt, **tag}
+
+
+def version_slot(doc: Dict, model_id: Optional[str] = None) -> Optional[str]:
+    """Prefix of the document's vector for `model_id`, or None if it has none; without one, `embedding`."""
+    if model_id is None:
+        return PRIMARY
+    if doc.get(f"{NEXT}_model") == model_id:
+        return NEXT
+    if doc.get(f"{PRIMARY}_model", settings.EMBED_LEGACY_MODEL) == model_id:
+        return PRIMARY
+    return None
+
+
+def decode_embedding_raw(doc: Dict, model_id: Optional[str] = None) -> Tuple[Optional[np.ndarray], float]:
+    """Stored values without dequantizing: (array, scale). Scale is 1.0 unless int8."""
+    slot = version_slot(doc, model_id)
+    emb = doc.get(slot) if slot else None
+    if emb is None or len(emb) == 0:
+        return None, 1.0
+    fmt = doc.get(f"{slot}_format")
+    if fmt is None or isinstance(emb, list):
+        return np.asarray(emb, dtype=np.float32), 1.0
+    arr = np.frombuffer(bytes(emb), dtype=_DTYPES[fmt])
+    return arr, (float(doc.get(f"{slot}_scale") or 1.0) if fmt == "int8" else 1.0)
+
+
+def decode_embedding(doc: Dict, model_id: Optional[str] = None) -> Optional[np.ndarray]:
+    """The document's embedding for `model_id` as float32, whatever format it was stored in.
+
+    None if the document has no vector of that model version.
+    """
+    arr, scale = decode_embedding_raw(doc, model_id)
+    if arr is None:
+        return None
+    if arr.dtype == np.int8:
+        return arr.astype(np.float32) * np.float32(scale)
+    return arr.astype(np.float32)
+
+
+def quantized_dot(matrix: np.ndarray, query: np.ndarray, scales: Optional[np.ndarray] = None, block: int = 16384) -> np.ndarray:
+    """`matrix @ query` for float32, float16 or int8 row storage.
+
+    Non-float32 rows are widened one block at a time, so no full float32 copy of the
+    matrix is made; int8 rows are multiplied by their per-row `scales`. `query` may be
+    a vector or a (dim, m) matrix.
+    """
+    if matrix.dtype == np.float32:
+        return matrix @ query
+    n = matrix.shape[0]
+    out = np.empty((n,) + query.shape[1:], dtype=np.float32)
+    for start in range(0, n, block):
+        end = min(start + block, n)
+        out[start:end] = matrix[start:end].astype(np.float32) @ query
+        if scales is not None:
+            s = scales[start:end]
+            out[start:end] *= s if query.ndim == 1 else s[:, None]
+    return out
+
+
+def dequantize_rows(matrix: np.ndarray, scales: Optional[np.ndarray] = None, rows: Optional[np.ndarray] = None) -> np.ndarray:
+    """Selected rows (all if `rows` is None) widened to float32."""
+    block = matrix if rows is None else matrix[rows]
+    if block.dtype == np.float32:
+        return block
+    out = block.astype(np.float32)
+    if scales is not None:
+        out *= (scales if rows is None else scales[rows])[:, None]
+    return out
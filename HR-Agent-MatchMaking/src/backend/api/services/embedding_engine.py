@@ -5,8 +5,15 @@ os.environ.setdefault("TRANSFORMERS_NO_FLAX", "1")
 os.environ.setdefault("USE_TF", "0")
 
 from ..config.settings import settings
+from concurrent.futures import Future
 from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+import numpy as np
 from ..utils.logger import get_logger
+from .embedding_cache import cache_key, get_embedding_cache, normalize_text
+from .embedding_codec import NEXT, encode_embedding
+from .embedding_workers import get_worker_pool
+import queue
 import sys
 import subprocess
 import threading
@@ -15,13 +22,58 @@ import time
 logger = get_logger(__name__)
 
 
-@lru_cache
+_serving_model: Optional[str] = None
+
+
+def configured_model_id(model_name: Optional[str] = None) -> str:
+    """The model id the settings produce for `model_name` (default `MODEL_NAME`).
+
+    The model name, plus the int8 ONNX variant and the chunking parameters when on.
+    """
+    model_id = model_name or settings.MODEL_NAME
+    if settings.EMBED_BACKEND == "onnx" and settings.EMBED_ONNX_QUANTIZE:
+        model_id += "+onnx-int8"
+    if settings.EMBED_CHUNKING:
+        model_id += f"+chunk{settings.EMBED_CHUNK_TOKENS}/{settings.EMBED_CHUNK_OVERLAP}/{settings.EMBED_CHUNK_MAX}"
+    return model_id
+
+
+def embedding_model_id() -> str:
+    """The version that embeds queries and new documents: the configured one until startup or a migration sets another."""
+    return _serving_model or configured_model_id()
+
+
+def set_serving_model(model_id: Optional[str]) -> None:
+    global _serving_model
+    _serving_model = model_id
+
+
+def model_variant(model_id: str) -> Tuple[str, bool, Optional[Tuple[int, int, int]]]:
+    """(model name, int8 ONNX, chunking as (tokens, overlap, max chunks) or None) of a model id."""
+    model_name, *tags = model_id.split("+")
+    chunking = None
+    for tag in tags:
+        if tag.startswith("chunk"):
+            tokens, overlap, max_chunks = (int(v) for v in tag[len("chunk"):].split("/"))
+            chunking = (tokens, overlap, max_chunks)
+    return model_name, "onnx-int8" in tags, chunking
+
+
 def get_model():
+    return load_embedding_model(embedding_model_id())
+
+
+@lru_cache
+def load_embedding_model(model_id: str):
+    """The model that produces `model_id` vectors: an int8 ONNX variant is served by ONNX whatever `EMBED_BACKEND` says."""
+    model_name, int8, _ = model_variant(model_id)
+    if settings.EMBED_BACKEND == "onnx" or int8:
+        return _load_onnx_model(model_name, int8)
     try:
         from sentence_transformers import SentenceTransformer
-        logger.info(f"Loading SentenceTransformer model: {settings.MODEL_NAME}")
-        model = SentenceTransformer(settings.MODEL_NAME)
-        logger.info(f"Model loaded successfully: {settings.MODEL_NAME}")
+        logger.info(f"Loading SentenceTransformer model: {model_name}")
+        model = SentenceTransformer(model_name)
+        logger.info(f"Model loaded successfully: {model_name}")
         return model
     except Exception as e:
         # If sentence-transformers isn't installed in the image, try to install it at runtime.
@@ -42,24 +94,267 @@ def get_model():
             # Short sleep to allow pip to settle files on disk inside container
             time.sleep(1)
             from sentence_transformers import SentenceTransformer
-            logger.info(f"Loading SentenceTransformer model after runtime install: {settings.MODEL_NAME}")
-            model = SentenceTransformer(settings.MODEL_NAME)
-            logger.info(f"Model loaded successfully after runtime install: {settings.MODEL_NAME}")
+            logger.info(f"Loading SentenceTransformer model after runtime install: {model_name}")
+            model = SentenceTransformer(model_name)
+            logger.info(f"Model loaded successfully after runtime install: {model_name}")
             return model
         except Exception as e2:
             logger.error(f"Runtime installation or model load failed: {e2}", exc_info=True)
             return None
 
 
-def embed_text(text: str) -> list[float]:
-    model = get_model()
-    if not model:
-        logger.warning(f"embed_text called but model is None, returning empty list")
-        return []
+def load_model() -> bool:
+    """Load the model where inference runs: in this process, or in every embedding worker."""
+    if settings.EMBED_WORKERS > 0:
+        return get_worker_pool().wait_ready()
+    return get_model() is not None
+
+
+def warm_up_model() -> bool:
+    """Warm the model up and start the micro-batcher; False if the model could not be loaded.
+
+    Embedding workers warm themselves up before they report ready.
+    """
+    if settings.EMBED_WORKERS > 0:
+        ok = get_worker_pool().wait_ready()
+    else:
+        model = get_model()
+        ok = model is not None
+        if ok:
+            warm_up(model)
+    get_batcher()
+    return ok
+
+
+def warm_up(model) -> None:
+    """Run `EMBED_WARMUP_BATCHES` dummy batches of the sizes served, bypassing the cache."""
+    sizes = [1, settings.EMBED_MICROBATCH_MAX_SIZE, settings.EMBED_BATCH_SIZE]
+    for i in range(settings.EMBED_WARMUP_BATCHES):
+        size = sizes[i % len(sizes)]
+        # Short and long texts, so kernels for both sequence lengths get initialised
+        texts = [_WARMUP_TEXT * (1 + (j % 2) * 20) for j in range(size)]
+        encode_with(model, texts)
+
+
+_WARMUP_TEXT = "Senior Python developer with FastAPI, Docker and AWS experience. "
+
+
+def encode_with(model, texts: List[str], bucket: bool = True, model_id: Optional[str] = None) -> np.ndarray:
+    """Encode `texts` with a loaded model, chunked if `model_id` (default: the serving version) is."""
+    chunking = model_variant(model_id or embedding_model_id())[2]
+    if chunking:
+        return encode_chunked(model, texts, bucket=bucket, chunking=chunking)
+    return model.encode(texts, batch_size=settings.EMBED_BATCH_SIZE, convert_to_numpy=True)
+
+
+def token_offsets(model, texts: List[str]) -> List[List[Tuple[int, int]]]:
+    """Character span of every token of each text, untruncated and without special tokens."""
+    if hasattr(model, "token_offsets"):
+        return model.token_offsets(texts)
+    enc = model.tokenizer(texts, add_special_tokens=False, truncation=False, return_offsets_mapping=True, verbose=False)
+    return enc["offset_mapping"]
+
+
+def chunk_text(text: str, offsets: List[Tuple[int, int]], window: int, overlap: int, max_chunks: int) -> List[Tuple[str, int]]:
+    """(chunk text, token count) windows of at most `window` tokens, `overlap` tokens apart."""
+    n = len(offsets)
+    if n <= window:
+        return [(text, n)]
+    step = max(1, window - overlap)
+    chunks = []
+    for start in range(0, n, step):
+        end = min(start + window, n)
+        chunks.append((text[offsets[start][0]:offsets[end - 1][1]], end - start))
+        if end == n or len(chunks) == max_chunks:
+            break
+    return chunks
+
+
+def encode_chunked(model, texts: List[str], bucket: bool = True, chunking: Optional[Tuple[int, int, int]] = None) -> np.ndarray:
+    """Embed whole texts instead of their first `max_seq_length` tokens.
+
+    Texts longer than the window are split into overlapping token windows (at most
+    `EMBED_CHUNK_MAX` each). All chunks of the call are sorted by token length and
+    encoded in batches of `EMBED_BATCH_SIZE`, so each batch pads to similar lengths,
+    then pooled back per text as a token-weighted mean, re-normalised. `chunking`
+    is (tokens, overlap, max chunks), by default from the settings.
+    """
+    tokens, overlap, max_chunks = chunking or (settings.EMBED_CHUNK_TOKENS, settings.EMBED_CHUNK_OVERLAP, settings.EMBED_CHUNK_MAX)
+    window = tokens or model.max_seq_length - 2  # room for [CLS] / [SEP]
+    owners, chunks, lengths = [], [], []
+    for i, (text, offsets) in enumerate(zip(texts, token_offsets(model, texts))):
+        for chunk, n in chunk_text(text, offsets, window, overlap, max_chunks):
+            owners.append(i)
+            chunks.append(chunk)
+            lengths.append(max(n, 1))
+    order = np.argsort(lengths, kind="stable") if bucket else np.arange(len(chunks))
+    vecs = None
+    for start in range(0, len(order), settings.EMBED_BATCH_SIZE):
+        rows = order[start:start + settings.EMBED_BATCH_SIZE]
+        embs = model.encode([chunks[r] for r in rows], batch_size=len(rows), convert_to_numpy=True, show_progress_bar=False)
+        if vecs is None:
+            vecs = np.empty((len(chunks), embs.shape[1]), dtype=np.float32)
+        vecs[rows] = embs
+    out = np.zeros((len(texts), vecs.shape[1]), dtype=np.float32)
+    np.add.at(out, np.asarray(owners), vecs * np.asarray(lengths, dtype=np.float32)[:, None])
+    return out / np.clip(np.linalg.norm(out, axis=1, keepdims=True), 1e-12, None)
+
+
+def _load_onnx_model(model_name: str, quantize: bool):
+    from .onnx_embedder import OnnxEmbedder, export_onnx, onnx_model_file, read_config
+
+    model_dir = settings.EMBED_ONNX_DIR
+    if model_name != settings.MODEL_NAME:
+        # A migration target gets its own export next to the configured model's
+        model_dir = os.path.join(model_dir, model_name.replace("/", "__"))
     try:
-        emb = model.encode(text or "", convert_to_numpy=True)
-        logger.debug(f"Generated embedding with shape: {emb.shape}")
-        return emb.tolist()
+        config = read_config(model_dir)
+        if config is None or config.get("model_name") != model_name or not os.path.exists(onnx_model_file(model_dir, quantize)):
+            # Exporting needs torch; CPU images without it must ship the exported model
+            logger.info(f"Exporting {model_name} to ONNX in {model_dir}")
+            export_onnx(model_name, model_dir, quantize=quantize)
+        model = OnnxEmbedder(model_dir, quantize=quantize, threads=settings.EMBED_ONNX_THREADS)
+        logger.info(f"ONNX model loaded successfully: {model_name} (int8: {quantize})")
+        return model
     except Exception as e:
-        logger.error(f"Failed to embed text: {e}", exc_info=True)
+        logger.error(f"ONNX model load failed: {e}", exc_info=True)
+        return None
+
+
+def embed_texts(texts: List[str], priority: str = "interactive", model_id: Optional[str] = None) -> List[list[float]]:
+    """Embed many texts in one model call (batches of `EMBED_BATCH_SIZE`).
+
+    Texts already in the embedding cache are not encoded again. `priority` is
+    "interactive" or "bulk" (ingest, re-embedding); with embedding workers, bulk
+    work waits behind interactive requests. `model_id` defaults to the serving
+    version; pass the one `embedding_fields` will tag the vectors with. Returns one
+    embedding per text, or empty lists if the model is unavailable.
+    """
+    if not texts:
         return []
+    model_id = model_id or embedding_model_id()
+    cache = get_embedding_cache()
+    normalized = [normalize_text(t) for t in texts]
+    keys = [cache_key(model_id, t) for t in normalized]
+    found = cache.get_many(list(dict.fromkeys(keys)))
+    todo = list(dict.fromkeys(k for k in keys if k not in found))
+    if todo:
+        text_of = dict(zip(keys, normalized))
+        fresh = _encode([text_of[k] for k in todo], priority, model_id)
+        computed = {k: emb for k, emb in zip(todo, fresh) if emb}
+        cache.put_many(computed)
+        found.update(computed)
+    return [found.get(k, []) for k in keys]
+
+
+def embedding_fields(emb: List[float], model_id: Optional[str] = None) -> Dict:
+    """Fields to `$set` for a freshly embedded document, tagged with the model version.
+
+    A vector a model migration wrote for the document was computed from its previous
+    text, so it is marked stale for the migration to redo.
+    """
+    fields = encode_embedding(emb, model_id=model_id or embedding_model_id())
+    fields[f"{NEXT}_model"] = None
+    return fields
+
+
+def _encode(texts: List[str], priority: str, model_id: str) -> List[list[float]]:
+    if settings.EMBED_WORKERS > 0:
+        pool = get_worker_pool()
+        # Calls pinned to another version (a migration's backfill, or around a switch)
+        # miss the workers; they are encoded in-process below
+        if pool.model_id == model_id:
+            try:
+                return pool.embed(texts, priority).tolist()
+            except Exception as e:
+                logger.error(f"Embedding workers failed to embed {len(texts)} texts: {e}")
+                return [[] for _ in texts]
+    model = load_embedding_model(model_id)
+    if not model:
+        logger.warning(f"embed_texts called but model is None, returning empty lists")
+        return [[] for _ in texts]
+    try:
+        embs = encode_with(model, texts, model_id=model_id)
+        logger.debug(f"Generated {len(texts)} embeddings with shape: {embs.shape}")
+        return embs.tolist()
+    except Exception as e:
+        logger.error(f"Failed to embed {len(texts)} texts: {e}", exc_info=True)
+        return [[] for _ in texts]
+
+
+class _MicroBatcher:
+    """Coalesces concurrent `embed_text` calls into `embed_texts` batches.
+
+    A single worker thread takes the first queued text, then keeps collecting until
+    `EMBED_MICROBATCH_MAX_SIZE` texts are queued or `EMBED_MICROBATCH_MAX_WAIT_MS`
+    has passed, and runs one forward pass for the lot. Callers block on a future.
+    """
+
+    def __init__(self, max_size: int, max_wait_ms: float):
+        self.max_size = max(1, max_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.batches = 0
+        self.items = 0
+        self._queue: "queue.Queue[Tuple[str, Optional[str], Future]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="embed-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, text: str, model_id: Optional[str] = None) -> Future:
+        future: Future = Future()
+        self._queue.put((text, model_id or embedding_model_id(), future))
+        return future
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            # Calls pinned to different versions (only around a model switch) get a pass each
+            by_model: Dict[str, list] = {}
+            for item in batch:
+                by_model.setdefault(item[1], []).append(item)
+            for model_id, items in by_model.items():
+                try:
+                    embs = embed_texts([text for text, _, _ in items], model_id=model_id)
+                except Exception as e:
+                    for _, _, future in items:
+                        future.set_exception(e)
+                    continue
+                self.batches += 1
+                self.items += len(items)
+                for (_, _, future), emb in zip(items, embs):
+                    future.set_result(emb)
+
+    def stats(self) -> Dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "queued": self._queue.qsize(),
+        }
+
+
+_batcher: Optional[_MicroBatcher] = None
+_batcher_lock = threading.Lock()
+
+
+def get_batcher() -> _MicroBatcher:
+    # Not lru_cache: the first calls arrive concurrently and must share one worker thread
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = _MicroBatcher(settings.EMBED_MICROBATCH_MAX_SIZE, settings.EMBED_MICROBATCH_MAX_WAIT_MS)
+    return _batcher
+
+
+def embed_text(text: str, model_id: Optional[str] = None) -> list[float]:
+    """Embed one text; concurrent calls share forward passes via the micro-batcher."""
+    if settings.EMBED_MICROBATCH_ENABLED:
+        return get_batcher().submit(text, model_id).result()
+    return embed_texts([text], model_id=model_id)[0]
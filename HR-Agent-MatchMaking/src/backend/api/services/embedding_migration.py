@@ -0,0 +1,430 @@
+"""Zero-downtime switch of the embedding model version.
+
+Stored vectors are tagged with the model version (`embedding_engine.configured_model_id`:
+the model, plus the int8 ONNX variant and chunking) that produced them (see
+`embedding_codec`), and the `embedding_versions` collection records the version
+being served. When the settings produce another version (`EMBED_MIGRATION_MODEL` or
+a changed `MODEL_NAME`, `EMBED_BACKEND` or chunking), the recorded one keeps being
+served and a background thread re-embeds the stored jobs and resumes with the target
+version into the `embedding_next` fields, next to the served vectors,
+`EMBED_MIGRATION_BATCH_SIZE` documents at a time and at most
+`EMBED_MIGRATION_MAX_RATE` per second. Matching keeps serving the current version
+meanwhile.
+
+Once every document with a vector also has one of the target version, job and
+resume indexes are built from the target vectors off to the side, then swapped in
+together with the target model (and its embedding workers) in one step, and the
+switch is recorded. Afterwards the migrated vectors are moved into `embedding`, and
+documents written with the old model during the switch are re-embedded.
+`/api/embedding-migration` reports coverage, throughput and the phase.
+"""
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from pymongo import UpdateOne
+
+from ..config.database import get_embedding_versions_collection, get_jobs_collection, get_resumes_collection
+from ..config.settings import settings
+from ..utils.logger import get_logger
+from .embedding_codec import NEXT, PRIMARY, encode_embedding
+from .embedding_engine import (
+    configured_model_id,
+    embed_texts,
+    embedding_model_id,
+    load_embedding_model,
+    model_variant,
+    set_serving_model,
+)
+from .embedding_workers import start_worker_pool, swap_worker_pool
+from .job_api_aggregator import job_embedding_text
+from .job_index import JobIndex, get_job_index, set_job_index
+from .match_cache import get_match_cache
+from .resume_index import ResumeIndex, get_resume_index, set_resume_index
+
+logger = get_logger(__name__)
+
+_ACTIVE = "active"
+
+_NEXT_FIELDS = [f"{NEXT}{suffix}" for suffix in ("", "_format", "_scale", "_model")]
+
+# Throughput is reported over this many recent seconds
+_RATE_WINDOW_SECONDS = 60.0
+
+
+class _Collection:
+    def __init__(self, name: str, get: Callable, id_field: str, text_fields: List[str], text: Callable[[Dict], str]):
+        self.name = name
+        self.get = get
+        self.id_field = id_field
+        self.text_fields = text_fields
+        self.text = text
+
+
+_COLLECTIONS = [
+    _Collection("jobs", get_jobs_collection, "job_id", ["job_title", "company", "description"], job_embedding_text),
+    _Collection("resumes", get_resumes_collection, "resume_id", ["content"], lambda doc: doc.get("content") or ""),
+]
+
+_HAS_VECTOR = {"embedding": {"$exists": True, "$ne": []}}
+
+
+def read_active_version() -> Optional[Dict]:
+    return get_embedding_versions_collection().find_one({"_id": _ACTIVE}, {"_id": 0})
+
+
+def _record_active(model_id: str, finalized: bool = True) -> None:
+    get_embedding_versions_collection().update_one(
+        {"_id": _ACTIVE},
+        {"$set": {
+            "model_name": model_variant(model_id)[0],
+            "model_id": model_id,
+            "since": datetime.utcnow().isoformat(),
+            "finalized": finalized,
+        }},
+        upsert=True,
+    )
+
+
+def _version_query(model_id: str) -> Dict:
+    """Documents with a vector of `model_id` (served or migrated)."""
+    return {**_HAS_VECTOR, "$or": [{f"{PRIMARY}_model": model_id}, {f"{NEXT}_model": model_id}]}
+
+
+def _stamp_legacy() -> None:
+    """Tag vectors stored before tagging with `EMBED_LEGACY_MODEL`, the model that made them."""
+    for spec in _COLLECTIONS:
+        res = spec.get().update_many(
+            {**_HAS_VECTOR, f"{PRIMARY}_model": {"$exists": False}},
+            {"$set": {f"{PRIMARY}_model": settings.EMBED_LEGACY_MODEL}},
+        )
+        if res.modified_count:
+            logger.info(f"Tagged {res.modified_count} untagged {spec.name} vectors as {settings.EMBED_LEGACY_MODEL}")
+
+
+def _stored_version(model_id: str) -> str:
+    """`model_id`, unless stored jobs have vectors but none of that version: then one they have."""
+    jobs = get_jobs_collection()
+    if jobs.find_one(_version_query(model_id), {"_id": 1}) is not None:
+        return model_id
+    doc = jobs.find_one(_HAS_VECTOR, {f"{PRIMARY}_model": 1})
+    return doc.get(f"{PRIMARY}_model", settings.EMBED_LEGACY_MODEL) if doc is not None else model_id
+
+
+def resolve_serving_model() -> str:
+    """Serve the recorded version; runs at startup before the model and the indexes load.
+
+    A version the settings produce but the stored vectors are not of yet is only
+    served once `start_migration` has backfilled it. Whatever is recorded, the
+    served version must be one the stored jobs have vectors of, so the job index
+    never comes up empty.
+    """
+    _stamp_legacy()
+    active = read_active_version()
+    model_id = (active or {}).get("model_id") or configured_model_id()
+    stored = _stored_version(model_id)
+    if stored != model_id:
+        logger.warning(f"No stored job vector is of {model_id}; serving {stored}, which they are of")
+        model_id = stored
+    if active is None or active.get("model_id") != model_id:
+        _record_active(model_id)
+    set_serving_model(model_id)
+    target_id = _target_id()
+    if target_id != model_id:
+        logger.info(f"Serving {model_id} until the stored vectors are migrated to {target_id}")
+    # Anything that touched the indexes before now got ones for the configured version
+    if get_job_index().model_id != model_id:
+        set_job_index(JobIndex(settings.EMBEDDING_DIM, model_id))
+    if get_resume_index().model_id != model_id:
+        set_resume_index(ResumeIndex(settings.EMBEDDING_DIM, model_id))
+    logger.info(f"Serving embedding model version {model_id}")
+    return model_id
+
+
+def _target_id() -> str:
+    return configured_model_id(settings.EMBED_MIGRATION_MODEL or None)
+
+
+class EmbeddingMigration:
+    """Background re-embed of the stored documents with version `target_id`, then the switch to it.
+
+    Phases: "backfill" (writing target vectors next to the served ones), "switching",
+    "finalize" (moving them into `embedding`), "done", or "failed" if the target
+    model cannot be loaded.
+    """
+
+    def __init__(self, target_id: str):
+        self.target_id = target_id
+        self.target = model_variant(target_id)[0]
+        self.phase = "finalize" if embedding_model_id() == self.target_id else "backfill"
+        self.embedded = {c.name: 0 for c in _COLLECTIONS}
+        self.promoted = {c.name: 0 for c in _COLLECTIONS}
+        self.failed = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.started_at = datetime.utcnow().isoformat()
+        self.switched_at: Optional[str] = None
+        self._recent: deque = deque()
+        self._position: Dict[str, object] = {}  # last _id visited per collection
+        self._checked_active = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="embed-migration", daemon=True)
+
+    def start(self) -> None:
+        logger.info(f"Embedding migration to {self.target_id}: {self.phase}")
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        if load_embedding_model(self.target_id) is None:
+            self.phase = "failed"
+            self.last_error = f"could not load {self.target_id}"
+            logger.error(f"Embedding migration stopped: {self.last_error}")
+            return
+        while not self._stop.is_set() and self.phase != "done":
+            try:
+                idle = self.step()
+            except Exception as e:
+                logger.exception("Embedding migration step failed")
+                self.errors += 1
+                self.last_error = str(e)
+                idle = True
+            if idle:
+                self._stop.wait(settings.EMBED_MIGRATION_POLL_SECONDS)
+
+    def step(self) -> bool:
+        """One unit of work; True when there was nothing to do."""
+        if self.phase == "backfill":
+            if self._switched_elsewhere():
+                # Another API process finished the migration: follow it
+                self._switch(record=False)
+                return False
+            if self._embed_batch(NEXT):
+                return False
+            if all(c["covered"] == c["total"] for c in self.coverage().values()):
+                self._switch(record=True)
+                return False
+            return True
+        # After the switch: re-embed documents written with the old model meanwhile,
+        # then move the migrated vectors into the served fields
+        if self._embed_batch(PRIMARY) or self._promote_batch():
+            return False
+        self.phase = "done"
+        get_embedding_versions_collection().update_one({"_id": _ACTIVE, "model_id": self.target_id}, {"$set": {"finalized": True}})
+        if settings.EMBED_MIGRATION_MODEL:
+            logger.info(
+                f"Embedding migration to {self.target_id} done; set MODEL_NAME={self.target} and clear EMBED_MIGRATION_MODEL"
+            )
+        else:
+            logger.info(f"Embedding migration to {self.target_id} done")
+        return True
+
+    def _pending_query(self) -> Dict:
+        return {**_HAS_VECTOR, f"{PRIMARY}_model": {"$ne": self.target_id}, f"{NEXT}_model": {"$ne": self.target_id}}
+
+    def _embed_batch(self, slot: str) -> int:
+        """Embed up to one batch of documents without a target vector into `slot`.
+
+        Each collection is walked in `_id` order (the pending filter itself cannot use an
+        index), starting over once the end is reached to pick up documents written since.
+        """
+        for spec in _COLLECTIONS:
+            docs = self._next_pending(spec)
+            if not docs:
+                continue
+            started = time.monotonic()
+            embs = embed_texts([spec.text(doc) for doc in docs], "bulk", self.target_id)
+            ops, done = [], []
+            for doc, emb in zip(docs, embs):
+                if not emb:
+                    continue
+                update = {"$set": encode_embedding(emb, model_id=self.target_id, slot=slot)}
+                if slot == PRIMARY:
+                    update["$unset"] = {f: "" for f in _NEXT_FIELDS}
+                ops.append(UpdateOne({"_id": doc["_id"]}, update))
+                done.append(doc.get(spec.id_field))
+            if ops:
+                spec.get().bulk_write(ops, ordered=False)
+            if slot == PRIMARY and done:
+                # Served version: make them matchable right away
+                index = get_job_index() if spec.name == "jobs" else get_resume_index()
+                if index.loaded:
+                    index.refresh([i for i in done if i])
+            self.failed += len(docs) - len(ops)
+            self.embedded[spec.name] += len(ops)
+            self._throttle(len(docs), started)
+            if not ops:
+                # The model is failing: back off instead of cycling through the collection
+                self.last_error = f"{len(docs)} {spec.name} could not be embedded with {self.target_id}"
+                self._stop.wait(settings.EMBED_MIGRATION_POLL_SECONDS)
+            return len(docs)
+        return 0
+
+    def _next_pending(self, spec: _Collection) -> List[Dict]:
+        coll = spec.get()
+        projection = {"_id": 1, spec.id_field: 1, **{f: 1 for f in spec.text_fields}}
+        last = self._position.get(spec.name)
+        query = self._pending_query() if last is None else {**self._pending_query(), "_id": {"$gt": last}}
+        docs = list(coll.find(query, projection).sort("_id", 1).limit(settings.EMBED_MIGRATION_BATCH_SIZE))
+        if not docs and last is not None:
+            self._position.pop(spec.name)
+            return self._next_pending(spec)
+        if docs:
+            self._position[spec.name] = docs[-1]["_id"]
+        return docs
+
+    def _promote_batch(self) -> int:
+        """Move up to one batch of target vectors from `embedding_next` into `embedding`."""
+        for spec in _COLLECTIONS:
+            coll = spec.get()
+            projection = {"_id": 1, **{f: 1 for f in _NEXT_FIELDS}}
+            docs = list(coll.find({f"{NEXT}_model": self.target_id}, projection).limit(settings.EMBED_MIGRATION_BATCH_SIZE))
+            if not docs:
+                continue
+            ops = []
+            for doc in docs:
+                fields = {f"{PRIMARY}{f[len(NEXT):]}": doc[f] for f in _NEXT_FIELDS if f in doc}
+                unset = {f: "" for f in _NEXT_FIELDS}
+                if f"{PRIMARY}_scale" not in fields:
+                    unset[f"{PRIMARY}_scale"] = ""
+                ops.append(UpdateOne({"_id": doc["_id"], f"{NEXT}_model": self.target_id}, {"$set": fields, "$unset": unset}))
+            coll.bulk_write(ops, ordered=False)
+            self.promoted[spec.name] += len(ops)
+            return len(ops)
+        return 0
+
+    def _throttle(self, count: int, started: float) -> None:
+        now = time.monotonic()
+        self._recent.append((now, count))
+        while self._recent and now - self._recent[0][0] > _RATE_WINDOW_SECONDS:
+            self._recent.popleft()
+        if settings.EMBED_MIGRATION_MAX_RATE > 0:
+            self._stop.wait(max(0.0, count / settings.EMBED_MIGRATION_MAX_RATE - (now - started)))
+
+    def _switched_elsewhere(self) -> bool:
+        now = time.monotonic()
+        if now - self._checked_active < settings.EMBED_MIGRATION_POLL_SECONDS:
+            return False
+        self._checked_active = now
+        active = read_active_version()
+        return bool(active) and active.get("model_id") == self.target_id
+
+    def _switch(self, record: bool) -> None:
+        """Build the target indexes, then swap model, workers and indexes in one step."""
+        self.phase = "switching"
+        started = time.perf_counter()
+        try:
+            jobs = JobIndex(settings.EMBEDDING_DIM, self.target_id)
+            jobs.load()
+            resumes = ResumeIndex(settings.EMBEDDING_DIM, self.target_id)
+            resumes.load()
+            pool = None
+            if settings.EMBED_WORKERS > 0:
+                pool = start_worker_pool(self.target_id)
+                if pool is None:
+                    raise RuntimeError(f"no embedding worker could load {self.target_id}")
+        except Exception:
+            self.phase = "backfill"
+            raise
+        with _switch_lock:
+            old_pool = swap_worker_pool(pool) if pool is not None else None
+            set_serving_model(self.target_id)
+            set_job_index(jobs)
+            set_resume_index(resumes)
+        if record:
+            _record_active(self.target_id, finalized=False)
+        get_match_cache().invalidate()
+        self.switched_at = datetime.utcnow().isoformat()
+        self.phase = "finalize"
+        logger.info(
+            f"Switched embeddings to {self.target_id} in {time.perf_counter() - started:.1f}s "
+            f"({len(jobs)} jobs, {len(resumes)} resumes)"
+        )
+        if old_pool is not None:
+            old_pool.drain(30.0)
+            old_pool.close()
+
+    def coverage(self) -> Dict[str, Dict]:
+        """Per collection: documents with a vector, and how many have one of the target version."""
+        out = {}
+        for spec in _COLLECTIONS:
+            coll = spec.get()
+            total = coll.count_documents(_HAS_VECTOR)
+            covered = coll.count_documents(
+                {**_HAS_VECTOR, "$or": [{f"{PRIMARY}_model": self.target_id}, {f"{NEXT}_model": self.target_id}]}
+            )
+            out[spec.name] = {
+                "total": total,
+                "covered": covered,
+                "percent": round(covered / total * 100.0, 2) if total else 100.0,
+            }
+        return out
+
+    def stats(self) -> Dict:
+        coverage = self.coverage()
+        total = sum(c["total"] for c in coverage.values())
+        remaining = total - sum(c["covered"] for c in coverage.values())
+        recent = list(self._recent)
+        span = time.monotonic() - recent[0][0] if recent else 0.0
+        rate = sum(n for _, n in recent) / span if span > 0 else 0.0
+        return {
+            "target_model": self.target,
+            "target_model_id": self.target_id,
+            "serving_model_id": embedding_model_id(),
+            "phase": self.phase,
+            "coverage": coverage,
+            "percent": round((total - remaining) / total * 100.0, 2) if total else 100.0,
+            "embedded": dict(self.embedded),
+            "promoted": dict(self.promoted),
+            "failed": self.failed,
+            "docs_per_second": round(rate, 2),
+            "eta_seconds": round(remaining / rate, 1) if rate and self.phase == "backfill" else None,
+            "max_rate": settings.EMBED_MIGRATION_MAX_RATE,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "started_at": self.started_at,
+            "switched_at": self.switched_at,
+        }
+
+
+_switch_lock = threading.Lock()
+_migration: Optional[EmbeddingMigration] = None
+
+
+def get_migration() -> Optional[EmbeddingMigration]:
+    return _migration
+
+
+def start_migration() -> None:
+    """Start migrating to the version the settings produce, unless it is served and finalized already.
+
+    Versions are compared by model id, so a new `EMBED_BACKEND` or chunking setting
+    migrates too, not only a new model.
+    """
+    global _migration
+    if _migration is not None:
+        return
+    target_id = _target_id()
+    active = read_active_version() or {}
+    if target_id == embedding_model_id() and active.get("finalized", True):
+        return
+    _migration = EmbeddingMigration(target_id)
+    _migration.start()
+
+
+def stop_migration() -> None:
+    if _migration is not None:
+        _migration.stop()
+
+
+def migration_status() -> Dict:
+    migration = get_migration()
+    return {
+        "active": read_active_version(),
+        "serving_model_id": embedding_model_id(),
+        "migration": migration.stats() if migration is not None else None,
+    }
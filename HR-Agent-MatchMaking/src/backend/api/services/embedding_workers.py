@@ -0,0 +1,353 @@
+"""Embedding inference in dedicated worker processes (`EMBED_WORKERS` > 0).
+
+Each worker is a spawned process that loads the model (torch or ONNX, per
+`EMBED_BACKEND`) with `EMBED_WORKER_THREADS` intra-op threads and warms it up. Texts
+go to a worker over its own pipe; the vectors come back through a shared-memory
+buffer owned by that worker's slot, so only a row count crosses the pipe.
+
+Requests are split into tasks of at most `EMBED_WORKER_MAX_BATCH` texts and queued
+by priority: "interactive" (uploads, matches) tasks always go before "bulk" (ingest,
+re-embedding) ones, so a sync burst delays an interactive request by one task at
+most. Bulk work in the API process no longer competes with request handling for
+the GIL or torch threads.
+
+A pool serves one model. When an embedding model migration switches models, a pool
+for the new model is started and warmed up next to the old one, swapped in, and the
+old one is drained and closed.
+"""
+import heapq
+import itertools
+import multiprocessing as mp
+import os
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ..config.settings import settings
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PRIORITIES = {"interactive": 0, "bulk": 1}
+
+# OpenMP / BLAS pools are sized when numpy and torch are imported; see `_start_with_threads`
+_THREAD_ENV = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+_spawn_lock = threading.Lock()
+
+
+def _start_with_threads(process, threads: int) -> None:
+    """Start `process` with the thread counts in its environment.
+
+    A spawned child imports numpy (and torch, through the model) while unpickling its
+    target, before `_worker_main` runs, so the variables must be inherited rather than
+    set by the child.
+    """
+    with _spawn_lock:
+        saved = {name: os.environ.get(name) for name in _THREAD_ENV}
+        os.environ.update({name: str(threads) for name in _THREAD_ENV})
+        try:
+            process.start()
+        finally:
+            for name, value in saved.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+
+
+def _worker_main(conn, shm_name: str, max_batch: int, dim: int, threads: int, model_id: str) -> None:
+    from .embedding_engine import encode_with, get_model, set_serving_model, warm_up
+
+    set_serving_model(model_id)
+    settings.EMBED_ONNX_THREADS = threads
+    if settings.EMBED_BACKEND != "onnx":
+        try:
+            import torch
+
+            torch.set_num_threads(threads)
+        except ImportError:
+            pass
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    out = np.ndarray((max_batch, dim), dtype=np.float32, buffer=shm.buf)
+    try:
+        model = get_model()
+        if model is None:
+            conn.send(("error", "embedding model unavailable"))
+            return
+        warm_up(model)
+        conn.send(("ready", os.getpid()))
+        while True:
+            texts = conn.recv()
+            if texts is None:
+                break
+            try:
+                embs = encode_with(model, texts)
+                if embs.shape[1] != dim:
+                    raise ValueError(f"model dimension {embs.shape[1]} != EMBEDDING_DIM {dim}")
+                out[:len(texts)] = embs
+                conn.send(("ok", len(texts)))
+            except Exception as e:
+                conn.send(("error", str(e)))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        del out
+        shm.close()
+
+
+class _Task:
+    __slots__ = ("priority", "texts", "future", "queued_at", "attempts")
+
+    def __init__(self, priority: str, texts: List[str]):
+        self.priority = priority
+        self.texts = texts
+        self.future: Future = Future()
+        self.queued_at = time.perf_counter()
+        self.attempts = 0
+
+
+class _Worker:
+    """One worker process plus the parent-side pipe and shared-memory result buffer."""
+
+    def __init__(self, ctx, index: int, max_batch: int, dim: int, threads: int, model_id: str):
+        self.index = index
+        self.shm = shared_memory.SharedMemory(create=True, size=max_batch * dim * 4)
+        self.out = np.ndarray((max_batch, dim), dtype=np.float32, buffer=self.shm.buf)
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main, args=(child, self.shm.name, max_batch, dim, threads, model_id), name=f"embed-worker-{index}", daemon=True
+        )
+        _start_with_threads(self.process, threads)
+        child.close()
+        self.busy = False
+        self.completed = 0
+
+    def close(self) -> None:
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.conn.close()
+        del self.out
+        self.shm.close()
+        self.shm.unlink()
+
+
+class EmbeddingWorkerPool:
+    def __init__(self, workers: int, threads: int, max_batch: int, dim: int, model_id: str):
+        self.model_id = model_id
+        self.max_batch = max(1, max_batch)
+        self.dim = dim
+        self.threads = threads or max(1, (os.cpu_count() or 1) // workers)
+        self._ctx = mp.get_context("spawn")  # torch does not survive fork
+        self._heap: list = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._closing = False
+        self._starting = workers
+        self._alive = 0
+        self._ready = threading.Event()
+        self.queued = {name: 0 for name in PRIORITIES}
+        self.completed = {name: 0 for name in PRIORITIES}
+        self.wait_seconds = {name: 0.0 for name in PRIORITIES}
+        self.errors = 0
+        self.restarts = 0
+        self._workers = [self._spawn(i) for i in range(workers)]
+        for worker in self._workers:
+            threading.Thread(target=self._serve, args=(worker.index,), name=f"embed-feeder-{worker.index}", daemon=True).start()
+
+    def _spawn(self, index: int) -> _Worker:
+        return _Worker(self._ctx, index, self.max_batch, self.dim, self.threads, self.model_id)
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until every worker has loaded its model (or failed to); True if any is serving."""
+        self._ready.wait(timeout)
+        return self._alive > 0
+
+    def embed(self, texts: List[str], priority: str = "interactive") -> np.ndarray:
+        """Embed `texts` on the workers; blocks until all their tasks are done."""
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        tasks = [_Task(priority, texts[i:i + self.max_batch]) for i in range(0, len(texts), self.max_batch)]
+        with self._cond:
+            if self._ready.is_set() and self._alive == 0:
+                raise RuntimeError("no embedding worker is running")
+            for task in tasks:
+                heapq.heappush(self._heap, (PRIORITIES[priority], next(self._seq), task))
+                self.queued[priority] += 1
+            self._cond.notify_all()
+        return np.vstack([task.future.result() for task in tasks])
+
+    def _serve(self, index: int) -> None:
+        """Feeder thread of one worker: hand it the most urgent task, collect the vectors."""
+        worker = self._workers[index]
+        if not self._await_start(worker):
+            return
+        while True:
+            with self._cond:
+                while not self._heap and not self._closing:
+                    self._cond.wait()
+                if self._closing:
+                    return
+                _, _, task = heapq.heappop(self._heap)
+                self.queued[task.priority] -= 1
+                if not task.attempts:
+                    self.wait_seconds[task.priority] += time.perf_counter() - task.queued_at
+                task.attempts += 1
+                worker.busy = True
+            try:
+                worker.conn.send(task.texts)
+                status, payload = worker.conn.recv()
+            except (EOFError, OSError) as e:
+                # The process died mid-task: retry the task once elsewhere and bring up a replacement
+                worker.busy = False
+                self.errors += 1
+                logger.error(f"Embedding worker {index} died: {e}")
+                with self._cond:
+                    if task.attempts < 2 and not self._closing:
+                        heapq.heappush(self._heap, (PRIORITIES[task.priority], next(self._seq), task))
+                        self.queued[task.priority] += 1
+                        self._cond.notify()
+                    else:
+                        task.future.set_exception(RuntimeError(f"embedding worker {index} died: {e}"))
+                worker = self._restart(index)
+                if worker is None:
+                    return
+                continue
+            worker.busy = False
+            if status == "ok":
+                task.future.set_result(worker.out[:payload].copy())
+                worker.completed += 1
+                self.completed[task.priority] += 1
+            else:
+                self.errors += 1
+                task.future.set_exception(RuntimeError(payload))
+
+    def _await_start(self, worker: _Worker) -> bool:
+        try:
+            status, payload = worker.conn.recv()
+        except (EOFError, OSError) as e:
+            status, payload = "error", str(e)
+        with self._cond:
+            self._starting -= 1
+            if status == "ready":
+                self._alive += 1
+                logger.info(f"Embedding worker {worker.index} ready (pid {payload}, {self.threads} threads)")
+            elif not self._closing:
+                logger.error(f"Embedding worker {worker.index} failed to start: {payload}")
+            if self._starting == 0:
+                self._ready.set()
+                if self._alive == 0:
+                    self._fail_queued(RuntimeError("no embedding worker is running"))
+        return status == "ready"
+
+    def _restart(self, index: int) -> Optional[_Worker]:
+        with self._cond:
+            self._alive -= 1
+            self._starting += 1
+            if self._closing:
+                return None
+        old = self._workers[index]
+        old.process.join(timeout=1)
+        old.conn.close()
+        del old.out
+        old.shm.close()
+        old.shm.unlink()
+        self.restarts += 1
+        self._workers[index] = self._spawn(index)
+        return self._workers[index] if self._await_start(self._workers[index]) else None
+
+    def _fail_queued(self, error: Exception) -> None:
+        while self._heap:
+            _, _, task = heapq.heappop(self._heap)
+            self.queued[task.priority] -= 1
+            task.future.set_exception(error)
+
+    def drain(self, timeout: float) -> bool:
+        """Wait up to `timeout` seconds for queued and running tasks to finish."""
+        deadline = time.monotonic() + timeout
+        while self._heap or any(w.busy for w in self._workers):
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def close(self) -> None:
+        with self._cond:
+            self._closing = True
+            self._fail_queued(RuntimeError("embedding worker pool closed"))
+            self._cond.notify_all()
+        for worker in self._workers:
+            worker.close()
+
+    def stats(self) -> Dict:
+        return {
+            "model": self.model_id,
+            "workers": len(self._workers),
+            "alive": self._alive,
+            "busy": sum(w.busy for w in self._workers),
+            "threads_per_worker": self.threads,
+            "max_batch": self.max_batch,
+            "queued": dict(self.queued),
+            "completed": dict(self.completed),
+            "avg_wait_ms": {
+                name: round(self.wait_seconds[name] / self.completed[name] * 1000.0, 3) if self.completed[name] else 0.0
+                for name in PRIORITIES
+            },
+            "errors": self.errors,
+            "restarts": self.restarts,
+        }
+
+
+_pool: Optional[EmbeddingWorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def _new_pool(model_id: str) -> EmbeddingWorkerPool:
+    return EmbeddingWorkerPool(
+        settings.EMBED_WORKERS, settings.EMBED_WORKER_THREADS, settings.EMBED_WORKER_MAX_BATCH, settings.EMBEDDING_DIM, model_id
+    )
+
+
+def get_worker_pool() -> EmbeddingWorkerPool:
+    global _pool
+    if _pool is None:
+        from .embedding_engine import embedding_model_id
+
+        with _pool_lock:
+            if _pool is None:
+                _pool = _new_pool(embedding_model_id())
+    return _pool
+
+
+def start_worker_pool(model_id: str) -> Optional[EmbeddingWorkerPool]:
+    """Workers for model version `model_id`, warm and ready to be swapped in; None if none came up."""
+    pool = _new_pool(model_id)
+    if not pool.wait_ready():
+        pool.close()
+        return None
+    return pool
+
+
+def swap_worker_pool(pool: EmbeddingWorkerPool) -> Optional[EmbeddingWorkerPool]:
+    """Serve from `pool` from now on; the caller drains and closes the returned old pool."""
+    global _pool
+    with _pool_lock:
+        old, _pool = _pool, pool
+    return old
+
+
+def shutdown_worker_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
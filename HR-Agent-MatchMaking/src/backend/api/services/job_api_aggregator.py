@@ -1,5 +1,8 @@
 import asyncio
 import aiohttp
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from typing import List, Dict, Optional
 from datetime import datetime
 import math
@@ -8,32 +11,112 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from ..config.settings import settings
 from ..config.database import get_jobs_collection
 from ..utils.logger import get_logger
+from .rate_limiter import get_rate_limiter, parse_retry_after, rate_limit_stats
 
 logger = get_logger(__name__)
 
+# Source whose fetch task issued the current request; tags the trace counters.
+_fetch_source: ContextVar[str] = ContextVar("fetch_source", default="other")
+
+# Responses that mean "slow down": raised so `_with_retries` honours Retry-After and retries
+_THROTTLE_STATUSES = (429, 503)
+
+_HTTP_COUNTERS = ("requests", "connections_created", "connections_reused", "pool_waits", "dns_lookups")
+
+
+def _http_trace(counters: Dict[str, Dict]) -> aiohttp.TraceConfig:
+    """Count requests, new vs reused connections, pool waits and DNS lookups per source."""
+    trace = aiohttp.TraceConfig()
+
+    def count(key: str):
+        async def on_event(session, ctx, params):
+            entry = counters.setdefault(_fetch_source.get(), dict.fromkeys(_HTTP_COUNTERS, 0))
+            entry[key] += 1
+        return on_event
+
+    trace.on_request_start.append(count("requests"))
+    trace.on_connection_create_end.append(count("connections_created"))
+    trace.on_connection_reuseconn.append(count("connections_reused"))
+    trace.on_connection_queued_start.append(count("pool_waits"))
+    trace.on_dns_cache_miss.append(count("dns_lookups"))
+    return trace
+
+
+async def _raise_if_throttled(response: aiohttp.ClientResponse) -> None:
+    if response.status in _THROTTLE_STATUSES:
+        response.raise_for_status()
+
+
+def _http_report(counters: Dict[str, Dict], spans: Dict[str, list], seconds: float) -> Dict:
+    """Per-source and total connection reuse plus wall-clock seconds for one fetch run."""
+    def summarize(entry: Dict, elapsed: float) -> Dict:
+        out = {key: entry.get(key, 0) for key in _HTTP_COUNTERS}
+        connections = out["connections_created"] + out["connections_reused"]
+        out["reuse_ratio"] = round(out["connections_reused"] / connections, 3) if connections else 0.0
+        out["seconds"] = round(elapsed, 3)
+        return out
+
+    by_source = {
+        source: summarize(counters.get(source, {}), end - start)
+        for source, (start, end) in spans.items()
+    }
+    totals = {key: sum(entry.get(key, 0) for entry in counters.values()) for key in _HTTP_COUNTERS}
+    return {"sources": by_source, "total": summarize(totals, seconds)}
+
 
 class JobAggregatorService:
+    # HTTP stats of the most recent fetch run, reported as `api_health` in /jobs/stats
+    last_run_http: Optional[Dict] = None
+
     def __init__(self):
         self.jobs_collection = get_jobs_collection()
-        self.timeout = aiohttp.ClientTimeout(total=settings.API_TIMEOUT)
-
-    async def fetch_all_jobs(self, keywords: str = "python", search_locations: Optional[List[str]] = None) -> Dict[str, int]:
+        # API_TIMEOUT caps each request end to end, so a server trickling bytes cannot hold a pooled connection
+        self.timeout = aiohttp.ClientTimeout(
+            total=settings.API_TIMEOUT, sock_connect=settings.API_TIMEOUT, sock_read=settings.API_TIMEOUT
+        )
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def fetch_all_jobs(
+        self,
+        keywords: str = "python",
+        search_locations: Optional[List[str]] = None,
+        sources: Optional[List[str]] = None,
+    ) -> Dict[str, int]:
+        """Fetch and store jobs from every API, or only from `sources`.
+
+        All requests of the run share one pooled HTTP session; `results["http"]`
+        reports connection reuse and wall-clock seconds per source. A targeted
+        re-sync of `sources` also rebuilds those sources' job index partitions
+        from MongoDB; the other partitions are left untouched. The job index
+        snapshot is published and the match cache invalidated once, at the end.
+        """
         if search_locations is None:
             search_locations = [l.strip() for l in settings.DEFAULT_SEARCH_LOCATIONS.split(",")]
 
         apis = self._api_configs()
+        if sources:
+            apis = {name: cfg for name, cfg in apis.items() if name in sources}
 
         results = {"total_jobs": 0, "by_source": {}, "errors": {}}
 
         tasks: list[asyncio.Task] = []
         task_sources: list[str] = []
-        for source, cfg in apis.items():
-            for location in search_locations:
-                tasks.append(asyncio.create_task(self._with_retries(cfg["handler"], keywords, location)))
-                task_sources.append(source)
-
-        responses = await asyncio.gather(*tasks, return_exceptions=True)
-
+        counters: Dict[str, Dict] = {}
+        spans: Dict[str, list] = {}
+        started = time.perf_counter()
+        async with self._http_session(counters):
+            for source, cfg in apis.items():
+                for location in search_locations:
+                    tasks.append(asyncio.create_task(
+                        self._timed_fetch(source, cfg["handler"], keywords, location, spans)
+                    ))
+                    task_sources.append(source)
+
+            responses = await asyncio.gather(*tasks, return_exceptions=True)
+        results["http"] = _http_report(counters, spans, time.perf_counter() - started)
+        JobAggregatorService.last_run_http = results["http"]
+
+        stored = 0
         for source, resp in zip(task_sources, responses):
             if isinstance(resp, Exception):
                 logger.error(f"{source} error: {resp}")
@@ -44,20 +127,99 @@ class JobAggregatorService:
                 results["by_source"][source] = results["by_source"].get(source, 0) + count
                 results["total_jobs"] += count
                 if count:
-                    await self._store_jobs(resp)
-
-        logger.info(f"Total jobs fetched: {results['total_jobs']}")
+                    stored += await self._store_jobs(resp)
+
+        rebuilt = []
+        if sources:
+            rebuilt = await self._rebuild_partitions([s for s in apis if s not in results["errors"]])
+        if stored or rebuilt:
+            await self._publish_changes()
+
+        total = results["http"]["total"]
+        logger.info(
+            f"Total jobs fetched: {results['total_jobs']} "
+            f"({total['requests']} requests, {total['connections_created']} connections opened, "
+            f"{total['connections_reused']} reused, {total['seconds']}s)"
+        )
         return results
 
-    async def _with_retries(self, handler, keywords: str, location: str, attempts: int = 3):
+    @asynccontextmanager
+    async def _http_session(self, counters: Dict[str, Dict]):
+        """Open the run's shared session: keep-alive, cached DNS and capped connections per host."""
+        connector = aiohttp.TCPConnector(
+            limit=settings.HTTP_POOL_SIZE,
+            limit_per_host=settings.HTTP_LIMIT_PER_HOST,
+            ttl_dns_cache=settings.HTTP_DNS_CACHE_SECONDS,
+            keepalive_timeout=settings.HTTP_KEEPALIVE_SECONDS,
+        )
+        async with aiohttp.ClientSession(
+            timeout=self.timeout,
+            connector=connector,
+            trace_configs=[_http_trace(counters)],
+            raise_for_status=_raise_if_throttled,
+        ) as session:
+            self._session = session
+            try:
+                yield session
+            finally:
+                self._session = None
+
+    @asynccontextmanager
+    async def _get(self, url: str, **kwargs):
+        """GET through the run's session once the calling source's rate limiter allows it."""
+        await get_rate_limiter(_fetch_source.get()).acquire()
+        async with self._session.get(url, **kwargs) as resp:
+            yield resp
+
+    async def _timed_fetch(self, source: str, handler, keywords: str, location: str, spans: Dict[str, list]):
+        _fetch_source.set(source)  # each task runs in its own context copy
+        start = time.perf_counter()
+        try:
+            return await self._with_retries(source, handler, keywords, location)
+        finally:
+            span = spans.setdefault(source, [start, start])
+            span[0] = min(span[0], start)
+            span[1] = max(span[1], time.perf_counter())
+
+    async def _rebuild_partitions(self, sources: List[str]) -> List[str]:
+        from .job_index import get_job_index
+        index = get_job_index()
+        if not sources or not index.loaded:
+            return []
+        for source in sources:
+            await asyncio.to_thread(index.rebuild_partition, source)
+        return sources
+
+    async def _publish_changes(self) -> None:
+        from .job_index import get_job_index
+        from .match_cache import get_match_cache
+        index = get_job_index()
+        if index.loaded:
+            # Let the other workers swap to the new rows without reloading from MongoDB
+            await asyncio.to_thread(index.publish_snapshot)
+        get_match_cache().invalidate()
+
+    async def _with_retries(self, source: str, handler, keywords: str, location: str, attempts: int = 3):
+        limiter = get_rate_limiter(source)
         delay = 1.0
         for i in range(attempts):
+            blocked = limiter.blocked_for()
+            if blocked > settings.RATE_LIMIT_MAX_WAIT_SECONDS:
+                logger.warning(f"{source} throttled for another {blocked:.0f}s, skipping {location}")
+                break
             try:
                 return await handler(keywords, location)
             except asyncio.TimeoutError:
                 logger.warning(f"Timeout calling {handler.__name__} (attempt {i+1})")
             except aiohttp.ClientResponseError as e:
-                if e.status in (429, 500, 502, 503):
+                if e.status in _THROTTLE_STATUSES:
+                    # Pause the whole source, not just this task; the limiter applies the wait
+                    retry_after = parse_retry_after(e.headers.get("Retry-After") if e.headers else None)
+                    limiter.block(delay if retry_after is None else retry_after)
+                    logger.warning(f"{handler.__name__} throttled ({e.status}), retrying in {limiter.blocked_for():.1f}s")
+                    delay *= 2
+                    continue
+                if e.status in (500, 502):
                     logger.warning(f"{handler.__name__} transient {e.status}, retrying...")
                 else:
                     logger.error(f"{handler.__name__} HTTP {e.status}: {e}")
@@ -88,29 +250,28 @@ class JobAggregatorService:
             return []
         auth = aiohttp.BasicAuth(key, "")
         params = {"keywords": keywords, "location": location, "resultsToTake": 100}
-        async with aiohttp.ClientSession(timeout=self.timeout) as session:
-            async with session.get("https://www.reed.co.uk/api/1.0/search", params=params, auth=auth) as resp:
-                if resp.status != 200:
-                    return []
-                data = await resp.json()
-                out = []
-                for job in data.get("results", []):
-                    out.append({
-                        "job_id": f"reed_{job.get('jobId')}",
-                        "job_title": job.get("jobTitle"),
-                        "company": job.get("employerName"),
-                        "description": job.get("jobDescription"),
-                        "location": job.get("locationName"),
-                        "country": "UK",
-                        "salary_min": _extract_salary_min(job.get("salary")),
-                        "salary_max": _extract_salary_max(job.get("salary")),
-                        "employment_type": "full_time",
-                        "url": job.get("jobUrl"),
-                        "posted_date": job.get("date"),
-                        "scraped_date": datetime.utcnow().isoformat(),
-                        "source": "reed",
-                    })
-                return out
+        async with self._get("https://www.reed.co.uk/api/1.0/search", params=params, auth=auth) as resp:
+            if resp.status != 200:
+                return []
+            data = await resp.json()
+            out = []
+            for job in data.get("results", []):
+                out.append({
+                    "job_id": f"reed_{job.get('jobId')}",
+                    "job_title": job.get("jobTitle"),
+                    "company": job.get("employerName"),
+                    "description": job.get("jobDescription"),
+                    "location": job.get("locationName"),
+                    "country": "UK",
+                    "salary_min": _extract_salary_min(job.get("salary")),
+                    "salary_max": _extract_salary_max(job.get("salary")),
+                    "employment_type": "full_time",
+                    "url": job.get("jobUrl"),
+                    "posted_date": job.get("date"),
+                    "scraped_date": datetime.utcnow().isoformat(),
+                    "source": "reed",
+                })
+            return out
 
     async def _fetch_usajobs(self, keywords: str, location: str) -> List[Dict]:
         key = settings.USAJOBS_API_KEY
@@ -118,59 +279,57 @@ class JobAggregatorService:
             return []
         headers = {"Authorization-Key": key, "User-Agent": settings.USAJOBS_USER_AGENT or "HR-Agent/1.0"}
         params = {"Keyword": keywords, "LocationName": location, "ResultsPerPage": 500}
-        async with aiohttp.ClientSession(timeout=self.timeout) as session:
-            async with session.get("https://data.usajobs.gov/api/search", params=params, headers=headers) as resp:
-                if resp.status != 200:
-                    return []
-                data = await resp.json()
-                out = []
-                for item in data.get("SearchResult", {}).get("SearchResultItems", []):
-                    job = item.get("MatchedObjectDescriptor", {})
-                    out.append({
-                        "job_id": f"usajobs_{job.get('PositionID')}",
-                        "job_title": job.get("PositionTitle"),
-                        "company": job.get("OrganizationName"),
-                        "description": job.get("JobDescription"),
-                        "location": ", ".join(job.get("LocationNames", [])),
-                        "country": "USA",
-                        "salary_min": None,
-                        "salary_max": None,
-                        "employment_type": "full_time",
-                        "url": job.get("PositionURI"),
-                        "posted_date": job.get("PublicationStartDate"),
-                        "scraped_date": datetime.utcnow().isoformat(),
-                        "source": "usajobs",
-                    })
-                return out
+        async with self._get("https://data.usajobs.gov/api/search", params=params, headers=headers) as resp:
+            if resp.status != 200:
+                return []
+            data = await resp.json()
+            out = []
+            for item in data.get("SearchResult", {}).get("SearchResultItems", []):
+                job = item.get("MatchedObjectDescriptor", {})
+                out.append({
+                    "job_id": f"usajobs_{job.get('PositionID')}",
+                    "job_title": job.get("PositionTitle"),
+                    "company": job.get("OrganizationName"),
+                    "description": job.get("JobDescription"),
+                    "location": ", ".join(job.get("LocationNames", [])),
+                    "country": "USA",
+                    "salary_min": None,
+                    "salary_max": None,
+                    "employment_type": "full_time",
+                    "url": job.get("PositionURI"),
+                    "posted_date": job.get("PublicationStartDate"),
+                    "scraped_date": datetime.utcnow().isoformat(),
+                    "source": "usajobs",
+                })
+            return out
 
     async def _fetch_arbeitnow_jobs(self, keywords: str, location: str) -> List[Dict]:
         key = settings.ARBEITNOW_API_KEY
         if not key:
             return []
         params = {"api_key": key, "search": keywords, "limit": 50}
-        async with aiohttp.ClientSession(timeout=self.timeout) as session:
-            async with session.get("https://www.arbeitnow.com/api/job-board-api", params=params) as resp:
-                if resp.status != 200:
-                    return []
-                data = await resp.json()
-                out = []
-                for job in data.get("data", []):
-                    out.append({
-                        "job_id": f"arbeitnow_{job.get('id')}",
-                        "job_title": job.get("title"),
-                        "company": job.get("company_name"),
-                        "description": job.get("description"),
-                        "location": job.get("location", "Remote"),
-                        "country": job.get("country"),
-                        "salary_min": job.get("salary_min"),
-                        "salary_max": job.get("salary_max"),
-                        "employment_type": job.get("employment_type", "full_time"),
-                        "url": job.get("url"),
-                        "posted_date": job.get("date_posted"),
-                        "scraped_date": datetime.utcnow().isoformat(),
-                        "source": "arbeitnow",
-                    })
-                return out
+        async with self._get("https://www.arbeitnow.com/api/job-board-api", params=params) as resp:
+            if resp.status != 200:
+                return []
+            data = await resp.json()
+            out = []
+            for job in data.get("data", []):
+                out.append({
+                    "job_id": f"arbeitnow_{job.get('id')}",
+                    "job_title": job.get("title"),
+                    "company": job.get("company_name"),
+                    "description": job.get("description"),
+                    "location": job.get("location", "Remote"),
+                    "country": job.get("country"),
+                    "salary_min": job.get("salary_min"),
+                    "salary_max": job.get("salary_max"),
+                    "employment_type": job.get("employment_type", "full_time"),
+                    "url": job.get("url"),
+                    "posted_date": job.get("date_posted"),
+                    "scraped_date": datetime.utcnow().isoformat(),
+                    "source": "arbeitnow",
+                })
+            return out
 
     async def _fetch_jsearch_jobs(self, keywords: str, location: str) -> List[Dict]:
         key = settings.JSEARCH_API_KEY
@@ -178,121 +337,117 @@ class JobAggregatorService:
             return []
         headers = {"X-RapidAPI-Key": key, "X-RapidAPI-Host": "jsearch.p.rapidapi.com"}
         params = {"query": keywords, "page": 1}
-        async with aiohttp.ClientSession(timeout=self.timeout) as session:
-            async with session.get("https://jsearch.p.rapidapi.com/search", params=params, headers=headers) as resp:
-                if resp.status != 200:
-                    return []
-                data = await resp.json()
-                out = []
-                for job in data.get("data", []):
-                    ts = job.get("job_posted_at_timestamp") or 0
-                    posted = datetime.utcfromtimestamp(int(ts)).isoformat() if ts else None
-                    out.append({
-                        "job_id": f"jsearch_{job.get('job_id')}",
-                        "job_title": job.get("job_title"),
-                        "company": job.get("employer_name"),
-                        "description": job.get("job_description"),
-                        "location": f"{job.get('job_city')}, {job.get('job_country')}",
-                        "country": job.get("job_country"),
-                        "salary_min": None,
-                        "salary_max": None,
-                        "employment_type": job.get("job_employment_type", "full_time"),
-                        "url": job.get("job_apply_link"),
-                        "posted_date": posted,
-                        "scraped_date": datetime.utcnow().isoformat(),
-                        "source": "jsearch",
-                    })
-                return out
+        async with self._get("https://jsearch.p.rapidapi.com/search", params=params, headers=headers) as resp:
+            if resp.status != 200:
+                return []
+            data = await resp.json()
+            out = []
+            for job in data.get("data", []):
+                ts = job.get("job_posted_at_timestamp") or 0
+                posted = datetime.utcfromtimestamp(int(ts)).isoformat() if ts else None
+                out.append({
+                    "job_id": f"jsearch_{job.get('job_id')}",
+                    "job_title": job.get("job_title"),
+                    "company": job.get("employer_name"),
+                    "description": job.get("job_description"),
+                    "location": f"{job.get('job_city')}, {job.get('job_country')}",
+                    "country": job.get("job_country"),
+                    "salary_min": None,
+                    "salary_max": None,
+                    "employment_type": job.get("job_employment_type", "full_time"),
+                    "url": job.get("job_apply_link"),
+                    "posted_date": posted,
+                    "scraped_date": datetime.utcnow().isoformat(),
+                    "source": "jsearch",
+                })
+            return out
 
     async def _fetch_apilayer_jobs(self, keywords: str, location: str) -> List[Dict]:
         key = settings.APILAYER_JOBS_KEY
         if not key:
             return []
         params = {"query": keywords, "apikey": key, "limit": 50}
-        async with aiohttp.ClientSession(timeout=self.timeout) as session:
-            async with session.get("https://api.apilayer.com/job_search/search", params=params) as resp:
-                if resp.status != 200:
-                    return []
-                data = await resp.json()
-                out = []
-                for job in data.get("data", []):
-                    out.append({
-                        "job_id": f"apilayer_{job.get('job_id')}",
-                        "job_title": job.get("job_title"),
-                        "company": job.get("employer_name"),
-                        "description": job.get("job_description"),
-                        "location": f"{job.get('job_city')}, {job.get('job_country')}",
-                        "country": job.get("job_country"),
-                        "salary_min": None,
-                        "salary_max": None,
-                        "employment_type": job.get("employment_type", "full_time"),
-                        "url": job.get("job_apply_link"),
-                        "posted_date": job.get("published_at"),
-                        "scraped_date": datetime.utcnow().isoformat(),
-                        "source": "apilayer",
-                    })
-                return out
+        async with self._get("https://api.apilayer.com/job_search/search", params=params) as resp:
+            if resp.status != 200:
+                return []
+            data = await resp.json()
+            out = []
+            for job in data.get("data", []):
+                out.append({
+                    "job_id": f"apilayer_{job.get('job_id')}",
+                    "job_title": job.get("job_title"),
+                    "company": job.get("employer_name"),
+                    "description": job.get("job_description"),
+                    "location": f"{job.get('job_city')}, {job.get('job_country')}",
+                    "country": job.get("job_country"),
+                    "salary_min": None,
+                    "salary_max": None,
+                    "employment_type": job.get("employment_type", "full_time"),
+                    "url": job.get("job_apply_link"),
+                    "posted_date": job.get("published_at"),
+                    "scraped_date": datetime.utcnow().isoformat(),
+                    "source": "apilayer",
+                })
+            return out
 
     async def _fetch_findwork_jobs(self, keywords: str, location: str) -> List[Dict]:
         key = settings.FINDWORK_API_KEY
         if not key:
             return []
         params = {"token": key, "search": keywords, "page_size": 50}
-        async with aiohttp.ClientSession(timeout=self.timeout) as session:
-            async with session.get("https://findwork.dev/api/jobs", params=params) as resp:
-                if resp.status != 200:
-                    return []
-                data = await resp.json()
-                out = []
-                for job in data.get("results", []):
-                    out.append({
-                        "job_id": f"findwork_{job.get('id')}",
-                        "job_title": job.get("title"),
-                        "company": job.get("company_name"),
-                        "description": job.get("description"),
-                        "location": job.get("location", "Remote"),
-                        "country": "Global",
-                        "salary_min": job.get("salary_min"),
-                        "salary_max": job.get("salary_max"),
-                        "employment_type": job.get("employment_type", "full_time"),
-                        "url": job.get("url"),
-                        "posted_date": job.get("posted_at"),
-                        "scraped_date": datetime.utcnow().isoformat(),
-                        "source": "findwork",
-                    })
-                return out
+        async with self._get("https://findwork.dev/api/jobs", params=params) as resp:
+            if resp.status != 200:
+                return []
+            data = await resp.json()
+            out = []
+            for job in data.get("results", []):
+                out.append({
+                    "job_id": f"findwork_{job.get('id')}",
+                    "job_title": job.get("title"),
+                    "company": job.get("company_name"),
+                    "description": job.get("description"),
+                    "location": job.get("location", "Remote"),
+                    "country": "Global",
+                    "salary_min": job.get("salary_min"),
+                    "salary_max": job.get("salary_max"),
+                    "employment_type": job.get("employment_type", "full_time"),
+                    "url": job.get("url"),
+                    "posted_date": job.get("posted_at"),
+                    "scraped_date": datetime.utcnow().isoformat(),
+                    "source": "findwork",
+                })
+            return out
 
     async def _fetch_themuse_jobs(self, keywords: str, location: str) -> List[Dict]:
         key = settings.THEMUSE_API_KEY
         if not key:
             return []
         params = {"api_key": key, "category": keywords}
-        async with aiohttp.ClientSession(timeout=self.timeout) as session:
-            async with session.get("https://www.themuse.com/api/public/jobs", params=params) as resp:
-                if resp.status != 200:
-                    return []
-                data = await resp.json()
-                out = []
-                for job in data.get("results", []):
-                    company = (job.get("company") or {}).get("name")
-                    locations = job.get("locations") or []
-                    location_str = (locations[0].get("name") if locations else "Remote") if isinstance(locations, list) else "Remote"
-                    out.append({
-                        "job_id": f"themuse_{job.get('id')}",
-                        "job_title": job.get("name"),
-                        "company": company,
-                        "description": job.get("description"),
-                        "location": location_str,
-                        "country": "Global",
-                        "salary_min": None,
-                        "salary_max": None,
-                        "employment_type": "full_time",
-                        "url": job.get("apply_url"),
-                        "posted_date": job.get("published_at"),
-                        "scraped_date": datetime.utcnow().isoformat(),
-                        "source": "themuse",
-                    })
-                return out
+        async with self._get("https://www.themuse.com/api/public/jobs", params=params) as resp:
+            if resp.status != 200:
+                return []
+            data = await resp.json()
+            out = []
+            for job in data.get("results", []):
+                company = (job.get("company") or {}).get("name")
+                locations = job.get("locations") or []
+                location_str = (locations[0].get("name") if locations else "Remote") if isinstance(locations, list) else "Remote"
+                out.append({
+                    "job_id": f"themuse_{job.get('id')}",
+                    "job_title": job.get("name"),
+                    "company": company,
+                    "description": job.get("description"),
+                    "location": location_str,
+                    "country": "Global",
+                    "salary_min": None,
+                    "salary_max": None,
+                    "employment_type": "full_time",
+                    "url": job.get("apply_url"),
+                    "posted_date": job.get("published_at"),
+                    "scraped_date": datetime.utcnow().isoformat(),
+                    "source": "themuse",
+                })
+            return out
 
     async def _fetch_adzuna_jobs(self, keywords: str, location: str) -> List[Dict]:
         app_id, app_key = settings.ADZUNA_APP_ID, settings.ADZUNA_APP_KEY
@@ -302,40 +457,64 @@ class JobAggregatorService:
         country_code = country_map.get(location, "us")
         base = f"https://api.adzuna.com/v1/api/jobs/{country_code}/search/1"
         params = {"app_id": app_id, "app_key": app_key, "what": keywords, "results_per_page": 50, "content-type": "json"}
-        async with aiohttp.ClientSession(timeout=self.timeout) as session:
-            async with session.get(base, params=params) as resp:
-                if resp.status != 200:
-                    return []
-                data = await resp.json()
-                out = []
-                for job in data.get("results", []):
-                    loc = (job.get("location") or {}).get("display_name")
-                    out.append({
-                        "job_id": f"adzuna_{job.get('id')}",
-                        "job_title": job.get("title"),
-                        "company": (job.get("company") or {}).get("display_name"),
-                        "description": job.get("description"),
-                        "location": loc,
-                        "country": location,
-                        "salary_min": job.get("salary_min"),
-                        "salary_max": job.get("salary_max"),
-                        "employment_type": job.get("contract_type", "full_time"),
-                        "url": job.get("redirect_url"),
-                        "posted_date": job.get("created"),
-                        "scraped_date": datetime.utcnow().isoformat(),
-                        "source": "adzuna",
-                    })
-                return out
+        async with self._get(base, params=params) as resp:
+            if resp.status != 200:
+                return []
+            data = await resp.json()
+            out = []
+            for job in data.get("results", []):
+                loc = (job.get("location") or {}).get("display_name")
+                out.append({
+                    "job_id": f"adzuna_{job.get('id')}",
+                    "job_title": job.get("title"),
+                    "company": (job.get("company") or {}).get("display_name"),
+                    "description": job.get("description"),
+                    "location": loc,
+                    "country": location,
+                    "salary_min": job.get("salary_min"),
+                    "salary_max": job.get("salary_max"),
+                    "employment_type": job.get("contract_type", "full_time"),
+                    "url": job.get("redirect_url"),
+                    "posted_date": job.get("created"),
+                    "scraped_date": datetime.utcnow().isoformat(),
+                    "source": "adzuna",
+                })
+            return out
 
     # === Storage & dedup ===
-    async def _store_jobs(self, jobs: List[Dict]) -> None:
-        from .embedding_engine import embed_text
+    async def _store_jobs(self, jobs: List[Dict]) -> int:
+        """Write `jobs` to MongoDB and the resident index; returns how many were stored.
+
+        Publishing the index snapshot is left to the end of the fetch run.
+        """
+        from .embedding_engine import embed_texts, embedding_fields, embedding_model_id
+        from .job_classifier import classify_job
+        from .job_index import get_job_index
+        from .skill_extractor import SKILL_VOCAB_VERSION
+        index = get_job_index()
+        # Vectors are tagged with the model version that made them, so pin it across the awaits below
+        model_id = embedding_model_id()
+        stored: List[Dict] = []
+        # Embed every job that will be inserted in one batched call up front; jobs
+        # already stored under their job_id are updated in place and keep their vector
+        known = {
+            d["job_id"]
+            for d in self.jobs_collection.find({"job_id": {"$in": [j["job_id"] for j in jobs]}}, {"_id": 0, "job_id": 1})
+        }
+        pending = [j for j in jobs if j["job_id"] not in known and "embedding" not in j]
+        if pending:
+            embs = await asyncio.to_thread(embed_texts, [job_embedding_text(j) for j in pending], "bulk", model_id)
+            for job, emb in zip(pending, embs):
+                job.update(embedding_fields(emb, model_id))
         # Deduplicate by job_id and by (title, company, location)
         for job in jobs:
+            # Classify once here so matching never has to regex the description
+            job.update(classify_job(job))
             # First try strict by job_id
             existing = self.jobs_collection.find_one({"job_id": job["job_id"]})
             if existing:
                 self.jobs_collection.update_one({"job_id": job["job_id"]}, {"$set": job})
+                stored.append(job)
                 continue
 
             # Then try fuzzy dedup by common key
@@ -366,17 +545,34 @@ class JobAggregatorService:
                     return sum(1 for k in keys if d.get(k) not in (None, ""))
 
                 winner = job if completeness(job) >= completeness(dup) else dup
+                if winner.get("skill_vocab") != SKILL_VOCAB_VERSION:
+                    winner.update(classify_job(winner))
                 # Generate embedding before storing
                 if "embedding" not in winner:
-                    text = f"{winner.get('job_title','')} {winner.get('company','')} {winner.get('description','')}"
-                    winner["embedding"] = await asyncio.to_thread(embed_text, text)
+                    emb = (await asyncio.to_thread(embed_texts, [job_embedding_text(winner)], "bulk", model_id))[0]
+                    winner.update(embedding_fields(emb, model_id))
                 self.jobs_collection.update_one({"_id": dup["_id"]}, {"$set": winner})
+                if dup.get("job_id"):
+                    index.rename(dup["job_id"], winner["job_id"])
+                stored.append(winner)
             else:
-                # Generate embedding before inserting
+                # Embedded above unless its job_id showed up twice in this batch
                 if "embedding" not in job:
-                    text = f"{job.get('job_title','')} {job.get('company','')} {job.get('description','')}"
-                    job["embedding"] = await asyncio.to_thread(embed_text, text)
+                    emb = (await asyncio.to_thread(embed_texts, [job_embedding_text(job)], "bulk", model_id))[0]
+                    job.update(embedding_fields(emb, model_id))
                 self.jobs_collection.insert_one(job)
+                stored.append(job)
+
+        # Keep the resident job index in step with what was just written (the index in
+        # service now: a model switch may have replaced it; it skips vectors of other versions)
+        index = get_job_index()
+        if stored and index.loaded:
+            index.upsert(stored)
+        return len(stored)
+
+
+def job_embedding_text(job: Dict) -> str:
+    return f"{job.get('job_title','')} {job.get('company','')} {job.get('description','')}"
 
 
 class AggregatorScheduler:
@@ -427,7 +623,10 @@ class AggregatorScheduler:
             "jobs_by_source": by_source,
             "last_sync": cls._last_sync,
             "next_sync": next_sync,
-            "api_health": {},
+            "api_health": {
+                "last_run": JobAggregatorService.last_run_http or {},
+                "rate_limits": rate_limit_stats(),
+            },
         }
 
     @staticmethod
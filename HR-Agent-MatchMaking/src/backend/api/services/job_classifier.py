@@ -0,0 +1,76 @@
+"""Keyword classification of jobs into a primary language and a broad category.
+
+Computed once when a job is stored (see `JobAggregatorService._store_jobs`) and
+persisted on the document as `language` / `category`, together with the job's
+skill bitset (`skill_bits` / `skill_vocab`, see `skill_extractor.skill_fields`).
+The categories mirror the groups in the frontend's `utils/jobCategories.ts`.
+"""
+import re
+from typing import Any, Dict, Optional
+
+from .skill_extractor import skill_fields
+
+LANGUAGE_PATTERNS = {
+    "python": r"\bpython\b",
+    "java": r"\bjava\b(?!script)",
+    "javascript": r"\b(javascript|js|node\.?js)\b",
+    "c#": r"\b(c#|csharp)\b",
+    "c++": r"\b(c\+\+|cpp)\b",
+    ".net": r"\.net",
+    "php": r"\bphp\b",
+    "ruby": r"\bruby\b",
+    "go": r"\bgo(lang)?\b",
+    "rust": r"\brust\b",
+    "typescript": r"\btypescript|ts\b",
+    "kotlin": r"\bkotlin\b",
+    "swift": r"\bswift\b",
+    "react": r"\breact\b",
+    "angular": r"\bangular\b",
+    "vue": r"\bvue\b",
+}
+
+# Checked in order against the job title; the first hit wins.
+CATEGORY_PATTERNS = {
+    "Data & AI": r"\b(data scien\w*|machine learning|ml|ai|data engineer|data analyst|mlops)\b",
+    "Mobile Development": r"\b(ios|android|react native|flutter|mobile)\b",
+    "Security": r"\b(security|cyber\w*|penetration|infosec)\b",
+    "Cloud & Infrastructure": r"\b(cloud|aws|azure|gcp|kubernetes|infrastructure)\b",
+    "Database & Backend": r"\b(database|dba|sql|mongodb|postgres\w*)\b",
+    "Web Development": r"\b(web|react|angular|vue(\.js)?|node(\.js)?|php)\b",
+    "Software Engineering": r"\b(software|full[ -]?stack|front[ -]?end|back[ -]?end|devops|site reliability|developer|engineer|programmer)\b",
+}
+
+OTHER_CATEGORY = "Other"
+
+_LANGUAGE_RES = {lang: re.compile(p) for lang, p in LANGUAGE_PATTERNS.items()}
+_CATEGORY_RES = {cat: re.compile(p) for cat, p in CATEGORY_PATTERNS.items()}
+
+
+def extract_primary_language(text: str) -> Optional[str]:
+    """Extract the primary programming language from job title/description."""
+    text_lower = (text or "").lower()
+    for lang, pattern in _LANGUAGE_RES.items():
+        if pattern.search(text_lower):
+            return lang
+    return None
+
+
+def categorize_job(title: str, description: str = "") -> str:
+    """Map a job to one of the frontend's job categories, by title then description."""
+    for text in (title, description):
+        text_lower = (text or "").lower()
+        for category, pattern in _CATEGORY_RES.items():
+            if pattern.search(text_lower):
+                return category
+    return OTHER_CATEGORY
+
+
+def classify_job(job: Dict) -> Dict[str, Any]:
+    """Fields to persist on a job document: `language`, `category` and the skill bitset."""
+    title = job.get("job_title") or ""
+    description = job.get("description") or ""
+    return {
+        "language": extract_primary_language(f"{title} {description}"),
+        "category": categorize_job(title, description),
+        **skill_fields(f"{title} {description}"),
+    }
@@ -0,0 +1,104 @@
+"""Normalization of the job attributes that matches can be filtered on.
+
+The job index keeps these as columns next to the vectors (see
+`JobIndex.filter_mask`); the APIs report them inconsistently ("UK" vs "GB",
+"FULLTIME" vs "full_time", dd/mm/yyyy vs ISO dates), so both the stored values and
+the requested ones go through the same normalizers.
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+# Filter keys understood by `JobIndex.filter_mask`
+FILTER_KEYS = ("country", "employment_type", "salary_min", "salary_max", "posted_within_days")
+
+_COUNTRY_ALIASES = {
+    "usa": "us",
+    "united states": "us",
+    "united states of america": "us",
+    "uk": "gb",
+    "united kingdom": "gb",
+    "great britain": "gb",
+    "england": "gb",
+    "germany": "de",
+    "deutschland": "de",
+    "canada": "ca",
+}
+
+_EMPLOYMENT_ALIASES = {
+    "fulltime": "full_time",
+    "full": "full_time",
+    "permanent": "full_time",
+    "parttime": "part_time",
+    "part": "part_time",
+    "contractor": "contract",
+    "temporary": "contract",
+    "temp": "contract",
+}
+
+_DATE_FORMATS = ("%d/%m/%Y", "%Y-%m-%d", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M:%S.%f")
+
+
+def normalize_country(value: Optional[str]) -> Optional[str]:
+    text = (value or "").strip().lower()
+    if not text:
+        return None
+    return _COUNTRY_ALIASES.get(text, text)
+
+
+def normalize_employment_type(value: Optional[str]) -> Optional[str]:
+    text = (value or "").strip().lower().replace("-", "_").replace(" ", "_")
+    if not text:
+        return None
+    return _EMPLOYMENT_ALIASES.get(text.replace("_", ""), text)
+
+
+def parse_posted_date(value: Any) -> Optional[float]:
+    """Posting time as a UTC epoch timestamp, or None if it cannot be parsed."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        dt = value
+    elif isinstance(value, (int, float)):
+        # Unix seconds or milliseconds
+        return float(value) / 1000.0 if value > 1e11 else float(value)
+    else:
+        text = str(value).strip()
+        if text.isdigit():
+            return parse_posted_date(int(text))
+        try:
+            dt = datetime.fromisoformat(text.replace("Z", "+00:00"))
+        except ValueError:
+            dt = None
+            for fmt in _DATE_FORMATS:
+                try:
+                    dt = datetime.strptime(text, fmt)
+                    break
+                except ValueError:
+                    continue
+            if dt is None:
+                return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def build_filters(
+    country: Optional[List[str]] = None,
+    employment_type: Optional[List[str]] = None,
+    salary_min: Optional[float] = None,
+    salary_max: Optional[float] = None,
+    posted_within_days: Optional[int] = None,
+) -> Optional[Dict[str, Any]]:
+    """The active attribute filters as a plain (cache-key friendly) dict, or None."""
+    filters: Dict[str, Any] = {}
+    if country:
+        filters["country"] = sorted({c for c in map(normalize_country, country) if c})
+    if employment_type:
+        filters["employment_type"] = sorted({e for e in map(normalize_employment_type, employment_type) if e})
+    if salary_min is not None:
+        filters["salary_min"] = float(salary_min)
+    if salary_max is not None:
+        filters["salary_max"] = float(salary_max)
+    if posted_within_days is not None:
+        filters["posted_within_days"] = int(posted_within_days)
+    return filters or None
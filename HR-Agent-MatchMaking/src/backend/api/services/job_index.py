@@ -0,0 +1,855 @@
+"""Process-resident job embedding index.
+
+Holds every job embedding pre-normalized in memory, plus a compact side table of the
+fields a match result needs, so that matching does not have to stream the jobs
+collection out of MongoDB on every request. Vectors are partitioned by job `source`:
+each partition is one contiguous matrix with its own ANN structure, so a
+`source_filter` match only touches its own partition and an unfiltered match merges
+the per-partition top-k. The matrices are float32 by default; `JOB_INDEX_DTYPE` can
+keep them as float16 or per-row scaled int8 and score directly on those arrays.
+
+With `JOB_SNAPSHOT_DIR` set, the index is also published as an on-disk snapshot
+(see `job_snapshot`) that every worker maps read-only and hot-swaps to when a newer
+one appears.
+
+Job titles and descriptions also feed a BM25 inverted index (see `lexical_index`)
+keyed by the same global rows, for hybrid lexical + semantic retrieval.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .ann_backend import make_backend, top_k_rows
+from .embedding_codec import EMBEDDING_FIELDS, decode_embedding, dequantize_rows, quantize_int8, quantized_dot
+from .job_classifier import classify_job
+from .job_filters import normalize_country, normalize_employment_type, parse_posted_date
+from .job_snapshot import open_snapshot, read_header, write_snapshot
+from .lexical_index import LexicalIndex
+from .skill_extractor import SKILL_VOCABULARY, SKILL_WORDS, skill_bits, stored_skill_bits
+from ..config.database import get_jobs_collection
+from ..config.settings import settings
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Fields kept next to each vector: everything a JobMatch needs, minus the description.
+META_FIELDS = (
+    "job_id",
+    "job_title",
+    "company",
+    "location",
+    "country",
+    "source",
+    "salary_min",
+    "salary_max",
+    "employment_type",
+    "posted_date",
+    "url",
+)
+
+UNKNOWN_SOURCE = "unknown"
+
+_INITIAL_CAPACITY = 1024
+
+# Per-row columns stored as `_<name>`: (dtype, fill value of an empty slot). Codes
+# index the vocabulary lists below; salaries and posting times are NaN when unknown.
+_COLUMNS = {
+    "source_codes": (np.int16, 0),
+    "language_codes": (np.int16, 0),
+    "category_codes": (np.int16, 0),
+    "country_codes": (np.int16, 0),
+    "employment_codes": (np.int16, 0),
+    "salary_min": (np.float32, np.nan),
+    "salary_max": (np.float32, np.nan),
+    "posted_at": (np.float64, np.nan),
+    "skill_bits": (np.uint64, 0),
+}
+
+# Trailing shape of the columns that hold more than one value per row
+_COLUMN_WIDTHS = {"skill_bits": (SKILL_WORDS,)}
+
+# Code vocabularies stored as `_<name>`; code 0 is reserved for "not known" except for sources
+_VOCABULARIES = ("sources", "languages", "categories", "countries", "employment_types")
+
+# (vectors, int8 scales or None, global rows) of one partition, as handed to scorers
+PartitionView = Tuple[np.ndarray, Optional[np.ndarray], np.ndarray]
+
+
+def _normalize(v: np.ndarray) -> np.ndarray:
+    norm = float(np.linalg.norm(v))
+    if norm == 0.0:
+        return v
+    return v / norm
+
+
+class _Partition:
+    """The vectors of one source: a contiguous block plus its own ANN backend.
+
+    Local row i holds the vector of global row `rows[i]`. Removing a row moves the
+    last row into its slot, so the block stays dense; the ANN structure is then
+    rebuilt on the next `reindex`.
+    """
+
+    def __init__(self, dim: int, dtype: np.dtype, capacity: int = _INITIAL_CAPACITY):
+        self.dim = dim
+        self.dtype = dtype
+        self.vectors = np.zeros((capacity, dim), dtype=dtype)
+        self.scales = np.ones(capacity, dtype=np.float32)
+        self.rows = np.full(capacity, -1, dtype=np.int64)
+        self.size = 0
+        self.ann = make_backend(dim)
+        self.stale = True
+
+    @classmethod
+    def mapped(cls, dim: int, dtype: np.dtype, vectors: np.ndarray, scales: Optional[np.ndarray], rows: np.ndarray) -> "_Partition":
+        """Wrap snapshot arrays without copying; the first write makes them private."""
+        part = cls.__new__(cls)
+        part.dim = dim
+        part.dtype = dtype
+        part.vectors = vectors
+        part.scales = scales if scales is not None else np.ones(len(rows), dtype=np.float32)
+        part.rows = np.asarray(rows, dtype=np.int64)
+        part.size = len(rows)
+        part.ann = make_backend(dim)
+        part.stale = True
+        return part
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def mapped_read_only(self) -> bool:
+        return not self.vectors.flags.writeable
+
+    def view(self) -> PartitionView:
+        n = self.size
+        return self.vectors[:n], (self.scales[:n] if self.dtype == np.int8 else None), self.rows[:n]
+
+    def append(self, row: int) -> int:
+        self._writable()
+        if self.size == self.vectors.shape[0]:
+            self._resize(self.vectors.shape[0] * 2)
+        local = self.size
+        self.rows[local] = row
+        self.size += 1
+        return local
+
+    def set_vector(self, local: int, vec: np.ndarray) -> None:
+        self._writable()
+        if self.dtype == np.int8:
+            self.vectors[local], self.scales[local] = quantize_int8(vec)
+        else:
+            self.vectors[local] = vec
+
+    def copy_vector(self, local: int, other: "_Partition", other_local: int) -> None:
+        self._writable()
+        self.vectors[local] = other.vectors[other_local]
+        self.scales[local] = other.scales[other_local]
+
+    def remove(self, local: int) -> Optional[int]:
+        """Drop a local row; returns the global row moved into its slot, if any."""
+        self._writable()
+        last = self.size - 1
+        moved = None
+        if local != last:
+            self.vectors[local] = self.vectors[last]
+            self.scales[local] = self.scales[last]
+            self.rows[local] = self.rows[last]
+            moved = int(self.rows[local])
+        self.rows[last] = -1
+        self.size -= 1
+        self.stale = True
+        return moved
+
+    def reindex(self, new_locals: Optional[List[int]] = None) -> None:
+        """Bring the ANN structure up to date after writes (or rebuild it)."""
+        vectors, scales, _ = self.view()
+        if self.stale or self.ann.needs_rebuild(self.size):
+            self.ann.build(vectors, scales)
+            self.stale = False
+        elif new_locals:
+            self.ann.add(np.asarray(new_locals, dtype=np.int64), vectors, scales)
+
+    @property
+    def uses_ann(self) -> bool:
+        return self.size >= settings.ANN_MIN_JOBS and not self.stale
+
+    def ann_search(self, query: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k (global rows, scores) from the ANN backend."""
+        vectors, scales, rows = self.view()
+        local, scores = self.ann.search(vectors, query, top_k, scales)
+        return rows[local], scores
+
+    def _writable(self) -> None:
+        if self.mapped_read_only:
+            self._resize(max(_INITIAL_CAPACITY, self.size * 2))
+
+    def _resize(self, capacity: int) -> None:
+        n = self.size
+        vectors = np.zeros((capacity, self.dim), dtype=self.dtype)
+        vectors[:n] = self.vectors[:n]
+        self.vectors = vectors
+        scales = np.ones(capacity, dtype=np.float32)
+        scales[:n] = self.scales[:n]
+        self.scales = scales
+        rows = np.full(capacity, -1, dtype=np.int64)
+        rows[:n] = self.rows[:n]
+        self.rows = rows
+
+
+class JobIndex:
+    """In-memory job vectors with incremental updates and a version counter.
+
+    Global rows are append-only: the metadata and label codes of a job keep their row
+    number for the life of the index, so rows handed out by `search` stay valid while
+    the aggregator keeps writing. Each row's vector lives in the partition of its
+    source at local position `_local[row]` (-1 once the job has been dropped).
+    """
+
+    def __init__(self, dim: int, model_id: Optional[str] = None):
+        self.dim = dim
+        # Embedding model version whose vectors are indexed (None: whatever is stored in `embedding`)
+        self.model_id = model_id
+        self.version = 0
+        self.loaded = False
+        self._lock = threading.RLock()
+        self._dtype = np.dtype(settings.JOB_INDEX_DTYPE)
+        self.snapshot_id: Optional[str] = None
+        self._snapshot_version = -1  # `version` at which the rows were exactly `snapshot_id`
+        self._snapshot_checked = 0.0
+        self._reset()
+
+    def __len__(self) -> int:
+        return sum(len(p) for p in self._partitions.values())
+
+    # === Loading & maintenance ===
+    def load(self, from_snapshot: bool = True) -> None:
+        """(Re)build the index from the published snapshot, else the jobs collection.
+
+        A MongoDB load publishes a fresh snapshot when `JOB_SNAPSHOT_DIR` is set.
+        """
+        if from_snapshot and settings.JOB_SNAPSHOT_DIR:
+            header = read_header(settings.JOB_SNAPSHOT_DIR)
+            if header is not None and self._open_snapshot(header):
+                return
+        coll = get_jobs_collection()
+        query = {"embedding": {"$exists": True, "$ne": []}}
+        with self._lock:
+            self._reset()
+            # Descriptions are streamed for the lexical index (and for classifying documents
+            # stored before ingest-time classification) but never kept in the metadata.
+            added = self._upsert_many(coll.find(query, self._projection()))
+            for part in self._partitions.values():
+                part.reindex()
+            self.version += 1
+            self.loaded = True
+        logger.info(f"Job index loaded: {added} jobs in {len(self._partitions)} source partitions (version {self.version})")
+        if settings.JOB_SNAPSHOT_DIR:
+            self.publish_snapshot()
+
+    def ensure_loaded(self) -> None:
+        if not self.loaded:
+            with self._lock:
+                if not self.loaded:
+                    self.load()
+                    return
+        self.sync_snapshot()
+
+    def rebuild_partition(self, source: str) -> int:
+        """Reload one source's partition from MongoDB, e.g. after that source re-synced.
+
+        Other partitions keep serving throughout. Jobs of this source that are no longer
+        in the collection are dropped from the index. Returns the partition's size.
+        """
+        if source == UNKNOWN_SOURCE:
+            source_query = {"$or": [{"source": {"$exists": False}}, {"source": None}, {"source": ""}]}
+        else:
+            source_query = {"source": source}
+        docs = list(get_jobs_collection().find({**source_query, "embedding": {"$exists": True, "$ne": []}}, self._projection()))
+        with self._lock:
+            code = _code(self._sources, source)
+            old = self._partitions.pop(code, None)
+            if old is not None:
+                self._local[old.rows[: old.size]] = -1
+            self._upsert_many(docs)
+            part = self._partitions.get(code)
+            if old is not None:
+                # Jobs that were in the old partition and did not come back
+                for row in old.rows[: old.size].tolist():
+                    if self._local[row] < 0:
+                        self._rows.pop(self._meta[row]["job_id"], None)
+                        self._lexical.remove(row)
+            if part is not None:
+                part.reindex()
+            self.version += 1
+        size = len(part) if part is not None else 0
+        logger.info(f"Rebuilt job index partition '{source}': {size} jobs (version {self.version})")
+        return size
+
+    def refresh(self, job_ids: List[str]) -> int:
+        """Re-read these jobs from MongoDB, e.g. after their vectors were rewritten."""
+        return self.upsert(get_jobs_collection().find({"job_id": {"$in": list(job_ids)}}, self._projection()))
+
+    def upsert(self, jobs: Iterable[Dict]) -> int:
+        """Insert or refresh jobs that were just written to MongoDB.
+
+        Jobs without a usable embedding only refresh the metadata of an existing row.
+        """
+        with self._lock:
+            vector_rows: List[int] = []
+            changed = self._upsert_many(jobs, vector_rows)
+            touched: Dict[int, List[int]] = {}
+            for row in vector_rows:
+                touched.setdefault(int(self._source_codes[row]), []).append(int(self._local[row]))
+            for code, part in self._partitions.items():
+                # Partitions rows moved out of are stale: rebuild them now rather than scanning them exactly
+                if code in touched or part.stale:
+                    part.reindex(touched.get(code))
+            if changed:
+                self.version += 1
+        return changed
+
+    def rename(self, old_job_id: str, new_job_id: str) -> None:
+        """Re-key a row after dedup replaced a stored job with a fresher duplicate."""
+        if old_job_id == new_job_id:
+            return
+        with self._lock:
+            row = self._rows.pop(old_job_id, None)
+            if row is None:
+                return
+            self._rows[new_job_id] = row
+            self._meta[row]["job_id"] = new_job_id
+            self.version += 1
+
+    @staticmethod
+    def _projection() -> Dict:
+        return {
+            "_id": 0,
+            **EMBEDDING_FIELDS,
+            "language": 1,
+            "category": 1,
+            "description": 1,
+            "skill_bits": 1,
+            "skill_vocab": 1,
+            **{f: 1 for f in META_FIELDS},
+        }
+
+    def _reset(self) -> None:
+        for name, (dtype, fill) in _COLUMNS.items():
+            setattr(self, f"_{name}", np.full((_INITIAL_CAPACITY, *_COLUMN_WIDTHS.get(name, ())), fill, dtype=dtype))
+        self._local = np.full(_INITIAL_CAPACITY, -1, dtype=np.int64)
+        self._size = 0
+        self._meta: List[Dict] = []
+        self._rows: Dict[str, int] = {}
+        self._sources: List[str] = []
+        self._languages: List[Optional[str]] = [None]
+        self._categories: List[Optional[str]] = [None]
+        self._countries: List[Optional[str]] = [None]
+        self._employment_types: List[Optional[str]] = [None]
+        self._partitions: Dict[int, _Partition] = {}
+        self._lexical = LexicalIndex()
+
+    def _upsert_many(self, jobs: Iterable[Dict], vector_rows: Optional[List[int]] = None) -> int:
+        changed = 0
+        for job in jobs:
+            job_id = job.get("job_id")
+            if not job_id:
+                continue
+            row = self._rows.get(job_id)
+            vec = decode_embedding(job, self.model_id)
+            if vec is not None:
+                if vec.shape != (self.dim,):
+                    logger.warning(f"Skipping job {job_id}: embedding has shape {vec.shape}, expected ({self.dim},)")
+                    vec = None
+            if vec is None and (row is None or self._local[row] < 0):
+                continue
+
+            meta = {f: job.get(f) for f in META_FIELDS}
+            if row is None:
+                row = self._append_row()
+                self._rows[job_id] = row
+                self._meta.append(meta)
+                self._language_codes[row] = 0
+                self._category_codes[row] = 0
+            else:
+                self._meta[row].update({k: v for k, v in meta.items() if k in job})
+                meta = self._meta[row]
+
+            moved = self._place(row, _code(self._sources, meta.get("source") or UNKNOWN_SOURCE))
+            if vec is not None:
+                part = self._partitions[int(self._source_codes[row])]
+                part.set_vector(int(self._local[row]), _normalize(vec))
+            # A row that moved partition is new to the target's ANN structure even without a new vector
+            if (vec is not None or moved) and vector_rows is not None:
+                vector_rows.append(row)
+            if "language" in job or "category" in job:
+                labels = job
+            elif "description" in job:
+                labels = classify_job(job)
+            else:
+                labels = None
+            if labels is not None:
+                self._language_codes[row] = _code(self._languages, labels.get("language"))
+                self._category_codes[row] = _code(self._categories, labels.get("category"))
+            bits = stored_skill_bits(labels if labels is not None else job)
+            if bits is None and "description" in job:
+                bits = skill_bits(f"{meta.get('job_title') or ''} {job.get('description') or ''}")
+            if bits is not None:
+                self._skill_bits[row] = np.frombuffer(bits.to_bytes(SKILL_WORDS * 8, "little"), dtype="<u8")
+            if "description" in job:
+                self._lexical.update(row, f"{meta.get('job_title') or ''} {job.get('description') or ''}")
+            self._set_attributes(row, meta)
+            changed += 1
+        return changed
+
+    def _set_attributes(self, row: int, meta: Dict) -> None:
+        """Refresh the filterable columns of a row from its metadata."""
+        self._country_codes[row] = _code(self._countries, normalize_country(meta.get("country")))
+        self._employment_codes[row] = _code(self._employment_types, normalize_employment_type(meta.get("employment_type")))
+        self._salary_min[row] = _as_float(meta.get("salary_min"))
+        self._salary_max[row] = _as_float(meta.get("salary_max"))
+        posted = parse_posted_date(meta.get("posted_date"))
+        self._posted_at[row] = np.nan if posted is None else posted
+
+    def _place(self, row: int, code: int) -> bool:
+        """Make sure `row` has a slot in partition `code`, moving its vector if the source changed.
+
+        Returns True if the row got a new slot; the partition it left is marked stale.
+        """
+        local = int(self._local[row])
+        current = int(self._source_codes[row])
+        if local >= 0 and current == code:
+            return False
+        part = self._partitions.get(code)
+        if part is None:
+            part = self._partitions[code] = _Partition(self.dim, self._dtype)
+        new_local = part.append(row)
+        if local >= 0:
+            old = self._partitions[current]
+            part.copy_vector(new_local, old, local)
+            moved = old.remove(local)
+            if moved is not None:
+                self._local[moved] = local
+        self._local[row] = new_local
+        self._source_codes[row] = code
+        return True
+
+    def _append_row(self) -> int:
+        if self._size == self._local.shape[0]:
+            capacity = max(_INITIAL_CAPACITY, self._local.shape[0] * 2)
+            for name, (_, fill) in _COLUMNS.items():
+                setattr(self, f"_{name}", _grown(getattr(self, f"_{name}"), capacity, self._size, fill))
+            self._local = _grown(self._local, capacity, self._size, fill=-1)
+        row = self._size
+        self._size += 1
+        return row
+
+    # === Shared snapshot ===
+    def publish_snapshot(self) -> Optional[Dict]:
+        """Write the current index to `JOB_SNAPSHOT_DIR` for other workers to map."""
+        if not settings.JOB_SNAPSHOT_DIR:
+            return None
+        with self._lock:
+            version = self.version
+            n = self._size
+            partitions = {
+                code: tuple(None if a is None else np.array(a) for a in part.view())
+                for code, part in self._partitions.items()
+            }
+            columns = {name: np.array(getattr(self, f"_{name}")[:n]) for name in _COLUMNS}
+            meta = [dict(m) for m in self._meta]
+            vocabularies = {name: list(getattr(self, f"_{name}")) for name in _VOCABULARIES}
+            vocabularies["skills"] = list(SKILL_VOCABULARY)
+            lexical = self._lexical.export()
+        try:
+            header = write_snapshot(
+                settings.JOB_SNAPSHOT_DIR, self.dim, self._dtype.name, partitions, columns, meta, vocabularies, lexical, self.model_id
+            )
+        except OSError as e:
+            logger.error(f"Failed to write job snapshot: {e}")
+            return None
+        # This process already holds the same rows, so it does not swap to its own snapshot
+        self.snapshot_id = header["snapshot_id"]
+        self._snapshot_version = version
+        return header
+
+    def cache_token(self) -> str:
+        """Identifies the indexed rows for match-cache keys.
+
+        The snapshot id while the rows are exactly that snapshot, so workers mapping it
+        share cached results; the local version once anything changed since.
+        """
+        with self._lock:
+            if self.snapshot_id and self._snapshot_version == self.version:
+                return self.snapshot_id
+            return f"v{self.version}"
+
+    def sync_snapshot(self, force: bool = False) -> bool:
+        """Hot-swap to a newer published snapshot; polls at most every `JOB_SNAPSHOT_POLL_SECONDS`."""
+        if not settings.JOB_SNAPSHOT_DIR:
+            return False
+        now = time.monotonic()
+        if not force and now - self._snapshot_checked < settings.JOB_SNAPSHOT_POLL_SECONDS:
+            return False
+        self._snapshot_checked = now
+        header = read_header(settings.JOB_SNAPSHOT_DIR)
+        if header is None or header["snapshot_id"] == self.snapshot_id:
+            return False
+        return self._open_snapshot(header)
+
+    def _open_snapshot(self, header: Dict) -> bool:
+        if header.get("dim") != self.dim or header.get("dtype") != self._dtype.name:
+            logger.warning(
+                f"Ignoring job snapshot {header.get('snapshot_id')}: {header.get('dim')}-dim {header.get('dtype')}, "
+                f"index is {self.dim}-dim {self._dtype.name}"
+            )
+            return False
+        snapshot_model = header.get("model_id") or settings.EMBED_LEGACY_MODEL
+        if self.model_id and snapshot_model != self.model_id:
+            logger.info(f"Ignoring job snapshot {header.get('snapshot_id')}: vectors of {snapshot_model}, index serves {self.model_id}")
+            return False
+        try:
+            snap = open_snapshot(settings.JOB_SNAPSHOT_DIR, header)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Failed to open job snapshot {header.get('snapshot_id')}: {e}")
+            return False
+        if snap["vocabularies"].get("skills") != list(SKILL_VOCABULARY):
+            logger.warning(f"Ignoring job snapshot {header.get('snapshot_id')}: built with another skill vocabulary")
+            return False
+        n = header["rows"]
+        local = np.full(n, -1, dtype=np.int64)
+        partitions: Dict[int, _Partition] = {}
+        for code, (vectors, scales, rows) in snap["partitions"].items():
+            part = _Partition.mapped(self.dim, self._dtype, vectors, scales, rows)
+            # ANN structures are built before taking the lock so searches keep running meanwhile
+            part.reindex()
+            partitions[code] = part
+            local[part.rows] = np.arange(len(part))
+        vocab = snap["vocabularies"]
+        lexical = LexicalIndex.from_arrays(*snap["lexical"])
+        with self._lock:
+            for name in _COLUMNS:
+                setattr(self, f"_{name}", snap["columns"][name])
+            for name in _VOCABULARIES:
+                setattr(self, f"_{name}", vocab[name])
+            self._local = local
+            self._size = n
+            self._meta = snap["meta"]
+            self._rows = {m["job_id"]: row for row, m in enumerate(self._meta) if local[row] >= 0}
+            self._partitions = partitions
+            self._lexical = lexical
+            self.snapshot_id = header["snapshot_id"]
+            self.version += 1
+            self._snapshot_version = self.version
+            self.loaded = True
+        logger.info(f"Job index mapped from snapshot {header['snapshot_id']}: {len(self)} jobs (version {self.version})")
+        return True
+
+    # === Querying ===
+    def filter_mask(self, filters: Optional[Dict]) -> Optional[np.ndarray]:
+        """Boolean mask over all rows for attribute filters (see `job_filters.build_filters`).
+
+        Country and employment type match any of the given values; salary filters
+        keep jobs whose advertised range reaches into the band; `posted_within_days`
+        keeps recent postings. Jobs missing a filtered attribute are excluded.
+        Returns None when no filter is active.
+        """
+        if not filters:
+            return None
+        with self._lock:
+            n = self._size
+            mask = np.ones(n, dtype=bool)
+            if filters.get("country"):
+                codes = [self._countries.index(c) for c in filters["country"] if c in self._countries]
+                mask &= np.isin(self._country_codes[:n], codes)
+            if filters.get("employment_type"):
+                codes = [self._employment_types.index(e) for e in filters["employment_type"] if e in self._employment_types]
+                mask &= np.isin(self._employment_codes[:n], codes)
+            lo, hi = self._salary_min[:n], self._salary_max[:n]
+            # NaN never compares true, so jobs without a salary drop out
+            if filters.get("salary_min") is not None:
+                mask &= np.where(np.isnan(hi), lo, hi) >= filters["salary_min"]
+            if filters.get("salary_max") is not None:
+                mask &= np.where(np.isnan(lo), hi, lo) <= filters["salary_max"]
+            if filters.get("posted_within_days") is not None:
+                mask &= self._posted_at[:n] >= time.time() - 86400.0 * filters["posted_within_days"]
+        return mask
+
+    def _views(self, source: Optional[str], mask: Optional[np.ndarray] = None) -> List[PartitionView]:
+        """Partition views to score: all of them, or just the one for `source`.
+
+        With a `mask`, each view is narrowed to its masked rows (a gathered copy).
+        """
+        with self._lock:
+            if source is None:
+                views = [p.view() for p in self._partitions.values()]
+            else:
+                code = self._sources.index(source) if source in self._sources else -1
+                part = self._partitions.get(code)
+                views = [part.view()] if part is not None else []
+        if mask is None:
+            return views
+        if not len(mask):
+            return []
+        narrowed = []
+        for vectors, scales, rows in views:
+            # Rows appended after the mask was built are not in it and are left out
+            keep = np.flatnonzero((rows < len(mask)) & mask[np.minimum(rows, len(mask) - 1)])
+            if len(keep):
+                narrowed.append((vectors[keep], scales[keep] if scales is not None else None, rows[keep]))
+        return narrowed
+
+    def scores(self, query: np.ndarray, source: Optional[str] = None, mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact cosine score of every job (optionally of one source / masked rows), unordered.
+
+        One matrix-vector product per partition; returns (rows, scores).
+        """
+        query = _normalize(np.asarray(query, dtype=np.float32))
+        views = self._views(source, mask)
+        if not views:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        rows = np.concatenate([r for _, _, r in views])
+        scores = np.concatenate([quantized_dot(v, query, s) for v, s, _ in views])
+        return rows, scores
+
+    def search(self, query: np.ndarray, top_k: int, source: Optional[str] = None, mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the top_k (rows, cosine scores), best first.
+
+        `query` need not be normalized. With a `source` only that partition is searched;
+        otherwise each partition's top_k is merged. A partition holding at least
+        `ANN_MIN_JOBS` jobs is searched through its ANN backend, smaller ones by an exact
+        scan with an argpartition top-k selection. A `mask` (see `filter_mask`) always
+        takes the exact path over just the masked rows.
+        """
+        query = _normalize(np.asarray(query, dtype=np.float32))
+        hits: List[Tuple[np.ndarray, np.ndarray]] = []
+        exact: List[PartitionView] = []
+        if mask is not None:
+            exact = self._views(source, mask)
+        else:
+            with self._lock:
+                if source is None:
+                    parts = list(self._partitions.values())
+                else:
+                    code = self._sources.index(source) if source in self._sources else -1
+                    parts = [self._partitions[code]] if code in self._partitions else []
+                for part in parts:
+                    if part.uses_ann:
+                        hits.append(part.ann_search(query, top_k))
+                    else:
+                        exact.append(part.view())
+        for vectors, scales, rows in exact:
+            scores = quantized_dot(vectors, query, scales)
+            top = top_k_rows(scores, top_k)
+            hits.append((rows[top], scores[top]))
+        if not hits:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        if len(hits) == 1:
+            return hits[0]
+        rows = np.concatenate([r for r, _ in hits])
+        scores = np.concatenate([s for _, s in hits])
+        top = top_k_rows(scores, top_k)
+        return rows[top], scores[top]
+
+    def lexical_search(
+        self, text: str, limit: int, source: Optional[str] = None, mask: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Top `limit` (rows, BM25 scores) for free text, best first.
+
+        Only the posting lists of the query's `HYBRID_QUERY_TERMS` rarest terms are
+        read, so jobs sharing no term with the text are never touched.
+        """
+        with self._lock:
+            terms = self._lexical.query_terms(text, settings.HYBRID_QUERY_TERMS)
+            rows, scores = self._lexical.bm25(terms)
+            keep = self._local[rows] >= 0
+            if source is not None:
+                code = self._sources.index(source) if source in self._sources else -1
+                keep &= self._source_codes[rows] == code
+        if mask is not None:
+            if len(mask):
+                keep &= (rows < len(mask)) & mask[np.minimum(rows, len(mask) - 1)]
+            else:
+                keep[:] = False
+        rows, scores = rows[keep], scores[keep]
+        top = top_k_rows(scores, limit)
+        return rows[top], scores[top]
+
+    def score_rows(self, query: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """Exact cosine scores of the given rows only."""
+        return self.vectors(rows) @ _normalize(np.asarray(query, dtype=np.float32))
+
+    def map_score_blocks(
+        self,
+        queries: np.ndarray,
+        fn: Callable[[np.ndarray, np.ndarray], List],
+        source: Optional[str] = None,
+        mask: Optional[np.ndarray] = None,
+    ) -> List:
+        """Score many queries at once and reduce each row of scores with `fn`.
+
+        The queries x jobs similarity matrix is computed as matrix-matrix products in
+        blocks of at most `MATCH_BATCH_BLOCK_MB`, spread over a thread pool (NumPy
+        releases the GIL), and never materialized whole. `fn(rows, scores)` gets one
+        query's job rows and scores and returns that query's result.
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        queries = queries / norms
+        views = self._views(source, mask)
+        rows = np.concatenate([r for _, _, r in views]) if views else np.empty(0, dtype=np.int64)
+
+        nq = queries.shape[0]
+        if nq == 0:
+            return []
+        workers = settings.MATCH_BATCH_WORKERS or os.cpu_count() or 1
+        per_block = max(1, (settings.MATCH_BATCH_BLOCK_MB * 1024 * 1024) // max(4 * len(rows), 1))
+        per_block = int(min(per_block, -(-nq // workers)))
+
+        def run(start: int) -> List:
+            q = queries[start:start + per_block].T
+            if views:
+                block = np.concatenate([quantized_dot(v, q, s) for v, s, _ in views]).T
+            else:
+                block = np.empty((q.shape[1], 0), dtype=np.float32)
+            return [fn(rows, block[i]) for i in range(block.shape[0])]
+
+        starts = range(0, nq, per_block)
+        if len(starts) == 1:
+            return run(0)
+        with ThreadPoolExecutor(max_workers=min(workers, len(starts))) as pool:
+            return [r for part in pool.map(run, starts) for r in part]
+
+    def search_batch(
+        self, queries: np.ndarray, top_k: int, source: Optional[str] = None, mask: Optional[np.ndarray] = None
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Exact top_k (rows, scores) for each query, via `map_score_blocks`."""
+        def pick(rows: np.ndarray, scores: np.ndarray):
+            top = top_k_rows(scores, top_k)
+            return rows[top], scores[top]
+
+        return self.map_score_blocks(queries, pick, source, mask)
+
+    def matrix(self) -> np.ndarray:
+        """All normalized job vectors as float32, partition after partition."""
+        views = self._views(None)
+        if not views:
+            return np.empty((0, self.dim), dtype=np.float32)
+        return np.concatenate([dequantize_rows(v, s) for v, s, _ in views])
+
+    def vectors(self, rows: np.ndarray) -> np.ndarray:
+        """Normalized float32 vectors of the given rows (a copy)."""
+        rows = np.asarray(rows, dtype=np.int64)
+        out = np.empty((len(rows), self.dim), dtype=np.float32)
+        with self._lock:
+            codes = self._source_codes[rows]
+            local = self._local[rows]
+            for code in np.unique(codes):
+                mask = codes == code
+                vectors, scales, _ = self._partitions[int(code)].view()
+                out[mask] = dequantize_rows(vectors, scales, local[mask])
+        return out
+
+    def row_of(self, job_id: str) -> Optional[int]:
+        """The row currently holding `job_id`, or None if the job is not indexed."""
+        with self._lock:
+            row = self._rows.get(job_id)
+            return row if row is not None and self._local[row] >= 0 else None
+
+    def job(self, row: int, score: float) -> Dict:
+        """Materialize a result dict for one row."""
+        out = dict(self._meta[row])
+        out["match_score"] = round(float(score) * 100.0, 2)
+        return out
+
+    def skill_words(self, rows: np.ndarray) -> np.ndarray:
+        """Skill bitsets of the given rows, as (len(rows), SKILL_WORDS) uint64 words."""
+        return self._skill_bits[rows]
+
+    def language_codes(self, rows: np.ndarray) -> np.ndarray:
+        return self._language_codes[rows]
+
+    def language_name(self, code: int) -> Optional[str]:
+        return self._languages[code]
+
+    def category_codes(self, rows: np.ndarray) -> np.ndarray:
+        return self._category_codes[rows]
+
+    def category_name(self, code: int) -> Optional[str]:
+        return self._categories[code]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            parts = {self._sources[code]: len(p) for code, p in self._partitions.items()}
+            mapped = any(p.mapped_read_only for p in self._partitions.values())
+            ann = {p.ann.name for p in self._partitions.values()} or {make_backend(self.dim).name}
+            lexical = self._lexical.stats()
+        jobs = sum(parts.values())
+        return {
+            "jobs": jobs,
+            "version": self.version,
+            "loaded": self.loaded,
+            "model_id": self.model_id,
+            "ann_backend": ann.pop(),
+            "dtype": self._dtype.name,
+            "matrix_bytes": int(jobs * self.dim * self._dtype.itemsize),
+            "partitions": parts,
+            "snapshot_id": self.snapshot_id,
+            "mapped": mapped,
+            "lexical": lexical,
+        }
+
+
+def _code(vocab: List, value) -> int:
+    try:
+        return vocab.index(value)
+    except ValueError:
+        vocab.append(value)
+        return len(vocab) - 1
+
+
+def _as_float(value) -> float:
+    try:
+        return float(value) if value is not None else np.nan
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _grown(arr: np.ndarray, capacity: int, size: int, fill=0) -> np.ndarray:
+    out = np.full((capacity, *arr.shape[1:]), fill, dtype=arr.dtype)
+    out[:size] = arr[:size]
+    return out
+
+
+_index: Optional[JobIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_job_index() -> JobIndex:
+    # Not lru_cache: an embedding model switch replaces the index (see set_job_index)
+    global _index
+    if _index is None:
+        from .embedding_engine import embedding_model_id
+
+        with _index_lock:
+            if _index is None:
+                _index = JobIndex(settings.EMBEDDING_DIM, embedding_model_id())
+    return _index
+
+
+def set_job_index(index: JobIndex) -> Optional[JobIndex]:
+    """Serve `index` from now on; returns the one it replaces.
+
+    Its version continues from the old index's, so match-cache generations keep moving forward.
+    """
+    global _index
+    with _index_lock:
+        old, _index = _index, index
+        if old is not None:
+            index.version = max(index.version, old.version) + 1
+    return old
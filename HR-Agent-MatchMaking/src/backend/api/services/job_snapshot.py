@@ -0,0 +1,148 @@
+"""On-disk snapshot of the job index, shared by every worker process.
+
+Layout under `JOB_SNAPSHOT_DIR`::
+
+    CURRENT                      version header (JSON) naming the live snapshot
+    snap-<id>/part-<c>.npy        one source partition's normalized vectors, in the
+                                  index dtype (opened with mmap)
+    snap-<id>/part-<c>.rows.npy   global row of each partition row
+    snap-<id>/part-<c>.scales.npy per-row int8 scales (int8 snapshots only)
+    snap-<id>/col-<name>.npy      one per-row column (label codes, salaries, posting time)
+    snap-<id>/lex-<name>.npy      lexical index posting lists in CSR form
+    snap-<id>/jobs.json           id table: per-row metadata, the code vocabularies and
+                                  the lexical index terms
+
+A snapshot directory is written under a temporary name and renamed into place,
+then `CURRENT` is replaced with `os.replace`, so readers only ever see a complete
+snapshot. Workers map the partition files read-only, which leaves a single page-cached
+copy of each partition however many workers there are.
+"""
+import json
+import os
+import shutil
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SNAPSHOT_FORMAT = 4
+HEADER_FILE = "CURRENT"
+_KEEP = 2  # the live snapshot plus the previous one, for workers still mapping it
+
+
+def read_header(directory: str) -> Optional[Dict]:
+    """The live snapshot's header, or None if no snapshot has been published."""
+    try:
+        with open(os.path.join(directory, HEADER_FILE), encoding="utf-8") as f:
+            header = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Unreadable job snapshot header in {directory}: {e}")
+        return None
+    if header.get("format") != SNAPSHOT_FORMAT:
+        logger.warning(f"Ignoring job snapshot with unsupported format {header.get('format')}")
+        return None
+    return header
+
+
+def write_snapshot(
+    directory: str,
+    dim: int,
+    dtype: str,
+    partitions: Dict[int, Tuple[np.ndarray, Optional[np.ndarray], np.ndarray]],
+    columns: Dict[str, np.ndarray],
+    meta: List[Dict],
+    vocabularies: Dict[str, List],
+    lexical: Tuple[List[str], Dict[str, np.ndarray]],
+    model_id: Optional[str] = None,
+) -> Dict:
+    """Publish a new snapshot atomically and return its header.
+
+    `partitions` maps a source code to that partition's (vectors, scales, rows);
+    `lexical` is `LexicalIndex.export()`; `model_id` is the embedding model version
+    of the vectors.
+    """
+    terms, lexical_arrays = lexical
+    os.makedirs(directory, exist_ok=True)
+    snapshot_id = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+    name = f"snap-{snapshot_id}"
+    tmp = os.path.join(directory, f".{name}.tmp")
+    os.makedirs(tmp)
+    try:
+        for code, (vectors, scales, rows) in partitions.items():
+            np.save(os.path.join(tmp, f"part-{code}.npy"), np.ascontiguousarray(vectors))
+            np.save(os.path.join(tmp, f"part-{code}.rows.npy"), np.ascontiguousarray(rows))
+            if scales is not None:
+                np.save(os.path.join(tmp, f"part-{code}.scales.npy"), np.ascontiguousarray(scales))
+        for column, values in columns.items():
+            np.save(os.path.join(tmp, f"col-{column}.npy"), np.ascontiguousarray(values))
+        for array, values in lexical_arrays.items():
+            np.save(os.path.join(tmp, f"lex-{array}.npy"), np.ascontiguousarray(values))
+        with open(os.path.join(tmp, "jobs.json"), "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "vocabularies": vocabularies, "terms": terms}, f, default=str)
+        os.replace(tmp, os.path.join(directory, name))
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    header = {
+        "format": SNAPSHOT_FORMAT,
+        "snapshot_id": snapshot_id,
+        "path": name,
+        "rows": len(meta),
+        "dim": dim,
+        "dtype": dtype,
+        "model_id": model_id,
+        "partitions": {str(code): int(len(p[2])) for code, p in partitions.items()},
+        "columns": sorted(columns),
+        "lexical": sorted(lexical_arrays),
+        "created_at": time.time(),
+    }
+    tmp_header = os.path.join(directory, f".{HEADER_FILE}.{snapshot_id}.tmp")
+    with open(tmp_header, "w", encoding="utf-8") as f:
+        json.dump(header, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_header, os.path.join(directory, HEADER_FILE))
+    _prune(directory)
+    logger.info(f"Job snapshot {snapshot_id} written: {len(partitions)} partitions ({header['dtype']})")
+    return header
+
+
+def open_snapshot(directory: str, header: Dict) -> Dict:
+    """Map a published snapshot.
+
+    Partition vectors are read-only memmaps; everything else is loaded into memory.
+    """
+    path = os.path.join(directory, header["path"])
+    with open(os.path.join(path, "jobs.json"), encoding="utf-8") as f:
+        table = json.load(f)
+    partitions = {}
+    for code in header["partitions"]:
+        base = os.path.join(path, f"part-{code}")
+        scales_path = f"{base}.scales.npy"
+        partitions[int(code)] = (
+            np.load(f"{base}.npy", mmap_mode="r"),
+            np.load(scales_path) if os.path.exists(scales_path) else None,
+            np.load(f"{base}.rows.npy"),
+        )
+    return {
+        "partitions": partitions,
+        "columns": {name: np.load(os.path.join(path, f"col-{name}.npy")) for name in header["columns"]},
+        "meta": table["meta"],
+        "vocabularies": table["vocabularies"],
+        "lexical": (table["terms"], {name: np.load(os.path.join(path, f"lex-{name}.npy")) for name in header["lexical"]}),
+    }
+
+
+def _prune(directory: str) -> None:
+    # Unlinking a mapped file is safe on POSIX: workers keep their pages until they swap
+    snapshots = sorted(d for d in os.listdir(directory) if d.startswith("snap-"))
+    for name in snapshots[:-_KEEP]:
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
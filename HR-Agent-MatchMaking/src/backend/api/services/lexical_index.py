@@ -0,0 +1,200 @@
+"""In-process inverted index over job text, scored with BM25.
+
+Complements the embedding index with exact keyword hits ("kubernetes", "c#",
+"node.js") that MiniLM similarity tends to blur. Postings are keyed by the job
+index's global row numbers, so lexical and semantic scores line up without any
+id translation. Each term's posting list is a growable pair of NumPy arrays (rows,
+term frequencies); a document's term ids are kept so an update can retract its old
+postings, and a content hash skips re-indexing jobs whose text did not change.
+"""
+import hashlib
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..config.settings import settings
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or our that the their this to "
+    "we will with you your who what when where which work working role team job jobs".split()
+)
+
+_INITIAL_POSTINGS = 8
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens, keeping tech spellings such as c++, c# and node.js."""
+    return [t for t in TOKEN_RE.findall((text or "").lower()) if t not in STOPWORDS and (len(t) > 1 or t in ("c", "r"))]
+
+
+def _content_hash(counts: Counter) -> int:
+    digest = hashlib.blake2b(repr(sorted(counts.items())).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True) or 1
+
+
+class LexicalIndex:
+    def __init__(self, k1: Optional[float] = None, b: Optional[float] = None):
+        self.k1 = settings.BM25_K1 if k1 is None else k1
+        self.b = settings.BM25_B if b is None else b
+        self._vocab: Dict[str, int] = {}
+        self._terms: List[str] = []
+        self._post_rows: List[np.ndarray] = []
+        self._post_tfs: List[np.ndarray] = []
+        self._post_size: List[int] = []
+        self._doc_terms: Dict[int, np.ndarray] = {}
+        self._doc_len = np.zeros(1024, dtype=np.float32)
+        self._doc_hash = np.zeros(1024, dtype=np.int64)
+        self._total_len = 0.0
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    # === Maintenance ===
+    def update(self, row: int, text: str) -> bool:
+        """(Re)index one document; returns False if its text is unchanged."""
+        counts = Counter(tokenize(text))
+        digest = _content_hash(counts)
+        self._ensure_rows(row + 1)
+        if self._doc_hash[row] == digest:
+            return False
+        self.remove(row)
+        ids = np.empty(len(counts), dtype=np.int32)
+        for i, (term, tf) in enumerate(counts.items()):
+            tid = self._vocab.get(term)
+            if tid is None:
+                tid = self._vocab[term] = len(self._terms)
+                self._terms.append(term)
+                self._post_rows.append(np.empty(_INITIAL_POSTINGS, dtype=np.int32))
+                self._post_tfs.append(np.empty(_INITIAL_POSTINGS, dtype=np.float32))
+                self._post_size.append(0)
+            self._append_posting(tid, row, tf)
+            ids[i] = tid
+        length = float(sum(counts.values()))
+        self._doc_terms[row] = ids
+        self._doc_len[row] = length
+        self._doc_hash[row] = digest
+        self._total_len += length
+        return True
+
+    def remove(self, row: int) -> None:
+        ids = self._doc_terms.pop(row, None)
+        if ids is None:
+            return
+        for tid in ids.tolist():
+            n = self._post_size[tid]
+            rows = self._post_rows[tid]
+            hit = np.flatnonzero(rows[:n] == row)
+            if len(hit):
+                # Swap-remove: posting order does not matter for scoring
+                i = int(hit[0])
+                rows[i] = rows[n - 1]
+                self._post_tfs[tid][i] = self._post_tfs[tid][n - 1]
+                self._post_size[tid] = n - 1
+        self._total_len -= float(self._doc_len[row])
+        self._doc_len[row] = 0.0
+        self._doc_hash[row] = 0
+
+    def _append_posting(self, tid: int, row: int, tf: int) -> None:
+        n = self._post_size[tid]
+        if n == len(self._post_rows[tid]):
+            capacity = max(_INITIAL_POSTINGS, 2 * n)
+            rows = np.empty(capacity, dtype=np.int32)
+            tfs = np.empty(capacity, dtype=np.float32)
+            rows[:n] = self._post_rows[tid][:n]
+            tfs[:n] = self._post_tfs[tid][:n]
+            self._post_rows[tid], self._post_tfs[tid] = rows, tfs
+        self._post_rows[tid][n] = row
+        self._post_tfs[tid][n] = tf
+        self._post_size[tid] = n + 1
+
+    def _ensure_rows(self, n: int) -> None:
+        if n > len(self._doc_len):
+            capacity = max(n, 2 * len(self._doc_len))
+            doc_len = np.zeros(capacity, dtype=np.float32)
+            doc_len[: len(self._doc_len)] = self._doc_len
+            doc_hash = np.zeros(capacity, dtype=np.int64)
+            doc_hash[: len(self._doc_hash)] = self._doc_hash
+            self._doc_len, self._doc_hash = doc_len, doc_hash
+
+    # === Querying ===
+    def query_terms(self, text: str, max_terms: int) -> List[int]:
+        """Ids of the query's indexed terms, rarest (highest IDF) first, at most `max_terms`."""
+        ids = {self._vocab[t] for t in set(tokenize(text)) if t in self._vocab}
+        ids = [tid for tid in ids if self._post_size[tid] > 0]
+        ids.sort(key=lambda tid: self._post_size[tid])
+        return ids[:max_terms]
+
+    def bm25(self, term_ids: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """BM25 score of every document containing at least one term: (rows, scores).
+
+        Only the terms' posting lists are read, so the cost is proportional to their
+        total length rather than to the corpus.
+        """
+        docs = len(self._doc_terms)
+        if not term_ids or not docs:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        avgdl = self._total_len / docs if self._total_len else 1.0
+        rows, weights = [], []
+        for tid in term_ids:
+            n = self._post_size[tid]
+            r = self._post_rows[tid][:n]
+            tf = self._post_tfs[tid][:n]
+            idf = math.log(1.0 + (docs - n + 0.5) / (n + 0.5))
+            norm = self.k1 * (1.0 - self.b + self.b * self._doc_len[r] / avgdl)
+            rows.append(r)
+            weights.append(idf * tf * (self.k1 + 1.0) / (tf + norm))
+        rows = np.concatenate(rows)
+        uniq, inverse = np.unique(rows, return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(weights)).astype(np.float32)
+        return uniq.astype(np.int64), scores
+
+    # === Snapshot support ===
+    def export(self) -> Tuple[List[str], Dict[str, np.ndarray]]:
+        """Vocabulary plus CSR posting arrays, for `job_snapshot`."""
+        sizes = np.asarray(self._post_size, dtype=np.int64)
+        indptr = np.zeros(len(sizes) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=indptr[1:])
+        n = len(self._doc_len)
+        arrays = {
+            "indptr": indptr,
+            "rows": np.concatenate([r[:s] for r, s in zip(self._post_rows, self._post_size)]) if len(sizes) else np.empty(0, dtype=np.int32),
+            "tfs": np.concatenate([t[:s] for t, s in zip(self._post_tfs, self._post_size)]) if len(sizes) else np.empty(0, dtype=np.float32),
+            "doc_len": self._doc_len[:n].copy(),
+            "doc_hash": self._doc_hash[:n].copy(),
+        }
+        return list(self._terms), arrays
+
+    @classmethod
+    def from_arrays(cls, terms: List[str], arrays: Dict[str, np.ndarray]) -> "LexicalIndex":
+        index = cls()
+        indptr, rows, tfs = arrays["indptr"], arrays["rows"], arrays["tfs"]
+        index._terms = list(terms)
+        index._vocab = {t: i for i, t in enumerate(terms)}
+        # Slices of the loaded arrays; a list that outgrows its slice gets its own buffer
+        index._post_rows = [rows[indptr[i]:indptr[i + 1]] for i in range(len(terms))]
+        index._post_tfs = [tfs[indptr[i]:indptr[i + 1]] for i in range(len(terms))]
+        index._post_size = np.diff(indptr).tolist()
+        index._doc_len = np.array(arrays["doc_len"], dtype=np.float32)
+        index._doc_hash = np.array(arrays["doc_hash"], dtype=np.int64)
+        index._total_len = float(index._doc_len.sum())
+        # Per-document term ids, by transposing the posting lists
+        term_of = np.repeat(np.arange(len(terms), dtype=np.int32), np.diff(indptr))
+        order = np.argsort(rows, kind="stable")
+        by_row = rows[order]
+        bounds = np.flatnonzero(np.diff(by_row)) + 1
+        for chunk_rows, chunk_terms in zip(np.split(by_row, bounds), np.split(term_of[order], bounds)):
+            if len(chunk_rows):
+                index._doc_terms[int(chunk_rows[0])] = chunk_terms
+        return index
+
+    def stats(self) -> Dict:
+        return {
+            "documents": len(self._doc_terms),
+            "terms": len(self._terms),
+            "postings": int(sum(self._post_size)),
+        }
@@ -0,0 +1,212 @@
+"""Match result cache keyed on (resume_id, match parameters, job-index generation).
+
+Uses Redis (`REDIS_URL`) when it is reachable and an in-process LRU otherwise. Both
+expire entries after `MATCH_CACHE_TTL` seconds. Redis evicts by its own
+`maxmemory-policy` (docker-compose runs it as `allkeys-lru`).
+
+Each key carries a generation made of the job index's `cache_token()` (its snapshot
+id, or its local version once it changed since), so any change to the rows a worker
+serves, including dedup renames and snapshot hot-swaps, moves it to new keys. With
+Redis it is prefixed by a shared counter bumped by `invalidate()`, which the
+aggregator calls at the end of every fetch run that stored jobs, so every worker also
+drops results from before the run.
+
+The same store also holds the rankings behind paginated matches (`put_ranking` /
+`get_ranking_page`): the ordered job ids and scores of one match, so later pages are
+sliced out of it instead of re-embedding and re-scoring the resume. A ranking is a
+frozen snapshot that lives for `MATCH_CURSOR_TTL` seconds whatever the generation
+does. In Redis it is a list with one entry per job, so a page is one `LRANGE`.
+"""
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config.settings import settings
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_GENERATION_KEY = "match:generation"
+_RANKING_PREFIX = "match:ranking:"
+
+
+class _LocalLRU:
+    """Thread-safe LRU with per-entry TTL."""
+
+    def __init__(self, max_entries: int, ttl: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class MatchCache:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._redis = None
+        self._local = _LocalLRU(settings.MATCH_CACHE_MAX_ENTRIES, settings.MATCH_CACHE_TTL)
+        if settings.MATCH_CACHE_ENABLED:
+            self._redis = self._connect()
+        # Rankings are kept even with the result cache disabled: pagination needs them
+        self._rankings = _LocalLRU(settings.MATCH_CACHE_MAX_ENTRIES, settings.MATCH_CURSOR_TTL)
+
+    @staticmethod
+    def _connect():
+        try:
+            import redis  # optional at runtime; falls back to the in-process LRU
+
+            client = redis.Redis.from_url(settings.REDIS_URL, socket_timeout=0.25, socket_connect_timeout=0.25)
+            client.ping()
+            logger.info("Match cache using Redis")
+            return client
+        except Exception as e:
+            logger.warning(f"Redis unavailable for match cache ({e}); using in-process LRU")
+            return None
+
+    @property
+    def backend(self) -> str:
+        if not settings.MATCH_CACHE_ENABLED:
+            return "disabled"
+        return "redis" if self._redis is not None else "local"
+
+    def generation(self) -> str:
+        from .job_index import get_job_index
+
+        index = get_job_index()
+        index.ensure_loaded()
+        token = index.cache_token()
+        if self._redis is not None:
+            try:
+                return f"{int(self._redis.get(_GENERATION_KEY) or 0)}.{token}"
+            except Exception:
+                self.errors += 1
+        return token
+
+    def make_key(self, resume_id: str, params: Dict[str, Any]) -> str:
+        digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()[:16]
+        return f"match:{resume_id}:{self.generation()}:{digest}"
+
+    def get(self, key: str) -> Optional[Any]:
+        if not settings.MATCH_CACHE_ENABLED:
+            return None
+        raw = None
+        if self._redis is not None:
+            try:
+                raw = self._redis.get(key)
+            except Exception:
+                self.errors += 1
+        else:
+            raw = self._local.get(key)
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key: str, value: Any) -> None:
+        if not settings.MATCH_CACHE_ENABLED:
+            return
+        raw = json.dumps(value, default=str)
+        if self._redis is not None:
+            try:
+                self._redis.set(key, raw, ex=settings.MATCH_CACHE_TTL)
+            except Exception:
+                self.errors += 1
+        else:
+            self._local.set(key, raw)
+
+    def put_ranking(self, job_ids: List[str], scores: List[float]) -> str:
+        """Store one match's ordering for `MATCH_CURSOR_TTL` seconds; returns its key."""
+        key = f"{_RANKING_PREFIX}{uuid.uuid4().hex}"
+        if self._redis is not None and job_ids:
+            try:
+                pipe = self._redis.pipeline()
+                pipe.rpush(key, *(json.dumps([job_id, score]) for job_id, score in zip(job_ids, scores)))
+                pipe.expire(key, settings.MATCH_CURSOR_TTL)
+                pipe.execute()
+                return key
+            except Exception:
+                self.errors += 1
+        self._rankings.set(key, (list(job_ids), list(scores)))
+        return key
+
+    def get_ranking_page(self, key: str, start: int, end: int) -> Optional[Tuple[List[str], List[float]]]:
+        """Job ids and scores at positions [start, end) of a stored ranking; None once it expired.
+
+        Only that slice is read (and decoded), however long the ranking is.
+        """
+        if not key.startswith(_RANKING_PREFIX) or end <= start:
+            return None
+        if self._redis is not None:
+            try:
+                entries = [json.loads(raw) for raw in self._redis.lrange(key, start, end - 1)]
+                if entries:
+                    return [e[0] for e in entries], [e[1] for e in entries]
+            except Exception:
+                self.errors += 1
+        stored = self._rankings.get(key)
+        if stored is None:
+            return None
+        job_ids, scores = stored
+        return job_ids[start:end], scores[start:end]
+
+    def invalidate(self) -> None:
+        """Start a new generation; called whenever new jobs are stored."""
+        if self._redis is not None:
+            try:
+                self._redis.incr(_GENERATION_KEY)
+            except Exception:
+                self.errors += 1
+        self._local.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "errors": self.errors,
+            "local_entries": len(self._local),
+            "local_rankings": len(self._rankings),
+            "generation": self.generation(),
+            "ttl_seconds": settings.MATCH_CACHE_TTL,
+        }
+
+
+@lru_cache
+def get_match_cache() -> MatchCache:
+    return MatchCache()
@@ -0,0 +1,99 @@
+"""Match reports: skill overlap between a resume and each returned job.
+
+A post-retrieval stage that runs on the returned page only. Job skills come from
+the bitsets the job index holds (extracted once at ingest), resume skills from the
+names stored at upload, so each report is a handful of bitwise operations on
+Python ints and no skill regex runs at request time.
+"""
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ..config.database import get_resumes_collection
+from .job_index import get_job_index
+from .skill_extractor import SKILL_GROUPS, extract_skills, skill_bits_from_names, skill_names
+
+# One mask per skill family: a resume skill is transferable when the job asks for
+# something else from the same family
+_GROUP_MASKS = [skill_bits_from_names(names) for names in SKILL_GROUPS.values()]
+
+_MAX_RECOMMENDED = 3
+
+
+@lru_cache(maxsize=4096)
+def resume_skill_bits(resume_id: str) -> int:
+    """Skill bitset of a stored resume (resumes are immutable once uploaded)."""
+    coll = get_resumes_collection()
+    doc = coll.find_one({"resume_id": resume_id}, {"_id": 0, "skills_extracted": 1})
+    if doc is None:
+        return 0
+    skills = doc.get("skills_extracted")
+    if not skills:
+        # Resumes stored before skill extraction
+        content = (coll.find_one({"resume_id": resume_id}, {"_id": 0, "content": 1}) or {}).get("content")
+        skills = extract_skills(content or "")
+    return skill_bits_from_names(name for names in skills.values() for name in names)
+
+
+def attach_reports(resume_bits: int, jobs: List[Dict]) -> List[Dict]:
+    """Copies of `jobs` with a `report` (see `match_schema.MatchReport`) on each."""
+    index = get_job_index()
+    rows = [index.row_of(j["job_id"]) for j in jobs]
+    known = [r for r in rows if r is not None]
+    words = index.skill_words(np.asarray(known, dtype=np.int64)) if known else None
+    out, i = [], 0
+    for job, row in zip(jobs, rows):
+        if row is None:
+            job_bits = 0
+        else:
+            job_bits = int.from_bytes(words[i].astype("<u8").tobytes(), "little")
+            i += 1
+        out.append({**job, "report": build_report(resume_bits, job_bits, job.get("match_score") or 0.0)})
+    return out
+
+
+def build_report(resume_bits: int, job_bits: int, match_score: float) -> Dict:
+    matched = job_bits & resume_bits
+    missing = job_bits & ~resume_bits
+    related = 0
+    for mask in _GROUP_MASKS:
+        if mask & job_bits:
+            related |= mask
+    transferable = resume_bits & ~job_bits & related
+
+    required = job_bits.bit_count()
+    coverage = matched.bit_count() / required if required else None
+    matched_names, missing_names, transferable_names = skill_names(matched), skill_names(missing), skill_names(transferable)
+    return {
+        "match_score": match_score,
+        "score_breakdown": {
+            "semantic_fit": f"{match_score:.1f}%",
+            "technical_alignment": f"{coverage * 100:.0f}% ({matched.bit_count()}/{required} skills)" if required else "n/a",
+            "candidate_readiness": _readiness(match_score, coverage),
+        },
+        "matched_skills": matched_names,
+        "missing_skills": missing_names,
+        "transferable_skills": transferable_names,
+        "recommendations": _recommendations(matched_names, missing_names, transferable_names),
+    }
+
+
+def _readiness(match_score: float, coverage: Optional[float]) -> str:
+    level = coverage if coverage is not None else match_score / 100.0
+    if level >= 0.7:
+        return "High"
+    if level >= 0.4:
+        return "Medium"
+    return "Low"
+
+
+def _recommendations(matched: List[str], missing: List[str], transferable: List[str]) -> List[str]:
+    tips = []
+    if matched:
+        tips.append(f"Lead with your {', '.join(matched[:_MAX_RECOMMENDED])} experience")
+    if missing:
+        tips.append(f"Build up or highlight: {', '.join(missing[:_MAX_RECOMMENDED])}")
+    if missing and transferable:
+        tips.append(f"Frame {', '.join(transferable[:_MAX_RECOMMENDED])} as transferable experience")
+    return tips
@@ -1,97 +1,269 @@
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import numpy as np
-import re
-from ..config.database import get_jobs_collection
-from .embedding_engine import embed_text
+from ..config.database import get_jobs_collection, get_resumes_collection
+from ..config.settings import settings
+from .ann_backend import top_k_rows
+from .embedding_codec import EMBEDDING_FIELDS, decode_embedding
+from .embedding_engine import embed_text, embed_texts
+from .job_index import get_job_index
+from .resume_index import get_resume_index
+from ..utils.logger import get_logger
 
+logger = get_logger(__name__)
 
-def cosine(a: np.ndarray, b: np.ndarray) -> float:
-    na = np.linalg.norm(a)
-    nb = np.linalg.norm(b)
-    if na == 0 or nb == 0:
-        return 0.0
-    return float(np.dot(a, b) / (na * nb))
 
-
-def _extract_primary_language(text: str) -> Optional[str]:
-    """Extract the primary programming language from job title/description."""
-    text_lower = text.lower()
-    
-    language_patterns = {
-        "python": r"\bpython\b",
-        "java": r"\bjava\b(?!script)",
-        "javascript": r"\b(javascript|js|node\.?js)\b",
-        "c#": r"\b(c#|csharp)\b",
-        "c++": r"\b(c\+\+|cpp)\b",
-        ".net": r"\.net",
-        "php": r"\bphp\b",
-        "ruby": r"\bruby\b",
-        "go": r"\bgo(lang)?\b",
-        "rust": r"\brust\b",
-        "typescript": r"\btypescript|ts\b",
-        "kotlin": r"\bkotlin\b",
-        "swift": r"\bswift\b",
-        "react": r"\breact\b",
-        "angular": r"\bangular\b",
-        "vue": r"\bvue\b",
-    }
-    
-    for lang, pattern in language_patterns.items():
-        if re.search(pattern, text_lower):
-            return lang
-    
-    return None
-
-
-def match_resume_to_jobs(resume_text: str, top_k: int = 50, source_filter: Optional[str] = None, diversity: bool = False) -> List[Dict]:
+def match_resume_to_jobs(
+    resume_text: str,
+    top_k: int = 50,
+    source_filter: Optional[str] = None,
+    diversity: bool = False,
+    diversity_mode: str = "language",
+    mmr_lambda: Optional[float] = None,
+    filters: Optional[Dict] = None,
+    retrieval: str = "semantic",
+    embedding: Optional[List[float]] = None,
+) -> List[Dict]:
     """
-    Match resume to jobs using cosine similarity on embeddings.
+    Match resume to jobs using cosine similarity against the resident job index.
     
     Args:
         resume_text: The resume text to match
         top_k: Number of top matches to return
         source_filter: Filter by job source (e.g., 'reed', 'all')
-        diversity: If True, actively distribute results across programming languages
+        diversity: If True, diversify the results using `diversity_mode`
+        diversity_mode: 'language' interleaves programming languages; 'mmr' applies
+            Maximal Marginal Relevance over the top `MMR_CANDIDATES` job vectors
+        mmr_lambda: MMR relevance/novelty trade-off (defaults to `MMR_LAMBDA`)
+        filters: Attribute filters from `job_filters.build_filters` (country,
+            employment type, salary band, posting age); only matching jobs are scored
+        retrieval: 'semantic' scores jobs by embedding similarity alone; 'hybrid'
+            draws candidates from the lexical index and fuses BM25 with cosine
+            similarity (see `_hybrid_scores`), falling back to 'semantic' when the
+            resume shares no term with any job
+        embedding: The resume's embedding, if the caller already computed it
     """
-    q = embed_text(resume_text)
+    q = embed_text(resume_text) if embedding is None else embedding
     qv = np.array(q, dtype=np.float32)
-    coll = get_jobs_collection()
-
-    query = {"embedding": {"$exists": True}}
-    if source_filter and source_filter != "all":
-        query["source"] = source_filter
-
-    jobs = list(coll.find(query, {"_id": 0}))
-    scored = []
-    for j in jobs:
-        ev = np.array(j.get("embedding") or [], dtype=np.float32)
-        score = cosine(qv, ev)
-        j_copy = dict(j)
-        j_copy["match_score"] = round(score * 100.0, 2)
-        j_copy["_language"] = _extract_primary_language(
-            f"{j.get('job_title', '')} {j.get('description', '')}"
-        )
-        scored.append(j_copy)
-
-    scored.sort(key=lambda x: x["match_score"], reverse=True)
-    
-    if not diversity or len(scored) <= top_k:
-        # Return top_k by score
-        for job in scored[:top_k]:
-            job.pop("_language", None)
-        return scored[:top_k]
-    
+    index = get_job_index()
+    index.ensure_loaded()
+    if qv.shape != (index.dim,):
+        logger.warning(f"Resume embedding has shape {qv.shape}, expected ({index.dim},); no matches")
+        return []
+
+    source = source_filter if source_filter and source_filter != "all" else None
+    mask = index.filter_mask(filters)
+    if retrieval == "hybrid":
+        hybrid = _hybrid_scores(index, resume_text, qv, source, mask)
+        if hybrid is not None:
+            rows, scores = hybrid
+            return [index.job(r, s) for r, s in _pick(index, rows, scores, top_k, diversity, diversity_mode, mmr_lambda)]
+
+    if not diversity:
+        rows, scores = index.search(qv, top_k=top_k, source=source, mask=mask)
+        return [index.job(r, s) for r, s in zip(rows, scores)]
+
+    if diversity_mode == "mmr":
+        # Candidates can come from the ANN backend: cost does not grow with the corpus
+        rows, scores = index.search(qv, top_k=max(settings.MMR_CANDIDATES, top_k), source=source, mask=mask)
+        return [index.job(r, s) for r, s in _mmr_top_k(index, rows, scores, top_k, mmr_lambda)]
+
+    rows, scores = index.scores(qv, source=source, mask=mask)
+    return [index.job(r, s) for r, s in _diverse_top_k(index, rows, scores, top_k)]
+
+
+def match_resumes_to_jobs(
+    resume_ids: List[str],
+    top_k: int = 50,
+    source_filter: Optional[str] = None,
+    diversity: bool = False,
+    diversity_mode: str = "language",
+    mmr_lambda: Optional[float] = None,
+    filters: Optional[Dict] = None,
+    retrieval: str = "semantic",
+) -> Dict[str, List[Dict]]:
+    """
+    Match many stored resumes against the job index in one pass.
+
+    Resume vectors are stacked into a matrix and scored against all jobs with blocked
+    matrix-matrix products (see `JobIndex.map_score_blocks`). Stored resume embeddings
+    are reused; resumes without one are embedded from their content. Hybrid
+    retrieval ranks each resume separately over its own lexical candidates.
+
+    Returns a dict of resume_id -> top matches; unknown ids are left out.
+    """
+    index = get_job_index()
+    index.ensure_loaded()
+
+    ids, texts, vectors = [], [], []
+    coll = get_resumes_collection()
+    docs = list(coll.find({"resume_id": {"$in": list(resume_ids)}}, {"_id": 0, "resume_id": 1, "content": 1, **EMBEDDING_FIELDS}))
+    stored = [decode_embedding(doc, index.model_id) for doc in docs]
+    # Resumes without a stored embedding are embedded together in one batch
+    missing = [i for i, vec in enumerate(stored) if vec is None]
+    for i, emb in zip(missing, embed_texts([docs[i].get("content") or "" for i in missing])):
+        stored[i] = np.asarray(emb, dtype=np.float32)
+    for doc, vec in zip(docs, stored):
+        if vec.shape != (index.dim,):
+            logger.warning(f"Resume {doc['resume_id']} has no usable embedding; skipping")
+            continue
+        ids.append(doc["resume_id"])
+        texts.append(doc.get("content") or "")
+        vectors.append(vec)
+    if not ids:
+        return {}
+
+    source = source_filter if source_filter and source_filter != "all" else None
+    mask = index.filter_mask(filters)
+    if retrieval == "hybrid":
+        picked = []
+        for text, vec in zip(texts, vectors):
+            rows, scores = _hybrid_scores(index, text, vec, source, mask) or index.scores(vec, source=source, mask=mask)
+            picked.append(_pick(index, rows, scores, top_k, diversity, diversity_mode, mmr_lambda))
+    elif not diversity:
+        picked = [list(zip(rows, scores)) for rows, scores in index.search_batch(np.stack(vectors), top_k, source, mask)]
+    elif diversity_mode == "mmr":
+        n_candidates = max(settings.MMR_CANDIDATES, top_k)
+        picked = [
+            _mmr_top_k(index, rows, scores, top_k, mmr_lambda)
+            for rows, scores in index.search_batch(np.stack(vectors), n_candidates, source, mask)
+        ]
+    else:
+        picked = index.map_score_blocks(np.stack(vectors), lambda rows, scores: _diverse_top_k(index, rows, scores, top_k), source, mask)
+    return {rid: [index.job(r, s) for r, s in winners] for rid, winners in zip(ids, picked)}
+
+
+def ranked_jobs(job_ids: List[str], match_scores: List[float]) -> List[Dict]:
+    """
+    Result dicts for one page of a stored ranking (see `MatchCache.put_ranking`).
+
+    Only the page's jobs are looked up; nothing is embedded or scored. Jobs dropped
+    from the index since the ranking was stored are left out.
+    """
+    index = get_job_index()
+    index.ensure_loaded()
+    out = []
+    for job_id, score in zip(job_ids, match_scores):
+        row = index.row_of(job_id)
+        if row is None:
+            continue
+        job = index.job(row, 0.0)
+        job["match_score"] = score
+        out.append(job)
+    return out
+
+
+def match_job_to_resumes(job_id: str, top_k: int = 50) -> Optional[Tuple[Dict, List[Dict]]]:
+    """
+    Rank stored resumes against one job (reverse matching).
+
+    Uses the job's stored embedding (embedding its text if it has none) and one
+    scoring pass over the resident resume index.
+
+    Returns (job fields, top candidates), or None if the job does not exist.
+    """
+    job = get_jobs_collection().find_one(
+        {"job_id": job_id},
+        {"_id": 0, "job_id": 1, "job_title": 1, "company": 1, "description": 1, **EMBEDDING_FIELDS},
+    )
+    if not job:
+        return None
+    index = get_resume_index()
+    index.ensure_loaded()
+    vec = decode_embedding(job, index.model_id)
+    if vec is None:
+        vec = np.asarray(embed_text(f"{job.get('job_title','')} {job.get('company','')} {job.get('description','')}"), dtype=np.float32)
+    info = {"job_id": job["job_id"], "job_title": job.get("job_title")}
+    if vec.shape != (index.dim,):
+        logger.warning(f"Job {job_id} embedding has shape {vec.shape}, expected ({index.dim},); no candidates")
+        return info, []
+    rows, scores = index.search(vec, top_k)
+    return info, [index.candidate(r, s) for r, s in zip(rows, scores)]
+
+
+def _hybrid_scores(
+    index, text: str, qv: np.ndarray, source: Optional[str], mask: Optional[np.ndarray]
+) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """Lexical candidates with fused scores, or None if no job shares a term with `text`.
+
+    The top `HYBRID_CANDIDATES` jobs by BM25 (read from the inverted index's posting
+    lists only) are re-scored by cosine similarity, and the two are fused as
+    `HYBRID_ALPHA * cosine + (1 - HYBRID_ALPHA) * bm25 / max(bm25)`.
+    """
+    rows, lexical = index.lexical_search(text, settings.HYBRID_CANDIDATES, source, mask)
+    if not len(rows):
+        return None
+    semantic = index.score_rows(qv, rows)
+    alpha = settings.HYBRID_ALPHA
+    fused = alpha * semantic + (1.0 - alpha) * (lexical / max(float(lexical[0]), 1e-9))
+    return rows, fused.astype(np.float32)
+
+
+def _pick(
+    index, rows: np.ndarray, scores: np.ndarray, top_k: int, diversity: bool, diversity_mode: str, mmr_lambda: Optional[float]
+) -> List[Tuple[int, float]]:
+    """Final top_k (row, score) pairs out of an already-scored candidate set."""
+    if not diversity:
+        top = top_k_rows(scores, top_k)
+        return list(zip(rows[top], scores[top]))
+    if diversity_mode == "mmr":
+        top = top_k_rows(scores, max(settings.MMR_CANDIDATES, top_k))
+        return _mmr_top_k(index, rows[top], scores[top], top_k, mmr_lambda)
+    return _diverse_top_k(index, rows, scores, top_k)
+
+
+def _mmr_top_k(index, rows: np.ndarray, scores: np.ndarray, top_k: int, mmr_lambda: Optional[float] = None) -> List[Tuple[int, float]]:
+    """Greedy Maximal Marginal Relevance over already-ranked candidates.
+
+    Each step picks argmax(lambda * relevance - (1 - lambda) * max similarity to the
+    jobs picked so far), updating the max-similarity vector with one matrix-vector
+    product, so the cost is O(N * k * dim) for N candidates.
+    """
+    lam = settings.MMR_LAMBDA if mmr_lambda is None else mmr_lambda
+    n = len(rows)
+    if n <= 1 or lam >= 1.0:
+        return list(zip(rows[:top_k], scores[:top_k]))
+
+    vectors = index.vectors(rows)
+    relevance = scores.astype(np.float32)
+    max_sim = np.full(n, -np.inf, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    picked: List[Tuple[int, float]] = []
+    for _ in range(min(top_k, n)):
+        penalty = np.where(np.isfinite(max_sim), max_sim, 0.0)
+        mmr = lam * relevance - (1.0 - lam) * penalty
+        mmr[~available] = -np.inf
+        best = int(np.argmax(mmr))
+        picked.append((rows[best], scores[best]))
+        available[best] = False
+        np.maximum(max_sim, vectors @ vectors[best], out=max_sim)
+    return picked
+
+
+def _diverse_top_k(index, rows: np.ndarray, scores: np.ndarray, top_k: int) -> List[Tuple[int, float]]:
+    """Pick top_k (row, score) pairs, interleaving programming languages."""
+    if len(rows) <= top_k:
+        top = top_k_rows(scores, top_k)
+        return list(zip(rows[top], scores[top]))
+
     # Aggressive diversity mode: distribute results across different languages
-    # Group jobs by language and interleave them to ensure variety
-    language_groups = {}
-    for job in scored:
-        lang = job.get("_language") or "other"
-        if lang not in language_groups:
-            language_groups[lang] = []
-        language_groups[lang].append(job)
+    # Group jobs by language and interleave them to ensure variety. No group can
+    # contribute more than top_k jobs, so each group only needs its own top_k.
+    codes = index.language_codes(rows)
+    counts = np.bincount(codes)
+    language_groups = []
+    for code in np.flatnonzero(counts):
+        members = np.flatnonzero(codes == code)
+        best = members[top_k_rows(scores[members], top_k)]
+        lang = index.language_name(int(code)) or "other"
+        language_groups.append((lang, int(counts[code]), list(zip(rows[best], scores[best]))))
+    # Groups are met in order of their best job, as when walking the full ranking
+    language_groups.sort(key=lambda g: g[2][0][1], reverse=True)
     
     # Sort groups by size (biggest first) to ensure all languages represented
-    sorted_langs = sorted(language_groups.items(), key=lambda x: len(x[1]), reverse=True)
+    sorted_langs = [
+        (lang, jobs_in_lang)
+        for lang, _, jobs_in_lang in sorted(language_groups, key=lambda g: g[1], reverse=True)
+    ]
     
     # Interleave jobs from different language groups
     result = []
@@ -123,8 +295,4 @@ def match_resume_to_jobs(resume_text: str, top_k: int = 50, source_filter: Optio
                     result.append(jobs_in_lang[idx])
             break
     
-    # Remove the helper field before returning
-    for job in result:
-        job.pop("_language", None)
-    
     return result[:top_k]
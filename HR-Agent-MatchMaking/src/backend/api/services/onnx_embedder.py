@@ -0,0 +1,156 @@
+"""ONNX Runtime embedding backend (`EMBED_BACKEND=onnx`).
+
+`export_onnx` turns a SentenceTransformer model into a transformer graph
+(`model.onnx`), an optional dynamically int8-quantized copy (`model-int8.onnx`), the
+fast-tokenizer files and an `embedder.json` with the pooling settings. Exporting
+needs torch and sentence-transformers; serving with `OnnxEmbedder` only needs
+`onnxruntime` and `tokenizers`, so CPU images can leave PyTorch out.
+"""
+import inspect
+import json
+import os
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+CONFIG_FILE = "embedder.json"
+
+
+def onnx_model_file(model_dir: str, quantize: bool) -> str:
+    return os.path.join(model_dir, "model-int8.onnx" if quantize else "model.onnx")
+
+
+def read_config(model_dir: str) -> Optional[Dict]:
+    try:
+        with open(os.path.join(model_dir, CONFIG_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def export_onnx(model_name: str, model_dir: str, quantize: bool = True) -> str:
+    """Export `model_name` to `model_dir`; returns the path of the graph to serve."""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    st = SentenceTransformer(model_name, device="cpu")
+    transformer, pooling = st[0], st[1]
+    tokenizer = transformer.tokenizer
+    os.makedirs(model_dir, exist_ok=True)
+    tokenizer.save_pretrained(model_dir)
+
+    dummy = tokenizer(["an export sample", "a second, longer export sample"], padding=True, return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in dummy]
+
+    class _Encoder(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(input_names, inputs))).last_hidden_state
+
+    axes = {name: {0: "batch", 1: "sequence"} for name in input_names + ["last_hidden_state"]}
+    fp32_path = onnx_model_file(model_dir, False)
+    with torch.no_grad():
+        torch.onnx.export(
+            _Encoder(transformer.auto_model.eval()),
+            tuple(dummy[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=axes,
+            opset_version=17,
+            # Newer torch defaults to the dynamo exporter; the TorchScript one handles dynamic_axes
+            **({"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}),
+        )
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(fp32_path, onnx_model_file(model_dir, True), weight_type=QuantType.QInt8)
+
+    # sentence-transformers 2.x has get_pooling_mode_str(), later releases a pooling_mode field
+    mode = pooling.get_pooling_mode_str() if hasattr(pooling, "get_pooling_mode_str") else pooling.pooling_mode
+    if mode not in ("mean", "cls", "max"):
+        raise ValueError(f"Unsupported pooling mode for ONNX export: {mode}")
+    config = {
+        "model_name": model_name,
+        "pooling": mode,
+        "normalize": any(type(module).__name__ == "Normalize" for module in st),
+        "max_seq_length": st.max_seq_length,
+        "pad_token": tokenizer.pad_token,
+        "pad_token_id": tokenizer.pad_token_id,
+        "dim": transformer.auto_model.config.hidden_size,
+    }
+    with open(os.path.join(model_dir, CONFIG_FILE), "w") as f:
+        json.dump(config, f, indent=2)
+    logger.info(f"Exported {model_name} to ONNX in {model_dir} (int8: {quantize})")
+    return onnx_model_file(model_dir, quantize)
+
+
+class OnnxEmbedder:
+    """Drop-in for the `SentenceTransformer.encode` calls `embedding_engine` makes."""
+
+    def __init__(self, model_dir: str, quantize: bool = True, threads: int = 0):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        config = read_config(model_dir)
+        if config is None:
+            raise FileNotFoundError(f"No {CONFIG_FILE} in {model_dir}; run scripts/export_onnx.py first")
+        self.config = config
+        self.max_seq_length = config["max_seq_length"]
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.max_seq_length)
+        self.tokenizer.enable_padding(pad_id=config["pad_token_id"], pad_token=config["pad_token"])
+        # Untruncated, unpadded copy for splitting long texts into token windows
+        self._splitter = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self._splitter.no_truncation()
+        self._splitter.no_padding()
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(onnx_model_file(model_dir, quantize), options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32, convert_to_numpy: bool = True, **kwargs) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        out = np.zeros((len(texts), self.config["dim"]), dtype=np.float32)
+        # Longest first, like SentenceTransformer, so each batch pads to similar lengths
+        order = np.argsort([-len(t) for t in texts], kind="stable")
+        for start in range(0, len(texts), batch_size):
+            rows = order[start:start + batch_size]
+            out[rows] = self._encode_batch([texts[i] for i in rows])
+        return out[0] if single else out
+
+    def token_offsets(self, texts: List[str]) -> List[List[Tuple[int, int]]]:
+        """Character span of every token (no special tokens, no truncation) per text."""
+        return [e.offsets for e in self._splitter.encode_batch(texts, add_special_tokens=False)]
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": mask,
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        hidden = self.session.run(None, {name: feeds[name] for name in self.input_names})[0]
+
+        pooling = self.config["pooling"]
+        if pooling == "cls":
+            vecs = hidden[:, 0]
+        elif pooling == "max":
+            vecs = np.where(mask[..., None] > 0, hidden, -1e9).max(axis=1)
+        else:
+            weights = mask[..., None].astype(np.float32)
+            vecs = (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+        if self.config["normalize"]:
+            vecs = vecs / np.clip(np.linalg.norm(vecs, axis=1, keepdims=True), 1e-12, None)
+        return vecs.astype(np.float32)
@@ -0,0 +1,110 @@
+"""Per-source token buckets that pace job API requests to `<SOURCE>_RATE_LIMIT`.
+
+Each bucket refills at the source's requests-per-minute limit and holds at most
+`RATE_LIMIT_BURST` tokens. `acquire()` reserves a token and sleeps until it is due,
+so concurrent fetch tasks for one source queue up in order instead of bursting.
+A throttled response's `Retry-After` blocks the bucket for that long. Buckets live
+for the whole process (they are only used from the event loop), so back-to-back
+fetch runs share them.
+"""
+import asyncio
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+from ..config.settings import settings
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class TokenBucket:
+    """Async token bucket; a rate of 0 or less disables limiting."""
+
+    def __init__(self, per_minute: float, burst: int):
+        self.per_minute = per_minute
+        self.rate = per_minute / 60.0
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self.requests = 0
+        self.waits = 0
+        self.waited_seconds = 0.0
+        self.throttled = 0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(float(self.capacity), self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        self.requests += 1
+        if self.rate <= 0:
+            return
+        now = time.monotonic()
+        self._refill(now)
+        self._tokens -= 1  # reserve; a negative balance is the queue ahead of us
+        due = now + (-self._tokens / self.rate if self._tokens < 0 else 0.0)
+        waited = False
+        # Re-check after sleeping: a Retry-After may have arrived meanwhile
+        while (delay := max(due, self._blocked_until) - time.monotonic()) > 0:
+            waited = True
+            self.waited_seconds += delay
+            await asyncio.sleep(delay)
+        self.waits += waited
+
+    def block(self, seconds: float) -> None:
+        """Honour a `Retry-After`: no request is released for `seconds`."""
+        self.throttled += 1
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def blocked_for(self) -> float:
+        return max(0.0, self._blocked_until - time.monotonic())
+
+    def stats(self) -> Dict:
+        if self.rate > 0:
+            self._refill(time.monotonic())
+        return {
+            "per_minute": self.per_minute,
+            "capacity": self.capacity,
+            "tokens": round(self._tokens, 2) if self.rate > 0 else None,
+            "blocked_seconds": round(self.blocked_for(), 1),
+            "requests": self.requests,
+            "waits": self.waits,
+            "waited_seconds": round(self.waited_seconds, 2),
+            "throttled": self.throttled,
+        }
+
+
+_buckets: Dict[str, TokenBucket] = {}
+
+
+def get_rate_limiter(source: str) -> TokenBucket:
+    bucket = _buckets.get(source)
+    if bucket is None:
+        per_minute = getattr(settings, f"{source.upper()}_RATE_LIMIT", 0)
+        bucket = _buckets[source] = TokenBucket(per_minute, settings.RATE_LIMIT_BURST)
+    return bucket
+
+
+def rate_limit_stats() -> Dict[str, Dict]:
+    return {source: bucket.stats() for source, bucket in _buckets.items()}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a `Retry-After` header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        logger.warning(f"Unparseable Retry-After header: {value!r}")
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
@@ -0,0 +1,154 @@
+"""Process-resident resume embedding index, for ranking candidates against a job.
+
+The mirror image of `job_index`: every stored resume embedding is kept as one
+pre-normalized matrix, updated incrementally as resumes are uploaded, so a job is
+ranked against all resumes with a single matrix-vector product and an argpartition
+top-k selection instead of a scan of the resumes collection.
+"""
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .ann_backend import top_k_rows
+from .embedding_codec import EMBEDDING_FIELDS, decode_embedding
+from ..config.database import get_resumes_collection
+from ..config.settings import settings
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Fields kept next to each vector for a candidate result
+RESUME_META_FIELDS = ("resume_id", "filename", "created_at")
+
+_PROJECTION = {"_id": 0, **EMBEDDING_FIELDS, **{f: 1 for f in RESUME_META_FIELDS}}
+
+_INITIAL_CAPACITY = 1024
+
+
+class ResumeIndex:
+    """In-memory resume vectors with incremental updates and a version counter."""
+
+    def __init__(self, dim: int, model_id: Optional[str] = None):
+        self.dim = dim
+        self.model_id = model_id  # embedding model version indexed, as in JobIndex
+        self.version = 0
+        self.loaded = False
+        self._lock = threading.RLock()
+        self._reset()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def load(self) -> None:
+        """(Re)build the index from the resumes collection."""
+        coll = get_resumes_collection()
+        query = {"embedding": {"$exists": True, "$ne": []}}
+        with self._lock:
+            self._reset()
+            added = self._upsert_many(coll.find(query, _PROJECTION))
+            self.version += 1
+            self.loaded = True
+        logger.info(f"Resume index loaded: {added} resumes (version {self.version})")
+
+    def ensure_loaded(self) -> None:
+        if not self.loaded:
+            with self._lock:
+                if not self.loaded:
+                    self.load()
+
+    def refresh(self, resume_ids: List[str]) -> int:
+        """Re-read these resumes from MongoDB, e.g. after their vectors were rewritten."""
+        return self.upsert(get_resumes_collection().find({"resume_id": {"$in": list(resume_ids)}}, _PROJECTION))
+
+    def upsert(self, resumes: Iterable[Dict]) -> int:
+        """Insert or refresh resumes that were just written to MongoDB."""
+        with self._lock:
+            changed = self._upsert_many(resumes)
+            if changed:
+                self.version += 1
+        return changed
+
+    def _reset(self) -> None:
+        self._vectors = np.zeros((_INITIAL_CAPACITY, self.dim), dtype=np.float32)
+        self._size = 0
+        self._meta: List[Dict] = []
+        self._rows: Dict[str, int] = {}
+
+    def _upsert_many(self, resumes: Iterable[Dict]) -> int:
+        changed = 0
+        for doc in resumes:
+            resume_id = doc.get("resume_id")
+            vec = decode_embedding(doc, self.model_id)
+            if not resume_id or vec is None:
+                continue
+            if vec.shape != (self.dim,):
+                logger.warning(f"Skipping resume {resume_id}: embedding has shape {vec.shape}, expected ({self.dim},)")
+                continue
+            norm = float(np.linalg.norm(vec))
+            meta = {f: doc.get(f) for f in RESUME_META_FIELDS}
+            row = self._rows.get(resume_id)
+            if row is None:
+                row = self._append_row()
+                self._rows[resume_id] = row
+                self._meta.append(meta)
+            else:
+                self._meta[row].update({k: v for k, v in meta.items() if k in doc})
+            self._vectors[row] = vec / norm if norm else vec
+            changed += 1
+        return changed
+
+    def _append_row(self) -> int:
+        if self._size == self._vectors.shape[0]:
+            vectors = np.zeros((self._vectors.shape[0] * 2, self.dim), dtype=np.float32)
+            vectors[: self._size] = self._vectors[: self._size]
+            self._vectors = vectors
+        row = self._size
+        self._size += 1
+        return row
+
+    def search(self, query: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the top_k (rows, cosine scores) for a job vector, best first."""
+        query = np.asarray(query, dtype=np.float32)
+        norm = float(np.linalg.norm(query))
+        if norm:
+            query = query / norm
+        with self._lock:
+            vectors = self._vectors[: self._size]
+        scores = vectors @ query
+        top = top_k_rows(scores, top_k)
+        return top, scores[top]
+
+    def candidate(self, row: int, score: float) -> Dict:
+        """Materialize a result dict for one row."""
+        out = dict(self._meta[row])
+        out["match_score"] = round(float(score) * 100.0, 2)
+        return out
+
+    def stats(self) -> Dict:
+        return {"resumes": self._size, "version": self.version, "loaded": self.loaded, "model_id": self.model_id}
+
+
+_index: Optional[ResumeIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_resume_index() -> ResumeIndex:
+    global _index
+    if _index is None:
+        from .embedding_engine import embedding_model_id
+
+        with _index_lock:
+            if _index is None:
+                _index = ResumeIndex(settings.EMBEDDING_DIM, embedding_model_id())
+    return _index
+
+
+def set_resume_index(index: ResumeIndex) -> Optional[ResumeIndex]:
+    """Serve `index` from now on (see `job_index.set_job_index`); returns the one it replaces."""
+    global _index
+    with _index_lock:
+        old, _index = _index, index
+        if old is not None:
+            index.version = max(index.version, old.version) + 1
+    return old
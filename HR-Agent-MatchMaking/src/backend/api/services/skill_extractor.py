@@ -1,36 +1,47 @@
-from typing import List, Dict
+"""Keyword extraction of technical skills, soft skills and certifications.
+
+Besides the name lists stored on resumes, skills can be packed into a bitset over
+the fixed `SKILL_VOCABULARY`: jobs store theirs at ingest (`skill_bits`, tagged
+with `skill_vocab`), so a match report is a few bitwise operations instead of
+running these regexes per request.
+"""
+import hashlib
+from typing import Dict, Iterable, List, Optional
 import re
 
-# Comprehensive skill database
-TECHNICAL_SKILLS = {
-    # Languages
-    "python", "java", "javascript", "typescript", "c++", "c#", "go", "rust", "php", "ruby", "kotlin",
-    "swift", "objective-c", "r", "matlab", "scala", "groovy", "perl", "bash", "shell", "sql", "plsql",
-    
-    # Web Frameworks & Libraries
-    "react", "vue", "angular", "svelte", "next.js", "nuxt", "fastapi", "django", "flask", "spring", "express",
-    "asp.net", "laravel", "rails", "gin", "echo", "fastify", "nestjs", "remix",
-    
-    # Databases
-    "postgresql", "mysql", "mongodb", "redis", "elasticsearch", "dynamodb", "cassandra", "mariadb", "sqlite",
-    "oracle", "sql server", "firebase", "couchdb", "neo4j", "influxdb", "timescaledb",
-    
-    # Cloud & DevOps
-    "aws", "azure", "gcp", "google cloud", "docker", "kubernetes", "jenkins", "gitlab ci", "github actions",
-    "terraform", "ansible", "helm", "ecs", "ec2", "s3", "lambda", "cloudformation", "docker compose",
-    
-    # Data & AI/ML
-    "pandas", "numpy", "scikit-learn", "tensorflow", "pytorch", "keras", "nltk", "spacy", "opencv",
-    "spark", "hadoop", "etl", "airflow", "dbt", "tableau", "power bi", "looker",
-    
-    # Tools & Platforms
-    "git", "linux", "docker", "ci/cd", "rest api", "graphql", "websocket", "grpc", "rabbitmq", "kafka",
-    "jira", "confluence", "slack", "datadog", "splunk", "prometheus", "grafana", "sonarqube",
-    
-    # Other
-    "microservices", "rest", "soap", "json", "xml", "html", "css", "webpack", "vite", "npm", "yarn",
+# Comprehensive skill database, grouped by family (see `transferable_skills` in reports)
+SKILL_GROUPS = {
+    "languages": {
+        "python", "java", "javascript", "typescript", "c++", "c#", "go", "rust", "php", "ruby", "kotlin",
+        "swift", "objective-c", "r", "matlab", "scala", "groovy", "perl", "bash", "shell", "sql", "plsql",
+    },
+    "web_frameworks": {
+        "react", "vue", "angular", "svelte", "next.js", "nuxt", "fastapi", "django", "flask", "spring", "express",
+        "asp.net", "laravel", "rails", "gin", "echo", "fastify", "nestjs", "remix",
+    },
+    "databases": {
+        "postgresql", "mysql", "mongodb", "redis", "elasticsearch", "dynamodb", "cassandra", "mariadb", "sqlite",
+        "oracle", "sql server", "firebase", "couchdb", "neo4j", "influxdb", "timescaledb",
+    },
+    "cloud_devops": {
+        "aws", "azure", "gcp", "google cloud", "docker", "kubernetes", "jenkins", "gitlab ci", "github actions",
+        "terraform", "ansible", "helm", "ecs", "ec2", "s3", "lambda", "cloudformation", "docker compose",
+    },
+    "data_ml": {
+        "pandas", "numpy", "scikit-learn", "tensorflow", "pytorch", "keras", "nltk", "spacy", "opencv",
+        "spark", "hadoop", "etl", "airflow", "dbt", "tableau", "power bi", "looker",
+    },
+    "tools": {
+        "git", "linux", "docker", "ci/cd", "rest api", "graphql", "websocket", "grpc", "rabbitmq", "kafka",
+        "jira", "confluence", "slack", "datadog", "splunk", "prometheus", "grafana", "sonarqube",
+    },
+    "other": {
+        "microservices", "rest", "soap", "json", "xml", "html", "css", "webpack", "vite", "npm", "yarn",
+    },
 }
 
+TECHNICAL_SKILLS = set().union(*SKILL_GROUPS.values())
+
 SOFT_SKILLS = {
     "communication", "leadership", "teamwork", "problem solving", "critical thinking", "time management",
     "project management", "agile", "scrum", "kanban", "negotiation", "presentations", "mentoring",
@@ -43,37 +54,69 @@ CERTIFICATIONS = {
 }
 
 
+# Bit i of a skill bitset stands for SKILL_VOCABULARY[i]
+SKILL_VOCABULARY = tuple(sorted(TECHNICAL_SKILLS)) + tuple(sorted(SOFT_SKILLS)) + tuple(sorted(CERTIFICATIONS))
+SKILL_VOCAB_VERSION = hashlib.sha1("\n".join(SKILL_VOCABULARY).encode()).hexdigest()[:12]
+SKILL_WORDS = -(-len(SKILL_VOCABULARY) // 64)  # uint64 words per bitset
+
+_SKILL_IDS = {skill: i for i, skill in enumerate(SKILL_VOCABULARY)}
+_SKILL_RES = [(skill, re.compile(r'\b' + re.escape(skill) + r'\b')) for skill in SKILL_VOCABULARY]
+
+
 def extract_skills(text: str) -> Dict[str, List[str]]:
     """Extract technical, soft skills and certifications from resume text."""
     if not text:
         return {"technical": [], "soft": [], "certifications": []}
     
     text_lower = text.lower()
-    
-    # Extract technical skills with word boundaries
-    technical = set()
-    for skill in TECHNICAL_SKILLS:
-        # Use word boundaries to avoid partial matches
-        pattern = r'\b' + re.escape(skill) + r'\b'
-        if re.search(pattern, text_lower):
-            technical.add(skill)
-    
-    # Extract soft skills
-    soft = set()
-    for skill in SOFT_SKILLS:
-        pattern = r'\b' + re.escape(skill) + r'\b'
-        if re.search(pattern, text_lower):
-            soft.add(skill)
-    
-    # Extract certifications
-    certs = set()
-    for cert in CERTIFICATIONS:
-        pattern = r'\b' + re.escape(cert) + r'\b'
-        if re.search(pattern, text_lower):
-            certs.add(cert)
+    # Word boundaries avoid partial matches
+    found = {skill for skill, pattern in _SKILL_RES if pattern.search(text_lower)}
     
     return {
-        "technical": sorted(list(technical)),
-        "soft": sorted(list(soft)),
-        "certifications": sorted(list(certs))
+        "technical": sorted(found & TECHNICAL_SKILLS),
+        "soft": sorted(found & SOFT_SKILLS),
+        "certifications": sorted(found & CERTIFICATIONS),
     }
+
+
+def skill_bits(text: str) -> int:
+    """All skills found in `text`, as a bitset over `SKILL_VOCABULARY`."""
+    text_lower = (text or "").lower()
+    bits = 0
+    for i, (_, pattern) in enumerate(_SKILL_RES):
+        if pattern.search(text_lower):
+            bits |= 1 << i
+    return bits
+
+
+def skill_bits_from_names(names: Iterable[str]) -> int:
+    """Bitset of already-extracted skill names; names outside the vocabulary are ignored."""
+    bits = 0
+    for name in names:
+        i = _SKILL_IDS.get(name)
+        if i is not None:
+            bits |= 1 << i
+    return bits
+
+
+def skill_names(bits: int) -> List[str]:
+    """Skill names of a bitset, in vocabulary order."""
+    names = []
+    while bits:
+        low = bits & -bits
+        names.append(SKILL_VOCABULARY[low.bit_length() - 1])
+        bits ^= low
+    return names
+
+
+def skill_fields(text: str) -> Dict:
+    """Fields to persist on a job document: the packed `skill_bits` plus their `skill_vocab`."""
+    return {"skill_bits": skill_bits(text).to_bytes(SKILL_WORDS * 8, "little"), "skill_vocab": SKILL_VOCAB_VERSION}
+
+
+def stored_skill_bits(doc: Dict) -> Optional[int]:
+    """The bitset persisted by `skill_fields`, or None if missing or from another vocabulary."""
+    raw = doc.get("skill_bits")
+    if raw is None or doc.get("skill_vocab") != SKILL_VOCAB_VERSION:
+        return None
+    return int.from_bytes(bytes(raw), "little")
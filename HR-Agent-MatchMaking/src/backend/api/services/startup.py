@@ -0,0 +1,97 @@
+"""Timed startup phases behind the `/api/ready` readiness check.
+
+The app starts serving (and `/api/health` answers) straight away while `run_startup`
+loads and warms the embedding model and loads the job and resume indexes in the
+background, the model in parallel with the indexes. Each phase is timed and logged,
+so cold-start cost shows up in `/api/ready` and `/api/status`. `/api/ready` stays
+503 until the model is warm and both indexes are resident. Index loads that fail
+(e.g. MongoDB not up yet) are retried every `STARTUP_RETRY_SECONDS`.
+
+The embedding model version to serve is settled first, and a configured embedding
+model migration starts in the background once startup is done.
+"""
+import asyncio
+import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional
+
+from ..config.settings import settings
+from ..utils.logger import get_logger
+from .embedding_engine import load_model, warm_up_model
+from .embedding_migration import resolve_serving_model, start_migration
+from .job_api_aggregator import AggregatorScheduler
+from .job_index import get_job_index
+from .resume_index import get_resume_index
+
+logger = get_logger(__name__)
+
+
+class StartupState:
+    def __init__(self):
+        self.phases: Dict[str, Dict[str, Any]] = {}
+        self.startup_seconds: Optional[float] = None
+        self.started = time.perf_counter()
+
+    async def run_phase(self, name: str, fn: Callable[[], Any], offload: bool = True) -> bool:
+        """Run `fn` (off the event loop unless `offload` is False); a False result or an exception fails the phase."""
+        attempts = self.phases.get(name, {}).get("attempts", 0) + 1
+        self.phases[name] = {"status": "running", "attempts": attempts}
+        started = time.perf_counter()
+        error = None
+        try:
+            ok = (await asyncio.to_thread(fn) if offload else fn()) is not False
+        except Exception as e:
+            logger.exception(f"Startup phase {name} failed")
+            ok, error = False, str(e)
+        seconds = round(time.perf_counter() - started, 3)
+        self.phases[name] = {"status": "ok" if ok else "failed", "seconds": seconds, "attempts": attempts}
+        if error:
+            self.phases[name]["error"] = error
+        logger.info(f"Startup phase {name}: {self.phases[name]['status']} in {seconds:.3f}s")
+        return ok
+
+    def readiness(self) -> Dict[str, Any]:
+        checks = {
+            "model": self.phases.get("model_warmup", {}).get("status") == "ok",
+            "job_index": get_job_index().loaded,
+            "resume_index": get_resume_index().loaded,
+        }
+        return {
+            "ready": all(checks.values()),
+            "checks": checks,
+            "phases": self.phases,
+            "startup_seconds": self.startup_seconds,
+        }
+
+
+@lru_cache
+def get_startup_state() -> StartupState:
+    return StartupState()
+
+
+async def run_startup(state: StartupState) -> None:
+    async def model_phases():
+        if await state.run_phase("model_load", load_model):
+            await state.run_phase("model_warmup", warm_up_model)
+
+    # Which model (and so which stored vectors) to serve, if a migration already switched
+    await state.run_phase("embedding_version", resolve_serving_model)
+    # Model load and index loads are independent: run them side by side
+    await asyncio.gather(
+        model_phases(),
+        state.run_phase("job_index", get_job_index().ensure_loaded),
+        state.run_phase("resume_index", get_resume_index().ensure_loaded),
+    )
+    # The first scheduled sync writes through the job index, so it starts after the load
+    # (APScheduler's AsyncIOScheduler must be started on the event loop)
+    await state.run_phase("scheduler", AggregatorScheduler.start, offload=False)
+    await state.run_phase("embedding_migration", start_migration)
+    state.startup_seconds = round(time.perf_counter() - state.started, 3)
+    logger.info(f"Startup finished in {state.startup_seconds:.3f}s: {state.readiness()['checks']}")
+
+    retry = {"job_index": get_job_index(), "resume_index": get_resume_index()}
+    while any(not index.loaded for index in retry.values()):
+        await asyncio.sleep(settings.STARTUP_RETRY_SECONDS)
+        for name, index in retry.items():
+            if not index.loaded:
+                await state.run_phase(name, index.ensure_loaded)
@@ -3,14 +3,24 @@ from fastapi import UploadFile
 from PyPDF2 import PdfReader
 from docx import Document
 
+from .concurrency import run_stage
+
 
 async def extract_text(file: UploadFile) -> Tuple[str, str]:
-    """Extract text from uploaded file. Returns (filename, text)."""
+    """Extract text from uploaded file. Returns (filename, text).
+
+    Parsing runs in the "parse" stage, off the event loop.
+    """
     filename = file.filename or "resume"
     content_type = file.content_type or "application/octet-stream"
-    suffix = (filename.split(".")[-1] or "").lower()
     data = await file.read()
+    text = await run_stage("parse", parse_document, filename, content_type, data)
+    return filename, text
 
+
+def parse_document(filename: str, content_type: str, data: bytes) -> str:
+    """Plain text of a PDF, DOCX or text document (blocking)."""
+    suffix = (filename.split(".")[-1] or "").lower()
     if suffix == "pdf" or content_type == "application/pdf":
         from io import BytesIO
         reader = PdfReader(BytesIO(data))
@@ -26,4 +36,4 @@ async def extract_text(file: UploadFile) -> Tuple[str, str]:
         except Exception:
             text = ""
 
-    return filename, text
+    return text
@@ -11,6 +11,8 @@ class FetchResult(BaseModel):
 class TriggerRefreshRequest(BaseModel):
     keywords: str
     locations: List[str]
+    # Re-sync only these sources (e.g. ["reed"]) and rebuild their job index partitions
+    sources: Optional[List[str]] = None
 
 
 class TriggerRefreshResponse(BaseModel):
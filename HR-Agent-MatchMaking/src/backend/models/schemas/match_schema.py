@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Dict, Optional
 
 
@@ -33,3 +33,43 @@ class MatchResponse(BaseModel):
     matches_by_source: Dict[str, int]
     top_matches: List[JobMatch]
     generated_at: str
+    next_cursor: Optional[str] = None
+    timings_ms: Optional[Dict[str, float]] = None  # "match" and "report" stage latencies
+
+
+class BatchMatchRequest(BaseModel):
+    resume_ids: List[str] = Field(..., min_length=1)
+    top_k: int = Field(default=50, ge=1, le=200)
+    source_filter: str = "all"
+    diversity: bool = False
+    diversity_mode: str = Field(default="language", pattern="^(language|mmr)$")
+    mmr_lambda: Optional[float] = Field(default=None, ge=0.0, le=1.0)
+    retrieval: str = Field(default="semantic", pattern="^(semantic|hybrid)$")
+    country: Optional[List[str]] = None
+    employment_type: Optional[List[str]] = None
+    salary_min: Optional[float] = Field(default=None, ge=0)
+    salary_max: Optional[float] = Field(default=None, ge=0)
+    posted_within_days: Optional[int] = Field(default=None, ge=1)
+    include_report: bool = False
+
+
+class BatchMatchResponse(BaseModel):
+    total_resumes: int
+    results: List[MatchResponse]
+    missing_resume_ids: List[str]
+    generated_at: str
+
+
+class CandidateMatch(BaseModel):
+    resume_id: str
+    filename: Optional[str] = None
+    created_at: Optional[str] = None
+    match_score: float
+
+
+class CandidateResponse(BaseModel):
+    job_id: str
+    job_title: Optional[str] = None
+    total_candidates: int
+    top_candidates: List[CandidateMatch]
+    generated_at: str
@@ -46,6 +46,8 @@ export interface MatchResponse {
   matches_by_source: Record<string, number>;
   top_matches: JobMatch[];
   generated_at: string;
+  next_cursor?: string | null;
+  timings_ms?: Record<string, number> | null;
 }
 
 export interface JobStats {
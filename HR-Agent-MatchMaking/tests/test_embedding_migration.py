@@ -0,0 +1,215 @@
+"""
+Changing a setting that changes the embedding model id must not empty the job index.
+
+Turning `EMBED_CHUNKING` on makes stored vectors a version behind: the old version
+keeps being served until the migration has backfilled every document, then the
+chunked one is switched in. Runs against an in-memory MongoDB and a stub model whose
+vectors depend on the model version, so a query embedded with the wrong version
+would not find its own job.
+"""
+import hashlib
+
+import numpy as np
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+JOBS = 40
+RESUMES = 5
+
+
+class StubModel:
+    """Deterministic unit vectors per (model version, text); splits tokens on spaces."""
+
+    max_seq_length = 128
+
+    def __init__(self, model_id: str, dim: int):
+        self.model_id = model_id
+        self.dim = dim
+
+    def encode(self, texts, convert_to_numpy=True, **kwargs):
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        out = np.stack([self._vector(t) for t in batch]) if batch else np.zeros((0, self.dim), np.float32)
+        return out[0] if single else out
+
+    def token_offsets(self, texts):
+        offsets = []
+        for text in texts:
+            spans, start = [], 0
+            for word in text.split(" "):
+                spans.append((start, start + len(word)))
+                start += len(word) + 1
+            offsets.append(spans)
+        return offsets
+
+    def _vector(self, text: str) -> np.ndarray:
+        seed = int(hashlib.md5(f"{self.model_id}|{text}".encode()).hexdigest()[:8], 16)
+        vec = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+        return vec / np.linalg.norm(vec)
+
+
+@pytest.fixture
+def env(monkeypatch):
+    from src.backend.api.config import database
+    from src.backend.api.config.settings import settings
+    from src.backend.api.services import embedding_cache, embedding_engine, embedding_migration
+
+    monkeypatch.setattr(database, "_client", mongomock.MongoClient())
+    for name, value in {
+        "EMBED_CACHE_PATH": "", "EMBED_WORKERS": 0, "EMBED_BACKEND": "torch", "EMBED_CHUNKING": False,
+        "EMBED_MICROBATCH_ENABLED": False, "EMBED_MIGRATION_MODEL": "", "EMBED_MIGRATION_MAX_RATE": 0,
+        "EMBED_MIGRATION_BATCH_SIZE": 8, "MATCH_CACHE_ENABLED": False, "JOB_SNAPSHOT_DIR": "",
+    }.items():
+        monkeypatch.setattr(settings, name, value)
+    monkeypatch.setattr(embedding_engine, "load_embedding_model", lambda model_id: StubModel(model_id, settings.EMBEDDING_DIM))
+    # Steps are driven by the test instead of the background thread
+    monkeypatch.setattr(embedding_migration.EmbeddingMigration, "start", lambda self: None)
+    embedding_cache.get_embedding_cache.cache_clear()
+    restart(monkeypatch)
+    yield settings
+    embedding_cache.get_embedding_cache.cache_clear()
+
+
+def restart(monkeypatch):
+    """Forget the in-process state a restarted API process would not have."""
+    from src.backend.api.services import embedding_engine, embedding_migration, job_index, resume_index
+
+    monkeypatch.setattr(embedding_engine, "_serving_model", None)
+    monkeypatch.setattr(embedding_migration, "_migration", None)
+    monkeypatch.setattr(job_index, "_index", None)
+    monkeypatch.setattr(resume_index, "_index", None)
+
+
+def job_doc(i: int):
+    return {"job_id": f"job{i}", "job_title": f"engineer {i}", "company": f"company {i}",
+            "description": f"python developer number {i}", "source": ("reed", "adzuna")[i % 2]}
+
+
+def seed():
+    from src.backend.api.config.database import get_jobs_collection, get_resumes_collection
+    from src.backend.api.services.embedding_engine import embed_texts, embedding_fields
+    from src.backend.api.services.job_api_aggregator import job_embedding_text
+
+    jobs = [job_doc(i) for i in range(JOBS)]
+    for job, emb in zip(jobs, embed_texts([job_embedding_text(j) for j in jobs])):
+        job.update(embedding_fields(emb))
+    get_jobs_collection().insert_many(jobs)
+    resumes = [{"resume_id": f"r{i}", "content": f"resume {i} python"} for i in range(RESUMES)]
+    for resume, emb in zip(resumes, embed_texts([r["content"] for r in resumes])):
+        resume.update(embedding_fields(emb))
+    get_resumes_collection().insert_many(resumes)
+
+
+def indexed() -> int:
+    from src.backend.api.services.job_index import get_job_index
+
+    index = get_job_index()
+    index.ensure_loaded()
+    return len(index)
+
+
+def top_job(text: str) -> str:
+    from src.backend.api.services.embedding_engine import embed_text
+    from src.backend.api.services.job_index import get_job_index
+
+    index = get_job_index()
+    index.ensure_loaded()
+    rows, _ = index.search(np.asarray(embed_text(text), dtype=np.float32), 1)
+    return index.job(int(rows[0]), 0.0)["job_id"]
+
+
+def test_chunking_switch_keeps_serving_until_backfilled(env, monkeypatch):
+    from src.backend.api.config.database import get_embedding_versions_collection, get_jobs_collection
+    from src.backend.api.services.embedding_engine import configured_model_id, embedding_fields, embedding_model_id
+    from src.backend.api.services.embedding_migration import get_migration, resolve_serving_model, start_migration
+    from src.backend.api.services.job_api_aggregator import job_embedding_text
+    from src.backend.api.services.job_index import get_job_index
+
+    base_id = resolve_serving_model()
+    seed()
+
+    monkeypatch.setattr(env, "EMBED_CHUNKING", True)
+    restart(monkeypatch)
+    chunked_id = configured_model_id()
+    assert chunked_id != base_id
+    assert resolve_serving_model() == base_id
+    assert indexed() == JOBS
+    assert top_job(job_embedding_text(job_doc(7))) == "job7"
+
+    start_migration()
+    migration = get_migration()
+    assert migration is not None and migration.phase == "backfill" and migration.target_id == chunked_id
+    migration.step()
+    assert embedding_model_id() == base_id and indexed() == JOBS
+    # Written mid-backfill with the served version; the migration picks it up too
+    late = job_doc(JOBS)
+    late.update(embedding_fields(StubModel(base_id, env.EMBEDDING_DIM).encode(job_embedding_text(late))))
+    get_jobs_collection().insert_one(late)
+    get_job_index().upsert([late])
+    assert top_job(job_embedding_text(late)) == late["job_id"]
+
+    for _ in range(50):
+        if migration.phase != "backfill":
+            break
+        migration.step()
+    assert migration.phase == "finalize"
+    assert embedding_model_id() == chunked_id and get_job_index().model_id == chunked_id
+    assert indexed() == JOBS + 1
+    assert top_job(job_embedding_text(job_doc(7))) == "job7"
+    assert get_embedding_versions_collection().find_one({"_id": "active"})["finalized"] is False
+
+    while migration.phase == "finalize":
+        migration.step()
+    assert migration.phase == "done"
+    active = get_embedding_versions_collection().find_one({"_id": "active"})
+    assert (active["model_name"], active["model_id"], active["finalized"]) == (env.MODEL_NAME, chunked_id, True)
+
+    restart(monkeypatch)
+    assert resolve_serving_model() == chunked_id
+    start_migration()
+    assert get_migration() is None
+    assert indexed() == JOBS + 1
+
+
+def test_unknown_recorded_version_does_not_empty_index(env):
+    from src.backend.api.config.database import get_embedding_versions_collection
+    from src.backend.api.services.embedding_migration import resolve_serving_model
+
+    base_id = resolve_serving_model()
+    seed()
+    get_embedding_versions_collection().update_one({"_id": "active"}, {"$set": {"model_id": "other-model+chunk0/32/16"}})
+
+    assert resolve_serving_model() == base_id
+    assert indexed() == JOBS
+    assert get_embedding_versions_collection().find_one({"_id": "active"})["model_id"] == base_id
+
+
+def test_untagged_vectors_are_legacy_model_and_migrate(env, monkeypatch):
+    from src.backend.api.config.database import get_embedding_versions_collection, get_jobs_collection
+    from src.backend.api.services.embedding_codec import encode_embedding
+    from src.backend.api.services.embedding_engine import embedding_model_id
+    from src.backend.api.services.embedding_migration import get_migration, resolve_serving_model, start_migration
+    from src.backend.api.services.job_api_aggregator import job_embedding_text
+
+    # Stored before vectors were tagged, by the model configured back then
+    legacy = StubModel(env.EMBED_LEGACY_MODEL, env.EMBEDDING_DIM)
+    jobs = [job_doc(i) for i in range(JOBS)]
+    for job in jobs:
+        job.update(encode_embedding(legacy.encode(job_embedding_text(job))))
+    get_jobs_collection().insert_many(jobs)
+
+    monkeypatch.setattr(env, "MODEL_NAME", "sentence-transformers/all-mpnet-base-v2")
+    assert resolve_serving_model() == env.EMBED_LEGACY_MODEL
+    assert get_jobs_collection().count_documents({"embedding_model": env.EMBED_LEGACY_MODEL}) == JOBS
+    assert get_embedding_versions_collection().find_one({"_id": "active"})["model_id"] == env.EMBED_LEGACY_MODEL
+    assert indexed() == JOBS
+    assert top_job(job_embedding_text(job_doc(3))) == "job3"
+
+    start_migration()
+    migration = get_migration()
+    assert migration is not None and migration.phase == "backfill" and migration.target_id == env.MODEL_NAME
+    while migration.phase != "done":
+        migration.step()
+    assert embedding_model_id() == env.MODEL_NAME and indexed() == JOBS
+    assert top_job(job_embedding_text(job_doc(3))) == "job3"
@@ -0,0 +1,133 @@
+"""
+/api/health must stay fast while match requests keep the embed and match stages busy.
+
+Runs the health and match routers in one event loop (as uvicorn would) against an
+in-memory MongoDB and a stub embedding model, so neither a database nor the real
+model is needed. Resumes are stored without a vector, so every match embeds.
+"""
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+JOBS = 5000
+CONCURRENCY = 8
+LOAD_SECONDS = 4.0
+PROBE_INTERVAL = 0.02
+MAX_RATIO = 3.0
+SLACK_MS = 20.0
+
+
+class StubModel:
+    """Deterministic vectors per text, with a blocking pause standing in for inference."""
+
+    def __init__(self, dim: int, delay: float = 0.02):
+        self.dim = dim
+        self.delay = delay
+
+    def encode(self, texts, convert_to_numpy=True, **kwargs):
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        time.sleep(self.delay)
+        out = np.stack([self._vector(t) for t in batch]) if batch else np.zeros((0, self.dim), np.float32)
+        return out[0] if single else out
+
+    def _vector(self, text: str) -> np.ndarray:
+        seed = int(hashlib.md5(text.encode()).hexdigest()[:8], 16)
+        return np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    from src.backend.api.config import database
+    from src.backend.api.config.settings import settings
+    from src.backend.api.services import embedding_cache, embedding_engine, job_index, match_cache, resume_index
+    from src.backend.api.services.embedding_engine import embedding_fields
+
+    mongo = mongomock.MongoClient()
+    monkeypatch.setattr(database, "_client", mongo)
+    monkeypatch.setattr(settings, "EMBED_CACHE_PATH", "")
+    monkeypatch.setattr(settings, "EMBED_WORKERS", 0)
+    monkeypatch.setattr(settings, "EMBED_BACKEND", "torch")
+    monkeypatch.setattr(settings, "MATCH_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "JOB_SNAPSHOT_DIR", "")
+    monkeypatch.setattr(embedding_engine, "load_embedding_model", lambda model_name=None: StubModel(settings.EMBEDDING_DIM))
+    monkeypatch.setattr(job_index, "_index", None)
+    monkeypatch.setattr(resume_index, "_index", None)
+    embedding_cache.get_embedding_cache.cache_clear()
+    match_cache.get_match_cache.cache_clear()
+
+    # Seeded before the collection helpers create their indexes: mongomock inserts slowly into indexed collections
+    rng = np.random.default_rng(0)
+    mongo["resume_matcher"]["jobs"].insert_many([
+        {"job_id": f"job{i}", "job_title": "developer", "source": ("reed", "adzuna")[i % 2],
+         **embedding_fields(rng.standard_normal(settings.EMBEDDING_DIM))}
+        for i in range(JOBS)
+    ])
+    mongo["resume_matcher"]["resumes"].insert_one({"resume_id": "r1", "content": "python fastapi aws developer"})
+
+    from src.backend.api.routes import health_routes, match_routes
+
+    app = FastAPI()
+    app.include_router(health_routes.router, prefix="/api")
+    app.include_router(match_routes.router, prefix="/api")
+    with TestClient(app) as test_client:
+        yield test_client
+    embedding_cache.get_embedding_cache.cache_clear()
+    match_cache.get_match_cache.cache_clear()
+
+
+def probe_health(client, seconds: float):
+    latencies = []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        assert client.get("/api/health").status_code == 200
+        latencies.append((time.perf_counter() - started) * 1000.0)
+        time.sleep(PROBE_INTERVAL)
+    return latencies
+
+
+def test_health_latency_stays_flat_under_match_load(client):
+    # Warm the job index and the model so the idle baseline is not a cold start
+    assert client.post("/api/match/match-resume/r1?top_k=10&include_report=false").status_code == 200
+    idle = probe_health(client, 1.0)
+
+    stop = threading.Event()
+    matches = []
+
+    def load(worker: int):
+        top_k = 20 + worker
+        while not stop.is_set():
+            top_k = 20 + (top_k - 19) % 180
+            res = client.post(f"/api/match/match-resume/r1?top_k={top_k}&diversity=false&include_report=false")
+            assert res.status_code == 200
+            matches.append(res)
+
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as pool:
+        futures = [pool.submit(load, worker) for worker in range(CONCURRENCY)]
+        time.sleep(0.5)
+        loaded = probe_health(client, LOAD_SECONDS)
+        stop.set()
+        for future in futures:
+            future.result()
+
+    assert len(matches) >= CONCURRENCY
+    budget = MAX_RATIO * percentile(idle, 0.95) + SLACK_MS
+    assert percentile(loaded, 0.95) <= budget, (
+        f"health p95 {percentile(loaded, 0.95):.1f} ms under load, budget {budget:.1f} ms "
+        f"(idle p95 {percentile(idle, 0.95):.1f} ms, {len(matches)} matches)"
+    )
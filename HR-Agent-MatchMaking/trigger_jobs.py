@@ -29,7 +29,10 @@ async def main():
         print(f"   Total jobs fetched: {results['total_jobs']}")
         print(f"   Jobs by source:")
         for source, count in results['by_source'].items():
-            print(f"      - {source}: {count} jobs")
+            http = results['http']['sources'].get(source, {})
+            print(f"      - {source}: {count} jobs "
+                  f"({http.get('requests', 0)} requests, {http.get('connections_reused', 0)} on reused connections, "
+                  f"{http.get('seconds', 0)}s)")
         
         if results.get('errors'):
             print(f"\n❌ Errors:")